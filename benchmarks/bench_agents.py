@@ -0,0 +1,242 @@
+"""
+Suíte de benchmarks dos caminhos críticos dos agentes, utilizando o FakeModel (sem chamadas de rede).
+
+Mede:
+    - storage: custo por interação (chat + gravação no InteractionHistory) em função do tamanho do histórico;
+    - build_messages: custo da montagem das mensagens (GPTModel / GeminiModel) em função da janela de histórico;
+    - file_conversion: vazão (MB/s) da conversão de arquivos nos mixins;
+    - tool_dispatch: overhead da execução das funções solicitadas pelo modelo;
+    - manager: latência ponta a ponta do ManagerAgent em função da quantidade de sub-agentes.
+
+Uso:
+    python benchmarks/bench_agents.py [--latency 0.05] [--repeat 5] [--quick] [--output resultados.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tyr_agent import SimpleAgent, ComplexAgent, ManagerAgent, FakeModel, InteractionHistory  # noqa: E402
+from tyr_agent.models.base_model import BaseModel  # noqa: E402
+from tyr_agent.mixins.gpt_file_mixins import GPTFileMixin  # noqa: E402
+from tyr_agent.utils.file_cache import FileConversionCache  # noqa: E402
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "median_ms": statistics.median(ordered) * 1000,
+        "min_ms": ordered[0] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def ameasure(fn: Callable[[], Awaitable[Any]], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def make_history(size: int) -> List[dict]:
+    return [
+        {
+            "id": f"interaction-{i}",
+            "timestamp": "2025-01-01T00:00:00",
+            "interaction": {"user": f"Pergunta número {i} do usuário?", "agent": [f"Resposta número {i} do agente."]},
+            "called_functions": [],
+            "type_agent": "simple",
+            "score": None,
+        }
+        for i in range(size)
+    ]
+
+
+async def bench_storage(tmp_dir: str, sizes: List[int], repeat: int) -> List[dict]:
+    results = []
+    for size in sizes:
+        storage = InteractionHistory(os.path.join(tmp_dir, f"storage_{size}.json"))
+        storage.save_many_history("BenchAgent", make_history(size))
+
+        agent = SimpleAgent("Você é um agente de benchmark.", "BenchAgent", FakeModel(), storage=storage)
+        results.append({"history_size": size, **await ameasure(lambda: agent.chat("Olá!"), repeat)})
+    return results
+
+
+def bench_build_messages(windows: List[int], repeat: int) -> List[dict]:
+    builders: Dict[str, Callable[[List[dict]], Any]] = {}
+
+    try:
+        from tyr_agent.models.gpt_model import GPTModel
+
+        gpt = GPTModel("gpt-5", api_key="benchmark")
+        builders["gpt"] = lambda history: gpt._GPTModel__build_messages("prompt", "Olá!", history, True)
+    except ImportError:
+        print("openai não instalado, ignorando o GPTModel.")
+
+    try:
+        from tyr_agent.models.gemini_model import GeminiModel
+
+        gemini = GeminiModel("gemini-2.5-flash", api_key="benchmark")
+        builders["gemini"] = lambda history: gemini._GeminiModel__build_messages("Olá!", history, True)
+    except ImportError:
+        print("google-genai não instalado, ignorando o GeminiModel.")
+
+    results = []
+    for window in windows:
+        history = make_history(window)
+        for name, build in builders.items():
+            results.append({"model": name, "window": window, **measure(lambda: build(history), repeat)})
+    return results
+
+
+def bench_file_conversion(tmp_dir: str, size_mb: int, repeat: int) -> List[dict]:
+    content = b"%PDF-1.7\n" + os.urandom(size_mb * 1024 * 1024)
+    path = os.path.join(tmp_dir, "document.pdf")
+    with open(path, "wb") as f:
+        f.write(content)
+
+    # Cache desativado, para medir apenas a conversão:
+    gpt = GPTFileMixin()
+    gpt.file_cache = FileConversionCache(max_bytes=0)
+    cases: Dict[str, Callable[[], Any]] = {
+        "gpt/path": lambda: gpt.convert_item_to_gpt_model(path, "document.pdf"),
+        "gpt/bytes": lambda: gpt.convert_item_to_gpt_model(content, "document.pdf"),
+    }
+
+    try:
+        from tyr_agent.mixins.gemini_file_mixins import GeminiFileMixin
+
+        gemini = GeminiFileMixin()
+        gemini.file_cache = FileConversionCache(max_bytes=0)
+        cases["gemini/path"] = lambda: gemini.convert_item_to_gemini_model(path, "document.pdf")
+        cases["gemini/bytes"] = lambda: gemini.convert_item_to_gemini_model(content, "document.pdf")
+    except ImportError:
+        print("google-genai não instalado, ignorando o GeminiFileMixin.")
+
+    results = []
+    for name, fn in cases.items():
+        timing = measure(fn, repeat)
+        results.append({"case": name, "size_mb": size_mb, "mb_per_s": size_mb / (timing["median_ms"] / 1000), **timing})
+    return results
+
+
+async def bench_tool_dispatch(repeat: int) -> List[dict]:
+    def soma(a: int, b: int) -> int:
+        return a + b
+
+    async def soma_async(a: int, b: int) -> int:
+        return a + b
+
+    dict_functions = {"soma": soma, "soma_async": soma_async}
+    calls = max(repeat, 1) * 1000
+
+    results = []
+    for name in dict_functions:
+        start = time.perf_counter()
+        for _ in range(calls):
+            await BaseModel._execute_function(dict_functions, name, {"a": 1, "b": 2})
+        results.append({"case": f"execute_function/{name}", "per_call_us": (time.perf_counter() - start) / calls * 1_000_000})
+
+    # Comparando um ComplexAgent que executa uma função com um que responde diretamente:
+    with_tool = ComplexAgent("prompt", "ToolAgent", FakeModel(function_calls={"soma": {"a": 1, "b": 2}}), functions=[soma], use_storage=False)
+    without_tool = ComplexAgent("prompt", "NoToolAgent", FakeModel(), functions=[soma], use_storage=False)
+    results.append({"case": "complex_agent/with_tool", **await ameasure(lambda: with_tool.chat("Quanto é 1+2?", save_history=False), repeat * 20)})
+    results.append({"case": "complex_agent/without_tool", **await ameasure(lambda: without_tool.chat("Quanto é 1+2?", save_history=False), repeat * 20)})
+    return results
+
+
+async def bench_manager(agent_counts: List[int], latency: float, repeat: int) -> List[dict]:
+    results = []
+    for count in agent_counts:
+        agents = [SimpleAgent(f"Agente {i}.", f"Agent{i}", FakeModel(latency=latency), use_storage=False) for i in range(count)]
+        route = json.dumps({
+            "call_agents": True,
+            "agents_to_call": [{"agent_to_call": agent.agent_name, "agent_message": "Olá!"} for agent in agents],
+        })
+        manager_model = FakeModel(latency=latency, response=lambda user_input: route if user_input.startswith("rota") else "Resposta final.")
+        manager = ManagerAgent("BenchManager", manager_model, agents, use_storage=False)
+
+        timing = await ameasure(lambda: manager.chat("rota", save_history=False), repeat)
+        # Ideal: roteamento + sub-agentes em paralelo + síntese = 3 chamadas sequenciais ao modelo.
+        results.append({"sub_agents": count, "ideal_ms": 3 * latency * 1000, **timing})
+    return results
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    sizes = [10, 100, 1000] if args.quick else [10, 100, 1000, 5000]
+    windows = [10, 100, 1000] if args.quick else [10, 100, 1000, 10000]
+    agent_counts = [1, 5, 10] if args.quick else [1, 5, 10, 25, 50]
+    size_mb = 5 if args.quick else 50
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)  # -> Arquivos de histórico criados pelos agentes ficam no diretório temporário.
+        try:
+            return {
+                "metadata": {
+                    "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "latency_s": args.latency,
+                    "repeat": args.repeat,
+                },
+                "storage": await bench_storage(tmp_dir, sizes, args.repeat),
+                "build_messages": bench_build_messages(windows, args.repeat),
+                "file_conversion": bench_file_conversion(tmp_dir, size_mb, args.repeat),
+                "tool_dispatch": await bench_tool_dispatch(args.repeat),
+                "manager": await bench_manager(agent_counts, args.latency, args.repeat),
+            }
+        finally:
+            os.chdir(cwd)
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    for section, rows in results.items():
+        if section == "metadata":
+            continue
+
+        print(f"\n[{section}]")
+        for row in rows:
+            print("  " + "  ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in row.items()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latência simulada (s) de cada chamada ao modelo no benchmark do Manager.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Executa uma versão reduzida da suíte.")
+    parser.add_argument("--output", help="Arquivo JSON onde os resultados serão gravados.")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
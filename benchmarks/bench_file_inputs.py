@@ -0,0 +1,90 @@
+"""
+Benchmark da conversão de arquivos grandes (PDF de 50 MB, por padrão) nos mixins de arquivos.
+
+Uso:
+    python benchmarks/bench_file_inputs.py [--size-mb 50] [--repeat 3]
+"""
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tyr_agent.mixins.gpt_file_mixins import GPTFileMixin  # noqa: E402
+from tyr_agent.utils.file_cache import FileConversionCache  # noqa: E402
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    best_time = float("inf")
+    peak_memory = 0
+
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if result is None:
+            raise RuntimeError("A conversão retornou None.")
+
+        best_time = min(best_time, elapsed)
+        peak_memory = max(peak_memory, peak)
+
+    return {"seconds": best_time, "peak_mb": peak_memory / (1024 * 1024)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    content = b"%PDF-1.7\n" + os.urandom(args.size_mb * 1024 * 1024)
+    data_url = f"data:application/pdf;base64,{base64.b64encode(content).decode()}"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "document.pdf")
+        with open(path, "wb") as f:
+            f.write(content)
+
+        # Cache desativado, para medir apenas a conversão:
+        gpt = GPTFileMixin()
+        gpt.file_cache = FileConversionCache(max_bytes=0)
+
+        cases: Dict[str, Callable[[], object]] = {
+            "gpt/path": lambda: gpt.convert_item_to_gpt_model(path, "document.pdf"),
+            "gpt/bytes": lambda: gpt.convert_item_to_gpt_model(content, "document.pdf"),
+            "gpt/bytesio": lambda: gpt.convert_item_to_gpt_model(BytesIO(content), "document.pdf"),
+            "gpt/data_url": lambda: gpt.convert_item_to_gpt_model(data_url, "document.pdf"),
+        }
+
+        try:
+            from tyr_agent.mixins.gemini_file_mixins import GeminiFileMixin
+
+            gemini = GeminiFileMixin()
+            gemini.file_cache = FileConversionCache(max_bytes=0)
+            cases.update({
+                "gemini/path": lambda: gemini.convert_item_to_gemini_model(path, "document.pdf"),
+                "gemini/bytes": lambda: gemini.convert_item_to_gemini_model(content, "document.pdf"),
+                "gemini/bytesio": lambda: gemini.convert_item_to_gemini_model(BytesIO(content), "document.pdf"),
+                "gemini/data_url": lambda: gemini.convert_item_to_gemini_model(data_url, "document.pdf"),
+            })
+        except ImportError:
+            print("google-genai não instalado, ignorando os casos do Gemini.")
+
+        print(f"{'caso':<18}{'tempo (s)':>12}{'pico (MB)':>12}")
+        for name, fn in cases.items():
+            result = measure(fn, args.repeat)
+            print(f"{name:<18}{result['seconds']:>12.4f}{result['peak_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
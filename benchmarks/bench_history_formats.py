@@ -0,0 +1,129 @@
+"""
+Benchmark dos formatos de gravação do InteractionHistory (json, jsonl, jsonl.gz, jsonl.zst e msgpack).
+
+Para cada formato, mede em um histórico com N interações (100 mil por padrão, divididas entre alguns agentes):
+    - size_mb: tamanho do arquivo;
+    - write: gravação completa do histórico (ex: update_score / delete_history);
+    - append: gravação de uma nova interação (save_history);
+    - load_all: leitura completa do arquivo;
+    - load_recent: leitura das 20 interações mais recentes de um agente (inicialização dos agentes).
+
+Inclui também o formato das versões anteriores (JSON com indent=2, "json-indent") como referência de leitura.
+Formatos cujas dependências opcionais (msgpack / zstandard) não estão instaladas são ignorados.
+
+Uso:
+    python benchmarks/bench_history_formats.py [--interactions 100000] [--repeat 3] [--output resultados.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tyr_agent import InteractionHistory  # noqa: E402
+
+FORMATS = ["json", "jsonl", "jsonl.gz", "jsonl.zst", "msgpack"]
+AGENTS = ["Atendimento", "Financeiro", "Suporte", "Vendas"]
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def make_interaction(i: int) -> dict:
+    return {
+        "id": f"00000000-0000-4000-8000-{i:012d}",
+        "timestamp": "2025-01-01T00:00:00",
+        "interaction": {"user": f"Pergunta número {i} do usuário sobre o pedido?", "agent": [f"Resposta número {i} do agente, com os detalhes do pedido solicitado."]},
+        "called_functions": [],
+        "type_agent": "simple",
+        "score": 4 if i % 7 == 0 else None,
+    }
+
+
+def make_data(interactions: int) -> Dict[str, List[dict]]:
+    data: Dict[str, List[dict]] = {agent: [] for agent in AGENTS}
+    for i in range(interactions):
+        data[AGENTS[i % len(AGENTS)]].append(make_interaction(i))
+    return data
+
+
+def bench_format(tmp_dir: str, name: str, data: Dict[str, List[dict]], repeat: int) -> dict:
+    path = os.path.join(tmp_dir, f"history.{name}")
+
+    if name == "json-indent":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        storage = InteractionHistory(path)
+        write_ms = append_ms = None
+    else:
+        storage = InteractionHistory(path, serializer=name)
+        write_ms = measure(lambda: storage._write_all(data), repeat)
+
+        counter = iter(range(len(data) * 10 ** 6, len(data) * 10 ** 7))
+        append_ms = measure(lambda: storage.save_history(AGENTS[0], make_interaction(next(counter))), repeat * 10)
+
+    return {
+        "format": name,
+        "size_mb": os.path.getsize(path) / 1024 / 1024,
+        "write_ms": write_ms,
+        "append_ms": append_ms,
+        "load_all_ms": measure(storage.load_all, repeat),
+        "load_recent_ms": measure(lambda: storage.load_recent_history(AGENTS[-1], 20), repeat),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    data = make_data(args.interactions)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in ["json-indent", *FORMATS]:
+            try:
+                results.append(bench_format(tmp_dir, name, data, args.repeat))
+            except ImportError as e:
+                print(f"{name}: ignorado ({e})")
+
+    return {
+        "metadata": {
+            "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "interactions": args.interactions,
+            "repeat": args.repeat,
+        },
+        "formats": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interactions", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Arquivo JSON onde os resultados serão gravados.")
+    args = parser.parse_args()
+
+    results = run(args)
+    for row in results["formats"]:
+        print("  " + "  ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in row.items()))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
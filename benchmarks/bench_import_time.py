@@ -0,0 +1,59 @@
+"""
+Benchmark do tempo de importação do tyr_agent.
+
+Mede, em um interpretador novo, o tempo para importar os agentes e o storage, e valida que as SDKs
+do Gemini (google-genai) e da OpenAI (openai) não são carregadas antes de um modelo ser utilizado.
+Termina com código de saída 1 caso o orçamento de tempo seja ultrapassado.
+
+Uso:
+    python benchmarks/bench_import_time.py [--budget-ms 150] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from tyr_agent import SimpleAgent, ComplexAgent, ManagerAgent, InteractionHistory
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "google_genai_loaded": "google.genai" in sys.modules,
+    "openai_loaded": "openai" in sys.modules,
+}))
+"""
+
+
+def run_once() -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])))
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.repeat)]
+    median_ms = statistics.median(result["seconds"] for result in results) * 1000
+
+    sdks_loaded = any(result["google_genai_loaded"] or result["openai_loaded"] for result in results)
+
+    print(f"import tyr_agent (mediana de {args.repeat}): {median_ms:.1f} ms (orçamento: {args.budget_ms:.0f} ms)")
+    print(f"SDKs carregadas na importação: {'sim' if sdks_loaded else 'não'}")
+
+    if sdks_loaded or median_ms > args.budget_ms:
+        print("FALHOU: o tempo de importação ultrapassou o orçamento ou as SDKs foram importadas antecipadamente.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
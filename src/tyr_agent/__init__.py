@@ -1,12 +1,77 @@
-from .core.agent import SimpleAgent, ComplexAgent, ManagerAgent
-from .core.ai_config import configure_gemini, configure_gpt
-from .storage.interaction_history import InteractionHistory
-from .utils.image_utils import image_to_base64
-from .mixins.gemini_file_mixins import GeminiFileMixin
-from .mixins.gpt_file_mixins import GPTFileMixin
-from .models.gemini_model import GeminiModel
-from .models.gpt_model import GPTModel
-from .entities.entities import AgentInteraction, AgentHistory
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core.agent import SimpleAgent, ComplexAgent, ManagerAgent
+    from .core.ai_config import configure_gemini, configure_gpt
+    from .storage.interaction_history import InteractionHistory
+    from .storage.history_buffer import HistoryBuffer
+    from .storage.long_term_memory import LongTermMemory, HashingEmbedder
+    from .storage.retention import RetentionPolicy
+    from .storage.serializers import HistorySerializer, JsonSerializer, JsonLinesSerializer, MsgpackSerializer, migrate_history
+    from .utils.image_utils import image_to_base64, ImagePreprocessConfig, AttachmentReport
+    from .mixins.gemini_file_mixins import GeminiFileMixin
+    from .mixins.gpt_file_mixins import GPTFileMixin
+    from .models.gemini_model import GeminiModel
+    from .models.gpt_model import GPTModel
+    from .models.base_model import BaseModel
+    from .models.fake_model import FakeModel
+    from .models.cascade_model import CascadeModel
+    from .utils.attachment_manager import AttachmentManager, UploadedFile
+    from .utils.context_cache import ContextCacheManager, CachedContext
+    from .utils.tracing import configure_tracing, trace_span, Span, SpanExporter, InMemorySpanExporter, LoggingSpanExporter, OpenTelemetrySpanExporter
+    from .utils.usage_utils import TokenUsage, AgentMetrics
+    from .entities.interaction import Interaction
+    from .entities.entities import AgentInteraction, AgentHistory, ChatManyInput, ChatManyResult, ManagerStreamEvent, InteractionUsage
+
+# Os módulos (e as SDKs google-genai e openai) são importados apenas no primeiro acesso a cada nome:
+_LAZY_IMPORTS = {
+    "SimpleAgent": ".core.agent",
+    "ComplexAgent": ".core.agent",
+    "ManagerAgent": ".core.agent",
+    "configure_gemini": ".core.ai_config",
+    "configure_gpt": ".core.ai_config",
+    "InteractionHistory": ".storage.interaction_history",
+    "HistoryBuffer": ".storage.history_buffer",
+    "LongTermMemory": ".storage.long_term_memory",
+    "HashingEmbedder": ".storage.long_term_memory",
+    "RetentionPolicy": ".storage.retention",
+    "HistorySerializer": ".storage.serializers",
+    "JsonSerializer": ".storage.serializers",
+    "JsonLinesSerializer": ".storage.serializers",
+    "MsgpackSerializer": ".storage.serializers",
+    "migrate_history": ".storage.serializers",
+    "image_to_base64": ".utils.image_utils",
+    "ImagePreprocessConfig": ".utils.image_utils",
+    "AttachmentReport": ".utils.image_utils",
+    "GeminiFileMixin": ".mixins.gemini_file_mixins",
+    "GPTFileMixin": ".mixins.gpt_file_mixins",
+    "GeminiModel": ".models.gemini_model",
+    "GPTModel": ".models.gpt_model",
+    "BaseModel": ".models.base_model",
+    "FakeModel": ".models.fake_model",
+    "CascadeModel": ".models.cascade_model",
+    "AttachmentManager": ".utils.attachment_manager",
+    "UploadedFile": ".utils.attachment_manager",
+    "ContextCacheManager": ".utils.context_cache",
+    "CachedContext": ".utils.context_cache",
+    "configure_tracing": ".utils.tracing",
+    "trace_span": ".utils.tracing",
+    "Span": ".utils.tracing",
+    "SpanExporter": ".utils.tracing",
+    "InMemorySpanExporter": ".utils.tracing",
+    "LoggingSpanExporter": ".utils.tracing",
+    "OpenTelemetrySpanExporter": ".utils.tracing",
+    "TokenUsage": ".utils.usage_utils",
+    "AgentMetrics": ".utils.usage_utils",
+    "Interaction": ".entities.interaction",
+    "AgentInteraction": ".entities.entities",
+    "AgentHistory": ".entities.entities",
+    "ChatManyInput": ".entities.entities",
+    "ChatManyResult": ".entities.entities",
+    "ManagerStreamEvent": ".entities.entities",
+    "InteractionUsage": ".entities.entities",
+}
 
 __all__ = [
     "SimpleAgent",
@@ -15,8 +80,54 @@ __all__ = [
     "configure_gemini",
     "configure_gpt",
     "InteractionHistory",
+    "HistoryBuffer",
+    "LongTermMemory",
+    "HashingEmbedder",
+    "RetentionPolicy",
+    "HistorySerializer",
+    "JsonSerializer",
+    "JsonLinesSerializer",
+    "MsgpackSerializer",
+    "migrate_history",
     "GeminiModel",
     "GPTModel",
+    "BaseModel",
+    "FakeModel",
+    "CascadeModel",
+    "ImagePreprocessConfig",
+    "AttachmentReport",
+    "AttachmentManager",
+    "UploadedFile",
+    "ContextCacheManager",
+    "CachedContext",
+    "configure_tracing",
+    "trace_span",
+    "Span",
+    "SpanExporter",
+    "InMemorySpanExporter",
+    "LoggingSpanExporter",
+    "OpenTelemetrySpanExporter",
+    "TokenUsage",
+    "AgentMetrics",
+    "Interaction",
     "AgentInteraction",
-    "AgentHistory"
-]
\ No newline at end of file
+    "AgentHistory",
+    "ChatManyInput",
+    "ChatManyResult",
+    "ManagerStreamEvent",
+    "InteractionUsage"
+]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value  # -> Os próximos acessos não passam mais pelo __getattr__.
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
@@ -1,78 +1,292 @@
 import json
 import asyncio
-from typing import List, Dict, Tuple, Optional, Callable, Union
-from datetime import datetime
-from tyr_agent.entities.entities import ManagerCallManyAgents, AgentCallInfo, AgentHistory, AgentInteraction
-from tyr_agent.models.gemini_model import GeminiModel
-from tyr_agent.models.gpt_model import GPTModel
+import contextlib
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Dict, Tuple, Optional, Callable, Union
+from tyr_agent.entities.entities import ManagerCallManyAgents, PlanStepCall, AgentHistory, AgentInteraction, ChatManyInput, ChatManyResult, ManagerStreamEvent
+from tyr_agent.entities.interaction import Interaction
+from tyr_agent.models.base_model import BaseModel
 from tyr_agent.storage.interaction_history import InteractionHistory
-import uuid
+from tyr_agent.storage.history_buffer import HistoryBuffer
+from tyr_agent.storage.long_term_memory import LongTermMemory
+from tyr_agent.storage.session_cache import SessionHistoryCache
+from tyr_agent.utils.tracing import trace_span
+from tyr_agent.utils.usage_utils import AgentMetrics, SpeculationMetrics, TokenUsage, current_token_usage
+from tyr_agent.utils.response_chain import current_conversation_key, current_history_window
+
+# Destino dos eventos do ManagerAgent.chat_stream (None fora do streaming):
+_manager_events: ContextVar[Optional[Callable[[ManagerStreamEvent], None]]] = ContextVar("_manager_events", default=None)
+
+# Sessão do turno em execução (repassada pelo ManagerAgent aos sub-agentes, mantendo os históricos separados por sessão):
+_current_session: ContextVar[Optional[str]] = ContextVar("_current_session", default=None)
+
+# Profundidade, profundidade máxima e prazo (time.monotonic) do plano em execução, compartilhados com os Managers aninhados:
+_plan_depth: ContextVar[int] = ContextVar("_plan_depth", default=0)
+_plan_max_depth: ContextVar[Optional[int]] = ContextVar("_plan_max_depth", default=None)
+_plan_deadline: ContextVar[Optional[float]] = ContextVar("_plan_deadline", default=None)
+
+
+@dataclass
+class _Speculation:
+    """
+    Sub-agente iniciado pelo ManagerAgent em paralelo com o roteamento (despacho especulativo).
+    """
+    agent_name: str
+    message: str
+    session_id: Optional[str]
+    started_at: float
+    task: "Optional[asyncio.Task[Tuple[str, Interaction]]]" = None
+    routed_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    used: bool = False  # -> A resposta (ou a falha) da chamada já foi usada por uma etapa do plano.
 
 
 class SimpleAgent:
     MAX_ALLOWED_HISTORY = 20
+    TYPE_AGENT = "simple"
 
-    def __init__(self, prompt_build: str, agent_name: str, model: Union[GeminiModel, GPTModel], storage: Optional[InteractionHistory] = None, max_history: int = 20, use_storage: bool = True, use_history: bool = True, use_score: bool = True, score_average: Union[int, float] = 3):
+    def __init__(self, prompt_build: str, agent_name: str, model: BaseModel, storage: Optional[InteractionHistory] = None, max_history: int = 20, use_storage: bool = True, use_history: bool = True, use_score: bool = True, score_average: Union[int, float] = 3, max_sessions: int = 1000, session_idle_ttl: Optional[float] = 1800, long_term_memory: Optional[LongTermMemory] = None):
         self.prompt_build: str = prompt_build
         self.agent_name: str = agent_name
 
         self.storage: Optional[InteractionHistory] = None
-        self.history: Optional[List[dict]] = None
+        self.history: Optional[HistoryBuffer] = None
         self.use_storage: bool = use_storage
         self.use_history: bool = use_history
 
         self.use_score: bool = use_score
         self.score_average: Union[int, float] = score_average if self._is_valid_score(score_average) else 3
 
+        self.MAX_HISTORY = min(max_history, self.MAX_ALLOWED_HISTORY)
+        self.PROMPT_TEMPLATE = ""
+
         if use_storage and use_history:
             self.storage = storage or InteractionHistory(f"{agent_name.lower()}_history.json")
-            self.history = self.storage.load_history(agent_name)
+            self.history = self._load_history(agent_name)
 
-            if use_score:
-                self._filter_history_by_score()
+        # Memória de longo prazo: as interações mais parecidas com a mensagem são enviadas junto da janela recente.
+        self.long_term_memory: Optional[LongTermMemory] = long_term_memory
+        if self.long_term_memory is not None and self.storage is not None:
+            self.long_term_memory.sync(self.storage, agent_name)
 
-        self.agent_model: Union[GeminiModel, GPTModel] = model
+        self.agent_model: BaseModel = model
 
-        self.MAX_HISTORY = min(max_history, self.MAX_ALLOWED_HISTORY)
-        self.PROMPT_TEMPLATE = ""
+        self.sessions: SessionHistoryCache = SessionHistoryCache(max_sessions, session_idle_ttl)
+        self.metrics: AgentMetrics = AgentMetrics(max_sessions)
+
+    async def chat(self, user_input: str, streaming: bool = False, files: Optional[List[dict]] = None, save_history: bool = True, session_id: Optional[str] = None) -> Optional[str]:
+        with trace_span("agent.chat", agent_name=self.agent_name, agent_type=self.TYPE_AGENT, session_id=session_id) as span:
+            try:
+                async with self._session_lock(session_id):
+                    # O histórico é lido dentro do lock, depois que o turno anterior da sessão já foi salvo:
+                    history = self._history_snapshot(session_id)
+                    agent_response, interaction = await self._process_input_with_usage(user_input, files, history, session_id)
+
+                    if (self.use_history or self.use_storage) and save_history:
+                        self._store_interactions([interaction], session_id)
+
+                return agent_response
+            except Exception as e:
+                span.record_error(e)
+                print(f"❌ [{type(self).__name__}.chat] {type(e).__name__}: {e}")
+                return None
 
-    async def chat(self, user_input: str, streaming: bool = False, files: Optional[List[dict]] = None, save_history: bool = True) -> Optional[str]:
+    async def chat_many(self, inputs: List[Union[str, ChatManyInput]], concurrency: int = 5, save_history: bool = True, session_id: Optional[str] = None) -> List[ChatManyResult]:
+        """
+        Processa várias entradas independentes no mesmo agente, de forma concorrente.
+        Todas as entradas enxergam o mesmo histórico (o histórico no momento da chamada) e as novas interações
+        são gravadas juntas, em uma única operação no storage, ao final do lote.
+        :param inputs: Lista de entradas, podendo ser apenas o texto do usuário ou um ChatManyInput (com arquivos).
+        :param concurrency: Quantidade máxima de requisições simultâneas ao modelo, por padrão é 5.
+        :param save_history: Define se as interações bem-sucedidas serão salvas no histórico.
+        :param session_id: Sessão cujo histórico será usado e atualizado, por padrão usa o histórico do agente.
+        :return: Lista de ChatManyResult na mesma ordem das entradas, com a resposta ou o erro de cada item.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        history: Optional[List[Interaction]] = None
+
+        async def run_item(item: Union[str, ChatManyInput]) -> Tuple[ChatManyResult, Optional[Interaction]]:
+            user_input, files = (item, None) if isinstance(item, str) else (item["user_input"], item.get("files"))
+
+            async with semaphore:
+                try:
+                    agent_response, interaction = await self._process_input_with_usage(user_input, files, history, session_id)
+                    return {"user_input": user_input, "response": agent_response, "error": None, "interaction_id": interaction["id"]}, interaction
+                except Exception as e:
+                    return {"user_input": user_input, "response": None, "error": f"{type(e).__name__}: {e}", "interaction_id": None}, None
+
+        with trace_span("agent.chat_many", agent_name=self.agent_name, agent_type=self.TYPE_AGENT, session_id=session_id, inputs=len(inputs)):
+            async with self._session_lock(session_id):
+                history = self._history_snapshot(session_id)
+                results = await asyncio.gather(*(run_item(item) for item in inputs))
+
+                if (self.use_history or self.use_storage) and save_history:
+                    self._store_interactions([interaction for _, interaction in results if interaction is not None], session_id)
+
+        return [result for result, _ in results]
+
+    async def _process_input_with_usage(self, user_input: str, files: Optional[List[dict]], history: Optional[List[Interaction]], session_id: Optional[str]) -> Tuple[str, Interaction]:
+        """
+        Executa o _process_input registrando os tokens e a latência de cada chamada ao modelo.
+        O consumo é salvo na interação (campo "usage") e acumulado nas métricas do agente (e da sessão).
+        :return: Tupla contendo a resposta do agente e a interação pronta para ser salva no histórico.
+        """
+        history_window = self.MAX_HISTORY
+        if self.long_term_memory is not None and session_id is None and self.use_history:
+            min_score = self.score_average if self.use_score else None
+            history = self.long_term_memory.build_history(user_input, history or [], min_score)
+            history_window = None  # -> O histórico deixa de ser uma janela (inclui as interações recuperadas).
+
+        usage = TokenUsage()
+        token = current_token_usage.set(usage)
+        conversation_token = current_conversation_key.set(self._storage_key(session_id))
+        window_token = current_history_window.set(history_window)
+        session_token = _current_session.set(session_id)
+        start = time.perf_counter()
+        history_size = len(history) if history and self.use_history else 0
+        failed = True
+        cancelled = False
         try:
-            agent_response: str = self.agent_model.generate(self.prompt_build, user_input, files, self.history, self.use_history)
+            agent_response, interaction = await self._process_input(user_input, files, history)
+            failed = False
+        except asyncio.CancelledError:
+            # Cancelamento (ex: especulação descartada pelo ManagerAgent) não é um erro da interação:
+            failed, cancelled = False, True
+            raise
+        finally:
+            current_token_usage.reset(token)
+            current_conversation_key.reset(conversation_token)
+            current_history_window.reset(window_token)
+            _current_session.reset(session_token)
+            latency_ms = (time.perf_counter() - start) * 1000
+            self.metrics.add(usage, latency_ms, history_size, session_id, failed, cancelled)
+
+        interaction.usage = {**usage.to_dict(), "latency_ms": latency_ms, "history_size": history_size}
+        return agent_response, interaction
+
+    def get_metrics(self, session_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Pega as métricas de consumo do agente: interações, chamadas ao modelo, tokens (entrada, saída e cache) e latência.
+        :param session_id: Caso informado, retorna apenas as métricas da sessão.
+        :return: Dicionário com as métricas (None caso a sessão não possua métricas).
+        """
+        if session_id is not None:
+            return self.metrics.get_session(session_id)
+        return self.metrics.to_dict()
 
-            if (self.use_history or self.use_storage) and save_history:
-                self._update_history(user_input, [agent_response], "simple")
+    def reset_metrics(self) -> None:
+        self.metrics.reset()
 
-            return agent_response
-        except Exception as e:
-            print(f"❌ [SimpleAgent.chat] {type(e).__name__}: {e}")
-            return None
+    async def _process_input(self, user_input: str, files: Optional[List[dict]], history: Optional[List[Interaction]]) -> Tuple[str, Interaction]:
+        """
+        Gera a resposta do agente para uma entrada, sem tratar erros e sem salvar o histórico.
+        A chamada ao modelo é assíncrona (agenerate), liberando o event loop para outras requisições.
+        :param user_input: Mensagem do usuário.
+        :param files: Arquivos enviados junto da mensagem.
+        :param history: Histórico enviado ao modelo (do agente ou da sessão).
+        :return: Tupla contendo a resposta do agente e a interação pronta para ser salva no histórico.
+        """
+        with trace_span("model.generate", agent_name=self.agent_name, model_name=self.agent_model.model_name, files=len(files or [])):
+            agent_response: str = await self.agent_model.agenerate(self.prompt_build, user_input, files, history, self.use_history)
+        return agent_response, self._create_interaction(user_input, [agent_response], self.TYPE_AGENT)
 
-    def _update_history(self, user_input: str, agent_response: List[str], type_agent: str, called_functions: List[dict] | None = None, score: int | None = None) -> None:
+    def _create_interaction(self, user_input: str, agent_response: List[str], type_agent: str, called_functions: List[dict] | None = None, score: int | None = None) -> Interaction:
+        return Interaction(user_input, agent_response, type_agent, called_functions, score)
+
+    def _store_interactions(self, interactions: List[Interaction], session_id: Optional[str] = None) -> None:
+        """
+        Adiciona as interações no history (do agente ou da sessão) e as grava no storage em uma única escrita.
+        :param interactions: Interações a serem salvas.
+        :param session_id: Sessão dona das interações, caso exista.
+        :return: None
+        """
         try:
-            actual_conversation = {
-                "id": str(uuid.uuid4()),
-                "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                "interaction": {
-                    "user": user_input,
-                    "agent": agent_response
-                },
-                "called_functions": called_functions if called_functions is not None else [],
-                "type_agent": type_agent,
-                "score": score
-            }
-
-            if self.history and self.use_history:
-                self.history.append(actual_conversation)
-                self.history = self.history[-self.MAX_HISTORY:]  # -> Mantendo apenas os N itens no histórico.
+            if not interactions:
+                return
+
+            # O HistoryBuffer mantém apenas os N itens mais recentes no histórico:
+            if session_id is not None and self.use_history:
+                self._get_history(session_id).extend(interactions)
+            elif self.history is not None and self.use_history:
+                self.history.extend(interactions)
+
+            if session_id is None and self.long_term_memory is not None:
+                self.long_term_memory.add(interactions)
 
             if self.storage and self.use_storage:
-                self.storage.save_history(self.agent_name, actual_conversation)
+                self.storage.save_many_history(self._storage_key(session_id), [interaction.to_dict() for interaction in interactions])
         except Exception as e:
             print(f'[ERROR] - Ocorreu um erro duração a atualização do histórico: {e}')
 
-    def get_agent_history(self) -> List[dict]:
-        return self.history
+    def _get_history(self, session_id: Optional[str]) -> Optional[HistoryBuffer]:
+        """
+        Pega o histórico que deve ser usado na conversa: o do próprio agente ou o da sessão informada.
+        O histórico de uma sessão é carregado do storage apenas no primeiro acesso e mantido em cache (LRU).
+        :param session_id: ID da sessão, ou None para usar o histórico do agente.
+        :return: Histórico a ser usado.
+        """
+        if session_id is None:
+            return self.history
+
+        if not self.use_history:
+            return None
+
+        def load_session_history() -> HistoryBuffer:
+            if not self.storage:
+                return HistoryBuffer(self.MAX_HISTORY)
+            return self._load_history(self._storage_key(session_id))
+
+        return self.sessions.get(session_id, load_session_history)
+
+    def _history_snapshot(self, session_id: Optional[str]) -> Optional[List[Interaction]]:
+        """
+        Cópia do histórico (do agente ou da sessão) no início do turno. Deve ser chamada dentro do lock da sessão,
+        para que turnos simultâneos da mesma sessão não montem o prompt com um histórico desatualizado.
+        :param session_id: ID da sessão, ou None para usar o histórico do agente.
+        :return: Lista com as interações do histórico, ou None caso o agente não utilize histórico.
+        """
+        history = self._get_history(session_id)
+        return history.to_list() if history is not None else None
+
+    def _load_history(self, storage_key: str) -> HistoryBuffer:
+        """
+        Carrega o histórico salvo no storage, mantendo apenas as N interações mais recentes (e com score válido).
+        :param storage_key: Chave do histórico no storage (agente ou sessão).
+        :return: Histórico carregado.
+        """
+        predicate = self._is_score_eligible if self.use_score else None
+        return HistoryBuffer(self.MAX_HISTORY, self.storage.load_recent_history(storage_key, self.MAX_HISTORY, predicate))
+
+    def get_session_history(self, session_id: str) -> List[dict]:
+        """
+        Pega o histórico de uma sessão específica do agente.
+        :param session_id: ID da sessão.
+        :return: Histórico da sessão (vazio caso o agente não utilize histórico).
+        """
+        history = self._get_history(session_id)
+        return history.to_dicts() if history is not None else []
+
+    def close_session(self, session_id: str) -> None:
+        """
+        Remove o histórico da sessão da memória. Não altera o storage.
+        :param session_id: ID da sessão.
+        :return: None
+        """
+        self.sessions.remove(session_id)
+
+    def _session_lock(self, session_id: Optional[str]):
+        return self.sessions.lock(session_id) if session_id is not None else contextlib.nullcontext()
+
+    def _storage_key(self, session_id: Optional[str]) -> str:
+        return self.agent_name if session_id is None else f"{self.agent_name}::{session_id}"
+
+    def _update_history(self, user_input: str, agent_response: List[str], type_agent: str, called_functions: List[dict] | None = None, score: int | None = None) -> None:
+        self._store_interactions([self._create_interaction(user_input, agent_response, type_agent, called_functions, score)])
+
+    def get_agent_history(self) -> Optional[List[dict]]:
+        return self.history.to_dicts() if self.history is not None else None
 
     def create_agent_history_with_storage(self, storage: Optional[InteractionHistory] = None, use_history: bool = True) -> None:
         """
@@ -83,7 +297,7 @@ class SimpleAgent:
         :return: Não retorna nada.
         """
         self.storage: InteractionHistory | None = storage or InteractionHistory(f"{self.agent_name.lower()}_history.json")
-        self.history: List[dict] | None = self.storage.load_history(self.agent_name)
+        self.history: HistoryBuffer | None = self._load_history(self.agent_name)
         self.use_history: bool = use_history
 
     def create_agent_history(self, new_history: List[AgentHistory], use_history: bool = True) -> bool:
@@ -96,7 +310,7 @@ class SimpleAgent:
         :return: Retorna true caso tudo tenha dado certo e false caso tenha acontecido algum problema.
         """
         try:
-            self.history: List[dict] = self._format_history(new_history)
+            self.history: HistoryBuffer = HistoryBuffer(self.MAX_HISTORY, self._format_history(new_history))
             self.use_history: bool = use_history
             return True
         except Exception as e:
@@ -126,7 +340,7 @@ class SimpleAgent:
         :return: None
         """
         self.storage: InteractionHistory | None = None
-        self.history: List[dict] | None = None
+        self.history: HistoryBuffer | None = None
         self.use_history: bool = use_history
 
     def clear_agent_history(self) -> None:
@@ -147,47 +361,68 @@ class SimpleAgent:
         if self.storage is not None:
             self.storage.clear_history()
 
-    def rate_interaction(self, interaction_id: str, score: Union[int, float]) -> Tuple[bool, bool]:
+    def rate_interaction(self, interaction_id: str, score: Union[int, float], session_id: Optional[str] = None) -> Tuple[bool, bool]:
         """
         Define o score de uma interação específica do histórico.
         Pode ser feita apenas no history ou através do storage, caso ele esteja sendo usado.
         Atualiza o histórico atual do agente baseado no score_average do agente.
         :param interaction_id: ID da interação.
         :param score: Nota definida para a interação, indo apenas de 0 a 5.
+        :param session_id: ID da sessão da interação, ou None para o histórico do próprio agente.
         :return: Retorna uma tupla na seguinte lógica: (response_update_history, response_update_storage)
         """
+        return self.rate_interactions({interaction_id: score}, session_id).get(interaction_id, (False, False))
+
+    def rate_interactions(self, scores: Dict[str, Union[int, float]], session_id: Optional[str] = None) -> Dict[str, Tuple[bool, bool]]:
+        """
+        Define o score de várias interações do histórico de uma só vez (ex: avaliações recebidas em lote).
+        O storage é atualizado com uma única leitura e uma única escrita do arquivo, e apenas as interações avaliadas
+        são verificadas (e removidas do history, caso fiquem abaixo do score_average do agente).
+        :param scores: Dicionário {id da interação: nota}, com notas de 0 a 5. Notas inválidas são ignoradas.
+        :param session_id: ID da sessão das interações, ou None para o histórico do próprio agente.
+        :return: Dicionário {id da interação: (response_update_history, response_update_storage)}.
+        O response_update_history é True apenas para as interações encontradas no history.
+        """
+        results: Dict[str, Tuple[bool, bool]] = {interaction_id: (False, False) for interaction_id in scores}
+
         try:
-            if not self.history and not self.storage:
-                return False, False
+            # O histórico de uma sessão só é atualizado caso esteja em memória (senão é carregado do storage já avaliado):
+            history = self.history if session_id is None else (self._get_history(session_id) if session_id in self.sessions else None)
+            if history is None and not self.storage:
+                return results
 
-            if not self._is_valid_score(score):
-                return False, False
+            valid_scores = {interaction_id: score for interaction_id, score in scores.items() if self._is_valid_score(score)}
+            if not valid_scores:
+                return results
 
-            response_update_history: bool = False
-            response_update_storage: bool = True
+            updated_history: Dict[str, bool] = {}
 
-            if self.history:
+            if history is not None:
                 # Atualizando o history:
-                for interaction in self.history:
-                    if interaction["id"] == interaction_id:
-                        interaction["score"] = score
-                        break
-                response_update_history = True
+                if self.use_score and not self._is_valid_score(self.score_average):
+                    self.score_average = 3
 
-            if self.storage:
-                # Atualizando o storage:
-                response_update_storage = self.storage.update_score(self.agent_name, interaction_id, score)
+                for interaction_id, score in valid_scores.items():
+                    interaction = history.rate(interaction_id, score)
+                    updated_history[interaction_id] = interaction is not None
 
-            if self.use_score:
-                # Filtrando o "novo" histórico. (Uma interação foi avaliada, então preciso verificar se ela vai sair)
-                if not self._is_valid_score(self.score_average):
-                    self.score_average = 3
-                self._filter_history_by_score()
+                    # Uma interação foi avaliada, então preciso verificar se ela sai do histórico:
+                    if self.use_score and interaction is not None and not self._is_score_eligible(interaction):
+                        history.remove(interaction_id)
+
+            if self.long_term_memory is not None and session_id is None:
+                for interaction_id, score in valid_scores.items():
+                    self.long_term_memory.update_score(interaction_id, score)
 
-            return response_update_history, response_update_storage
+            # Atualizando o storage:
+            updated_storage = self.storage.update_scores(self._storage_key(session_id), valid_scores) if self.storage else {}
+
+            for interaction_id in valid_scores:
+                results[interaction_id] = (updated_history.get(interaction_id, False), updated_storage.get(interaction_id, False) if self.storage else True)
+            return results
         except Exception as e:
             print(e)
-            return False, False
+            return results
 
     def delete_interaction(self, interaction_id: str) -> Tuple[bool, bool]:
         """
@@ -204,9 +439,12 @@ class SimpleAgent:
             response_delete_from_storage: bool = True
 
             if self.history:
-                self.history = list(filter(lambda x: x["id"] != interaction_id, self.history))
+                self.history.remove(interaction_id)
                 response_delete_from_history = True
 
+            if self.long_term_memory is not None:
+                self.long_term_memory.remove(interaction_id)
+
             if self.storage:
                 response_delete_from_storage = self.storage.delete_history(self.agent_name, interaction_id)
 
@@ -228,15 +466,13 @@ class SimpleAgent:
 
             if find_by_history and self.history:
                 # Procurando no history, se ele existir:
-                for interaction in self.history:
-                    if interaction.get("id") == interaction_id:
-                        return interaction.get("score")
+                interaction = self.history.get(interaction_id)
+                if interaction is not None:
+                    return interaction.get("score")
 
             if not find_by_history and self.storage:
                 # Procurando no storage, se ele existir:
-                data = self.storage.load_all()
-
-                for interaction in data.get(self.agent_name, []):
+                for interaction in self.storage.iter_history(self.agent_name):
                     if interaction.get("id") == interaction_id:
                         return interaction.get("score")
 
@@ -270,9 +506,7 @@ class SimpleAgent:
                 return sum_interactions / count_interactions
 
             if not find_by_history and self.storage:
-                data = self.storage.load_all()
-
-                for interaction in data.get(self.agent_name, []):
+                for interaction in self.storage.iter_history(self.agent_name):
                     if isinstance(interaction.get("score"), (int, float)):
                         sum_interactions += interaction.get("score")
                         count_interactions += 1
@@ -304,11 +538,9 @@ class SimpleAgent:
                 ]
 
             if not find_by_history and self.storage:
-                data = self.storage.load_all()
-
                 return [
                     {"id": i.get("id"), "score": i.get("score")}
-                    for i in data.get(self.agent_name, [])
+                    for i in self.storage.iter_history(self.agent_name)
                     if "id" in i
                 ]
 
@@ -329,105 +561,228 @@ class SimpleAgent:
         Filtra o histórico atual com base no score_average do agente.
         :return: None
         """
-        self.history = list(filter(lambda x: (x.get("score") is None or isinstance(x.get("score"), (int, float))) and (x.get("score") is None or x.get("score") >= self.score_average), self.history))
-
-    def _format_history(self, target_history: List[AgentHistory]) -> List[dict]:
-        temp_history: List[dict] = []
-        for h in target_history:
-            if h.get("timestamp") is None:
-                timestamp: str = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-            else:
-                timestamp: str = h.get("timestamp")
-
-            temp_history.append(
-                {
-                    "id": str(uuid.uuid4()),
-                    "timestamp": timestamp,
-                    "interaction": {
-                        "user": h["interaction"]["user"],
-                        "agent": h["interaction"]["agent"]
-                    },
-                    "called_functions": [],
-                    "type_agent": h["type_agent"],
-                    "score": h.get("score") if h.get("score", False) else None,
-                }
+        if self.history is not None:
+            self.history.keep_only(self._is_score_eligible)
+
+    def _is_score_eligible(self, interaction: dict) -> bool:
+        score = interaction.get("score")
+        return score is None or (isinstance(score, (int, float)) and score >= self.score_average)
+
+    def _format_history(self, target_history: List[AgentHistory]) -> List[Interaction]:
+        return [
+            Interaction(
+                user=h["interaction"]["user"],
+                agent=h["interaction"]["agent"],
+                type_agent=h["type_agent"],
+                score=h.get("score") if h.get("score", False) else None,
+                created_at=h.get("timestamp"),  # -> None usa o momento atual.
             )
-        return temp_history
+            for h in target_history
+        ]
 
 
 class ComplexAgent(SimpleAgent):
     MAX_ALLOWED_HISTORY = 20
+    TYPE_AGENT = "complex"
 
-    def __init__(self, prompt_build: str, agent_name: str, model: Union[GeminiModel, GPTModel], functions: Optional[List[Callable]] = None, final_prompt: Optional[str] = None, storage: Optional[InteractionHistory] = None, max_history: int = 20, use_storage: bool = True, use_history: bool = True, use_score: bool = True, score_average: Union[int, float] = 3):
-        super().__init__(prompt_build, agent_name, model, storage, max_history, use_storage, use_history, use_score, score_average)
+    def __init__(self, prompt_build: str, agent_name: str, model: BaseModel, functions: Optional[List[Callable]] = None, final_prompt: Optional[str] = None, storage: Optional[InteractionHistory] = None, max_history: int = 20, use_storage: bool = True, use_history: bool = True, use_score: bool = True, score_average: Union[int, float] = 3, max_sessions: int = 1000, session_idle_ttl: Optional[float] = 1800, long_term_memory: Optional[LongTermMemory] = None):
+        super().__init__(prompt_build, agent_name, model, storage, max_history, use_storage, use_history, use_score, score_average, max_sessions, session_idle_ttl, long_term_memory)
         self.functions: Optional[List[Callable]] = functions or {}
 
         self.final_prompt = final_prompt
 
-    async def chat(self, user_input: str, streaming: bool = False, files: Optional[List[dict]] = None, save_history: bool = True) -> Optional[str]:
-        try:
-            agent_response = await self.agent_model.generate_with_functions(self.prompt_build, user_input, files, self.history, self.use_history, self.functions, self.final_prompt)
-
-            if (self.use_history or self.use_storage) and save_history:
-                self._update_history(user_input, [agent_response], "complex")
-
-            return agent_response
-        except Exception as e:
-            print(f'[ERROR] - Ocorreu um erro durante a comunicação com o agente: {e}')
-            return None
+    async def _process_input(self, user_input: str, files: Optional[List[dict]], history: Optional[List[Interaction]]) -> Tuple[str, Interaction]:
+        with trace_span("model.generate_with_functions", agent_name=self.agent_name, model_name=self.agent_model.model_name, files=len(files or [])):
+            agent_response: str = await self.agent_model.generate_with_functions(self.prompt_build, user_input, files, history, self.use_history, self.functions, self.final_prompt)
+        return agent_response, self._create_interaction(user_input, [agent_response], self.TYPE_AGENT)
 
 
 class ManagerAgent(SimpleAgent):
     MAX_ALLOWED_HISTORY = 100
+    TYPE_AGENT = "manager"
+
+    def __init__(self, agent_name: str, model: BaseModel, agents: List[Union[SimpleAgent, ComplexAgent, "ManagerAgent"]], storage: Optional[InteractionHistory] = None, max_history: int = 100, use_storage: bool = True, use_history: bool = True, use_score: bool = True, score_average: Union[int, float] = 3, max_sessions: int = 1000, session_idle_ttl: Optional[float] = 1800, long_term_memory: Optional[LongTermMemory] = None, max_plan_depth: int = 5, plan_timeout: Optional[float] = None, speculative_routing: bool = False, routing_predictor: Optional[Callable[[str, Optional[List[dict]]], Optional[str]]] = None, routing_model: Optional[BaseModel] = None, synthesis_model: Optional[BaseModel] = None, accept_speculation_on_rephrase: bool = False):
+        """
+        :param agents: Sub-agentes disponíveis, podendo incluir outros ManagerAgents.
+        :param max_plan_depth: Quantidade máxima de etapas encadeadas (dependências) de um plano, somando os planos dos
+        Managers aninhados.
+        :param plan_timeout: Tempo máximo (em segundos) de execução dos sub-agentes de um plano, None para não limitar.
+        As etapas não concluídas no prazo são canceladas e a resposta final é gerada com as respostas já recebidas.
+        :param speculative_routing: Inicia o sub-agente mais provável (com a mensagem do usuário) em paralelo com o
+        roteamento. A resposta é aproveitada caso o roteamento confirme o agente (em uma etapa sem dependências) com a
+        mesma mensagem, e a chamada é cancelada caso contrário.
+        :param routing_predictor: Função que recebe a mensagem e o histórico e retorna o nome do agente mais provável
+        (ou None para não especular). Por padrão usa o primeiro agente chamado no turno anterior do histórico.
+        :param routing_model: Modelo usado no roteamento (ex: um CascadeModel com verificação de JSON), por padrão usa o model.
+        :param synthesis_model: Modelo usado na resposta final, por padrão usa o model.
+        :param accept_speculation_on_rephrase: Aproveita a especulação mesmo quando o roteamento envia ao agente uma
+        mensagem diferente da mensagem do usuário (a etapa passa a usar a mensagem do usuário).
+        """
+        super().__init__("", agent_name, model, storage, max_history, use_storage, use_history, use_score, score_average, max_sessions, session_idle_ttl, long_term_memory)
+
+        self.agents: Dict[str, Union[SimpleAgent, ComplexAgent, ManagerAgent]] = {agent.agent_name: agent for agent in agents}
+        self.max_plan_depth: int = max(1, max_plan_depth)
+        self.plan_timeout: Optional[float] = plan_timeout
+
+        self.speculative_routing: bool = speculative_routing
+        self.routing_predictor: Optional[Callable[[str, Optional[List[dict]]], Optional[str]]] = routing_predictor
+        self.accept_speculation_on_rephrase: bool = accept_speculation_on_rephrase
+        self.speculation_metrics: SpeculationMetrics = SpeculationMetrics()
+
+        self.routing_model: BaseModel = routing_model or model
+        self.synthesis_model: BaseModel = synthesis_model or model
+
+    def get_metrics(self, session_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Pega as métricas de consumo do Manager (roteamento e síntese), incluindo as métricas de cada sub-agente.
+        :param session_id: Caso informado, retorna apenas as métricas da sessão do Manager.
+        :return: Dicionário com as métricas.
+        """
+        metrics = super().get_metrics(session_id)
+        if session_id is not None:
+            return metrics
 
-    def __init__(self, agent_name: str, model: Union[GeminiModel, GPTModel], agents: List[Union[SimpleAgent, ComplexAgent]], storage: Optional[InteractionHistory] = None, max_history: int = 100, use_storage: bool = True, use_history: bool = True, use_score: bool = True, score_average: Union[int, float] = 3):
-        super().__init__("", agent_name, model, storage, max_history, use_storage, use_history, use_score, score_average)
+        metrics["sub_agents"] = {agent_name: agent.get_metrics() for agent_name, agent in self.agents.items()}
+        if self.speculative_routing:
+            metrics["speculation"] = self.speculation_metrics.to_dict()
+        return metrics
 
-        self.agents: Dict[str, Union[SimpleAgent, ComplexAgent]] = {agent.agent_name: agent for agent in agents}
+    def reset_metrics(self) -> None:
+        super().reset_metrics()
+        self.speculation_metrics = SpeculationMetrics()
 
-    async def chat(self, user_input: str, streaming: bool = False, files: Optional[List[dict]] = None, save_history: bool = True) -> Optional[str]:
+    async def chat_stream(self, user_input: str, files: Optional[List[dict]] = None, save_history: bool = True, session_id: Optional[str] = None) -> AsyncIterator[ManagerStreamEvent]:
+        """
+        Versão em streaming do chat: retorna os eventos do processamento conforme eles acontecem.
+        Eventos (campo "type"):
+            - routing: agentes escolhidos pelo roteamento ("agents", vazio quando o Manager responde diretamente);
+            - agent_started / agent_finished: início e fim de cada sub-agente ("agent_name", "message", "response", "error" e "latency_ms");
+            - token: trecho da resposta final ("text"), enviado assim que a síntese começa a ser gerada;
+            - done: resposta final completa ("response") e id da interação salva ("interaction_id");
+            - error: erro que interrompeu o processamento ("error").
+        :param user_input: Mensagem do usuário.
+        :param files: Arquivos enviados junto da mensagem.
+        :param save_history: Define se a interação será salva no histórico.
+        :param session_id: Sessão cujo histórico será usado e atualizado, por padrão usa o histórico do agente.
+        :return: Iterador assíncrono dos eventos (ManagerStreamEvent).
+        """
+        queue: "asyncio.Queue[Optional[ManagerStreamEvent]]" = asyncio.Queue()
+
+        async def run() -> None:
+            # A task possui uma cópia própria do contexto, então os eventos não se misturam entre chamadas simultâneas:
+            _manager_events.set(queue.put_nowait)
+            with trace_span("agent.chat_stream", agent_name=self.agent_name, agent_type=self.TYPE_AGENT, session_id=session_id) as span:
+                try:
+                    async with self._session_lock(session_id):
+                        history = self._history_snapshot(session_id)
+                        agent_response, interaction = await self._process_input_with_usage(user_input, files, history, session_id)
+
+                        if (self.use_history or self.use_storage) and save_history:
+                            self._store_interactions([interaction], session_id)
+
+                    queue.put_nowait({"type": "done", "response": agent_response, "interaction_id": interaction["id"]})
+                except Exception as e:
+                    span.record_error(e)
+                    queue.put_nowait({"type": "error", "error": f"{type(e).__name__}: {e}"})
+                finally:
+                    queue.put_nowait(None)
+
+        task = asyncio.create_task(run())
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            # O cliente parou de consumir os eventos (ex: conexão encerrada), então o processamento é cancelado:
+            if not task.done():
+                task.cancel()
+                # Aguardando o cancelamento, para que os sub-agentes e a especulação sejam finalizados antes de retornar:
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+    async def _process_input(self, user_input: str, files: Optional[List[dict]], history: Optional[List[Interaction]]) -> Tuple[str, Interaction]:
         # Gera o prompt com base nos agentes disponíveis:
         prompt: str = self.__generate_prompt()
 
         if not prompt:
-            print(f"[ERRO] Não foi possível montar o prompt.")
-            return None
+            raise ValueError("Não foi possível montar o prompt.")
 
+        speculation = self.__start_speculation(user_input, history) if self.speculative_routing else None
         try:
-            agent_response: str = self.agent_model.generate(prompt, user_input, None, self.history, self.use_history)
+            with trace_span("model.generate", agent_name=self.agent_name, model_name=self.routing_model.model_name, phase="routing"):
+                agent_response: str = await self.routing_model.agenerate(prompt, user_input, None, history, self.use_history)
+        except BaseException:
+            self.__discard_speculation(speculation)
+            raise
 
-            extracted_agents = self.__extract_agent_call(agent_response)
+        if speculation is not None:
+            speculation.routed_at = time.perf_counter()
 
-            if not extracted_agents:
-                if self.use_history and save_history:
-                    self.__update_history(user_input, agent_response, False, [])
-                return agent_response
+        extracted_agents = self.__extract_agent_call(agent_response)
 
-            # Encontrando os Agentes solicitados:
-            delegated_agents = self.__find_correct_agents(extracted_agents)
+        if not extracted_agents:
+            self.__discard_speculation(speculation)
+            self.__emit({"type": "routing", "agents": []})
+            self.__emit({"type": "token", "text": agent_response})
+            return agent_response, self.__create_interaction(user_input, agent_response, False, [])
 
-            if len(delegated_agents) == 0:
-                requested_agents: str = extracted_agents if isinstance(extracted_agents, str) else json.dumps(extracted_agents, ensure_ascii=False)
-                print(f"[ERRO] Nenhum dos agentes requisitados foi encontrado: {requested_agents}")
-                return None
+        # Encontrando os Agentes solicitados (cada chamada é uma etapa do plano):
+        plan = self.__find_correct_agents(extracted_agents)
 
-            response_delegated_agents = await self.__execute_agents_calls(delegated_agents)
+        if len(plan) == 0:
+            self.__discard_speculation(speculation)
+            requested_agents: str = extracted_agents if isinstance(extracted_agents, str) else json.dumps(extracted_agents, ensure_ascii=False)
+            raise ValueError(f"Nenhum dos agentes requisitados foi encontrado: {requested_agents}")
 
-            final_prompt: str = self.__generate_final_prompt(response_delegated_agents)
+        speculations = self.__confirm_speculation(speculation, plan)
 
-            if not final_prompt:
-                return "\n".join(f"{k}: {v}" for agent in response_delegated_agents for k, v in agent.items())
+        self.__emit({
+            "type": "routing",
+            "agents": [{"agent_to_call": step["agent"].agent_name, "agent_message": step["message"]} for step in plan],
+            "plan": [{"id": step["id"], "agent_to_call": step["agent"].agent_name, "agent_message": step["message"], "depends_on": step["depends_on"]} for step in plan],
+        })
 
-            final_agent_response: str = self.agent_model.generate(final_prompt, user_input, None, None, False)
+        try:
+            response_delegated_agents = await self.__execute_plan(plan, speculations)
+        finally:
+            # Especulações confirmadas que não chegaram a ser usadas (plano com erro, cancelado ou com tempo esgotado):
+            for confirmed in speculations.values():
+                if not confirmed.used:
+                    self.__discard_speculation(confirmed)
 
-            if (self.use_history or self.use_storage) and save_history:
-                self.__update_history(user_input, agent_response, True, response_delegated_agents)
+        interaction: Interaction = self.__create_interaction(user_input, agent_response, True, response_delegated_agents)
 
-            return final_agent_response
+        final_prompt: str = self.__generate_final_prompt(response_delegated_agents)
 
-        except Exception as e:
-            print(f"[ERROR] - Falha ao interpretar a resposta do manager: {e}")
-            return None
+        if not final_prompt:
+            combined_response = "\n".join(f"{k}: {v}" for agent in response_delegated_agents for k, v in agent.items())
+            self.__emit({"type": "token", "text": combined_response})
+            return combined_response, interaction
+
+        with trace_span("model.generate", agent_name=self.agent_name, model_name=self.synthesis_model.model_name, phase="synthesis"):
+            final_agent_response: str = await self.__synthesize(final_prompt, user_input)
+
+        return final_agent_response, interaction
+
+    async def __synthesize(self, final_prompt: str, user_input: str) -> str:
+        """
+        Gera a resposta final a partir das respostas dos sub-agentes. No chat_stream, a resposta é gerada via stream
+        do modelo e cada trecho é enviado como evento assim que chega.
+        """
+        emit = _manager_events.get()
+        if emit is None:
+            return await self.synthesis_model.agenerate(final_prompt, user_input, None, None, False)
+
+        chunks: List[str] = []
+        async for chunk in self.synthesis_model.stream(final_prompt, user_input, None, None, False):
+            chunks.append(chunk)
+            emit({"type": "token", "text": chunk})
+        return "".join(chunks)
+
+    @staticmethod
+    def __emit(event: ManagerStreamEvent) -> None:
+        emit = _manager_events.get()
+        if emit is not None:
+            emit(event)
 
     def __extract_agent_call(self, response_text: str) -> Optional[ManagerCallManyAgents]:
         try:
@@ -437,54 +792,291 @@ class ManagerAgent(SimpleAgent):
             )
 
             data = json.loads(text_cleaned)
-            if isinstance(data, dict) and "call_agents" in data and "agents_to_call" in data:
+            if isinstance(data, dict) and "call_agents" in data and ("agents_to_call" in data or "plan" in data):
                 return data
             return None
         except json.JSONDecodeError:
             return None
 
-    def __find_correct_agents(self, agents_to_call: ManagerCallManyAgents) -> List[AgentCallInfo]:
+    def __find_correct_agents(self, agents_to_call: ManagerCallManyAgents) -> List[PlanStepCall]:
+        """
+        Converte a chamada do Manager em um plano: a lista plana "agents_to_call" vira um plano de etapas independentes.
+        :return: Etapas do plano, ou uma lista vazia caso algum agente não seja encontrado ou o plano seja inválido.
+        """
         try:
-            agents = []
-            for agent in agents_to_call.get("agents_to_call", []):
-                if agent.get("agent_to_call", "") not in self.agents.keys():
+            steps = agents_to_call.get("plan") or agents_to_call.get("agents_to_call", [])
+
+            plan: List[PlanStepCall] = []
+            for index, step in enumerate(steps):
+                if step.get("agent_to_call", "") not in self.agents.keys():
                     raise Exception("Erro ao procurar o agente correspondente.")
-                else:
-                    agents.append({"agent": self.agents[agent.get("agent_to_call")], "message": agent.get("agent_message")})
+
+                plan.append({
+                    "id": str(step.get("id") or f"step_{index + 1}"),
+                    "agent": self.agents[step.get("agent_to_call")],
+                    "message": step.get("agent_message"),
+                    "depends_on": [str(dependency) for dependency in step.get("depends_on") or []],
+                })
+
+            ids = [step["id"] for step in plan]
+            if len(set(ids)) != len(ids):
+                raise Exception(f"Etapas com o mesmo id no plano: {ids}")
+            for step in plan:
+                missing = [dependency for dependency in step["depends_on"] if dependency not in ids]
+                if missing:
+                    raise Exception(f"A etapa '{step['id']}' depende de etapas inexistentes: {missing}")
 
             # Encontrando o Agente solicitado:
-            return agents
+            return plan
         except Exception as e:
             print(f"[ERROR] - Falha ao encontrar o agente responsável: {e}")
             return []
 
-    async def __execute_agents_calls(self, delegated_agents: List[AgentCallInfo]) -> List[dict]:
-        # Execução paralela dos agentes:
-        coroutines = [
-            delegated_agent["agent"].chat(delegated_agent["message"], streaming=True)
-            for delegated_agent in delegated_agents
-        ]
-
-        results = await asyncio.gather(*coroutines, return_exceptions=True)
+    @staticmethod
+    def __plan_depths(plan: List[PlanStepCall]) -> Dict[str, int]:
+        """
+        Calcula a profundidade de cada etapa (1 + a maior profundidade das suas dependências).
+        :return: Dicionário {id da etapa: profundidade}.
+        """
+        steps = {step["id"]: step for step in plan}
+        depths: Dict[str, int] = {}
+        visiting: set = set()
+
+        def depth(step_id: str) -> int:
+            if step_id in depths:
+                return depths[step_id]
+            if step_id in visiting:
+                raise ValueError(f"O plano possui dependências circulares (etapa '{step_id}').")
+
+            visiting.add(step_id)
+            depths[step_id] = 1 + max((depth(dependency) for dependency in steps[step_id]["depends_on"]), default=0)
+            visiting.discard(step_id)
+            return depths[step_id]
+
+        for step_id in steps:
+            depth(step_id)
+        return depths
+
+    async def __execute_plan(self, plan: List[PlanStepCall], speculations: Optional[Dict[str, _Speculation]] = None) -> List[dict]:
+        """
+        Executa as etapas do plano: etapas independentes rodam em paralelo e cada etapa começa assim que as etapas das
+        quais ela depende terminam, recebendo as respostas delas junto da mensagem.
+        :param plan: Etapas do plano.
+        :param speculations: Chamadas especulativas confirmadas pelo roteamento, por id da etapa.
+        :return: Lista de dicionários {nome do agente: resposta}, na ordem das etapas.
+        """
+        depths = self.__plan_depths(plan)
+        base_depth = _plan_depth.get()
+        plan_depth = max(depths.values())
+
+        # Os limites valem para o plano inteiro, então um Manager aninhado respeita também os limites de quem o chamou:
+        max_depth = min(self.max_plan_depth, _plan_max_depth.get() or self.max_plan_depth)
+        if base_depth + plan_depth > max_depth:
+            raise ValueError(f"O plano excede a profundidade máxima ({base_depth + plan_depth} > {max_depth}).")
+
+        deadline = _plan_deadline.get()
+        if self.plan_timeout is not None:
+            own_deadline = time.monotonic() + self.plan_timeout
+            deadline = own_deadline if deadline is None else min(deadline, own_deadline)
+
+        agent_names: Dict[str, str] = {step["id"]: step["agent"].agent_name for step in plan}
+        responses: Dict[str, Optional[str]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: PlanStepCall) -> Optional[str]:
+            if step["depends_on"]:
+                await asyncio.wait([tasks[dependency] for dependency in step["depends_on"]])
+
+            missing = [dependency for dependency in step["depends_on"] if not isinstance(responses.get(dependency), str)]
+            if missing:
+                raise RuntimeError(f"As etapas {missing} não retornaram uma resposta.")
+
+            message: str = step["message"] or ""
+            if step["depends_on"]:
+                previous = "\n".join(f"- {dependency} ({agent_names[dependency]}): {responses[dependency]}" for dependency in step["depends_on"])
+                message = f"{message}\n\nRespostas das etapas anteriores:\n{previous}"
+
+            _plan_depth.set(base_depth + depths[step["id"]])
+            _plan_max_depth.set(max_depth)
+            _plan_deadline.set(deadline)
+            response = await self.__call_agent({**step, "message": message}, (speculations or {}).get(step["id"]))
+            responses[step["id"]] = response
+            return response
+
+        with trace_span("manager.dispatch", agent_name=self.agent_name, sub_agents=len(plan), plan_depth=plan_depth) as span:
+            # Todas as tarefas são criadas antes de qualquer etapa rodar, então cada etapa encontra as tarefas das suas dependências:
+            for step in plan:
+                tasks[step["id"]] = asyncio.create_task(run_step(step))
+
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+            except BaseException:
+                # O Manager foi cancelado: as etapas em andamento também são canceladas, sem continuar em segundo plano.
+                for task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+                raise
+
+            if pending:
+                span.set_attribute("timed_out_steps", len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.wait(pending)
 
         agents_response: List[dict] = []
 
-        for agent_info, result in zip(delegated_agents, results):
-            agent_name = agent_info["agent"].agent_name
+        for step in plan:
+            agent_name = step["agent"].agent_name
+            task = tasks[step["id"]]
 
-            if isinstance(result, Exception):
+            if task.cancelled():
+                print(f"[ERRO] Etapa '{step['id']}' (agente '{agent_name}') excedeu o tempo limite do plano.")
+                agents_response.append({agent_name: "[Tempo limite excedido]"})
+            elif task.exception() is not None:
+                result = task.exception()
                 print(f"[ERRO] Agente '{agent_name}' falhou: {type(result).__name__} - {result}")
                 agents_response.append({agent_name: "[Erro ao gerar resposta]"})
             else:
-                if isinstance(result, str):
-                    agents_response.append({agent_name: result})
+                if isinstance(task.result(), str):
+                    agents_response.append({agent_name: task.result()})
 
         return agents_response
 
+    async def __call_agent(self, delegated_agent: PlanStepCall, speculation: Optional[_Speculation] = None) -> Optional[str]:
+        agent_name: str = delegated_agent["agent"].agent_name
+        emit = _manager_events.get()
+        if emit is None:
+            return await self.__run_agent(delegated_agent, speculation)
+
+        # Sub-agentes (inclusive outros Managers) não enviam eventos para o stream deste Manager:
+        _manager_events.set(None)
+
+        emit({"type": "agent_started", "step_id": delegated_agent["id"], "agent_name": agent_name, "message": delegated_agent["message"], "speculative": speculation is not None})
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = await self.__run_agent(delegated_agent, speculation)
+            if result is None:
+                error = "O agente não retornou uma resposta."
+            return result
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            raise
+        finally:
+            emit({"type": "agent_finished", "step_id": delegated_agent["id"], "agent_name": agent_name, "response": result, "error": error, "latency_ms": (time.perf_counter() - start) * 1000})
+
+    async def __run_agent(self, delegated_agent: PlanStepCall, speculation: Optional[_Speculation]) -> Optional[str]:
+        agent: SimpleAgent = delegated_agent["agent"]
+        session_id: Optional[str] = _current_session.get()
+        if speculation is None:
+            return await agent.chat(delegated_agent["message"], session_id=session_id)
+
+        try:
+            agent_response, interaction = await speculation.task
+        except Exception as e:
+            # A chamada especulativa falhou, então o agente é chamado normalmente com a mensagem do roteamento:
+            speculation.used = True
+            self.speculation_metrics.failures += 1
+            print(f"[ERROR] - Falha na chamada especulativa do agente '{agent.agent_name}': {type(e).__name__}: {e}")
+            return await agent.chat(delegated_agent["message"], session_id=session_id)
+
+        # Sem a especulação, o agente começaria apenas após o roteamento (e terminaria depois do mesmo tempo de execução):
+        duration_ms = ((speculation.finished_at or time.perf_counter()) - speculation.started_at) * 1000
+        routing_ms = ((speculation.routed_at or speculation.started_at) - speculation.started_at) * 1000
+        speculation.used = True
+        self.speculation_metrics.add_hit(min(routing_ms, duration_ms))
+
+        if agent.use_history or agent.use_storage:
+            # O lock da sessão foi liberado ao fim da especulação, então é obtido novamente para salvar a interação:
+            async with agent._session_lock(speculation.session_id):
+                agent._store_interactions([interaction], speculation.session_id)
+        return agent_response
+
+    def __predict_agent(self, user_input: str, history: Optional[List[Interaction]]) -> Optional[str]:
+        if self.routing_predictor is not None:
+            return self.routing_predictor(user_input, history)
+
+        # Por padrão, o agente mais provável é o primeiro agente chamado no turno anterior:
+        for item in reversed(list(history or [])):
+            delegated = Interaction.from_dict(item).delegated
+            if delegated:
+                return next(iter(delegated))
+        return None
+
+    def __start_speculation(self, user_input: str, history: Optional[List[Interaction]]) -> Optional[_Speculation]:
+        """
+        Inicia o sub-agente mais provável em paralelo com o roteamento, sem salvar a interação no histórico dele
+        (a interação só é salva caso o roteamento confirme o agente).
+        :return: A chamada especulativa, ou None caso não exista um agente provável.
+        """
+        try:
+            agent_name = self.__predict_agent(user_input, history)
+        except Exception as e:
+            print(f"[ERROR] - Falha ao prever o agente da especulação: {e}")
+            return None
+
+        agent = self.agents.get(agent_name) if agent_name else None
+        if agent is None:
+            return None
+
+        base_depth = _plan_depth.get()
+        max_depth = min(self.max_plan_depth, _plan_max_depth.get() or self.max_plan_depth)
+        if base_depth + 1 > max_depth:
+            return None
+
+        session_id: Optional[str] = _current_session.get()
+        speculation = _Speculation(agent.agent_name, user_input, session_id, time.perf_counter())
+
+        async def speculate() -> Tuple[str, Interaction]:
+            _manager_events.set(None)
+            _plan_depth.set(base_depth + 1)
+            _plan_max_depth.set(max_depth)
+            with trace_span("manager.speculate", agent_name=self.agent_name, sub_agent=agent.agent_name):
+                async with agent._session_lock(session_id):
+                    try:
+                        return await agent._process_input_with_usage(user_input, None, agent._history_snapshot(session_id), session_id)
+                    finally:
+                        speculation.finished_at = time.perf_counter()
+
+        speculation.task = asyncio.create_task(speculate())
+        speculation.task.add_done_callback(lambda done: done.cancelled() or done.exception())  # -> Erros de especulações descartadas não são exibidos.
+
+        self.speculation_metrics.attempts += 1
+        return speculation
+
+    def __confirm_speculation(self, speculation: Optional[_Speculation], plan: List[PlanStepCall]) -> Dict[str, _Speculation]:
+        """
+        Confirma a chamada especulativa caso o roteamento tenha escolhido o mesmo agente, com a mesma mensagem, em uma
+        etapa sem dependências. Com accept_speculation_on_rephrase, a mensagem do roteamento pode ser diferente, e a
+        etapa passa a usar a mensagem do usuário (enviada na especulação).
+        :return: Dicionário {id da etapa: chamada especulativa}, vazio caso a especulação seja descartada.
+        """
+        if speculation is None:
+            return {}
+
+        for step in plan:
+            if step["agent"].agent_name != speculation.agent_name or step["depends_on"]:
+                continue
+
+            if step["message"].strip() == speculation.message.strip() or self.accept_speculation_on_rephrase:
+                step["message"] = speculation.message
+                return {step["id"]: speculation}
+
+        self.__discard_speculation(speculation)
+        return {}
+
+    def __discard_speculation(self, speculation: Optional[_Speculation]) -> None:
+        if speculation is None:
+            return
+
+        speculation.task.cancel()
+        self.speculation_metrics.add_miss(((speculation.finished_at or time.perf_counter()) - speculation.started_at) * 1000)
+
     def __generate_prompt(self) -> str:
         try:
             formatted_agents = "\n".join(
-                f"- {agent_name}: {agent.prompt_build}\n" for agent_name, agent in
+                f"- {agent_name}: {self.__describe_agent(agent)}\n" for agent_name, agent in
                 self.agents.items())
 
             first_prompt_template: str = """Você é um agente gerente responsável por delegar perguntas aos agentes adequados.
@@ -502,6 +1094,17 @@ FORMATO DO JSON:
     {"agent_to_call": "nome_do_agente", "agent_message": "mensagem_concatenada"}
   ]
 }
+
+PLANO COM DEPENDÊNCIAS:
+Quando a resposta de um agente for necessária para a pergunta de outro, use "plan" no lugar de "agents_to_call".
+Cada etapa possui um "id" e, opcionalmente, "depends_on" com os ids das etapas cujas respostas ela precisa (que
+serão enviadas junto da mensagem). Etapas sem dependência entre si são executadas em paralelo.
+{
+  "call_agents": true,
+  "plan": [
+    {"id": "id_da_etapa", "agent_to_call": "nome_do_agente", "agent_message": "mensagem", "depends_on": []}
+  ]
+}
 """
 
             second_prompt_template: str = f"""
@@ -521,6 +1124,9 @@ Chamada múltipla:
 Agrupamento para o mesmo agente:
 {"call_agents": true, "agents_to_call": [{"agent_to_call": "MathAgent", "agent_message": "Quanto é 5+5? Quanto é 10+10?"}]}
 
+Plano com dependência (a previsão do tempo depende da cidade encontrada pelo primeiro agente):
+{"call_agents": true, "plan": [{"id": "cidade", "agent_to_call": "CustomerAgent", "agent_message": "Qual a cidade do cliente 42?"}, {"id": "clima", "agent_to_call": "WeatherAgent", "agent_message": "Qual é o clima na cidade informada?", "depends_on": ["cidade"]}]}
+
 Resposta direta (sem agentes):
 Claro! Posso ajudar diretamente com essa questão."""
 
@@ -529,6 +1135,13 @@ Claro! Posso ajudar diretamente com essa questão."""
             print(f'[ERROR] - Ocorreu um erro durante a geração do prompt: {e}')
             return ""
 
+    @staticmethod
+    def __describe_agent(agent: SimpleAgent) -> str:
+        if isinstance(agent, ManagerAgent):
+            # Managers não possuem prompt próprio, então são descritos pelos agentes que gerenciam:
+            return f"Gerente que delega para os agentes: {', '.join(agent.agents)}."
+        return agent.prompt_build
+
     def __generate_final_prompt(self, agents_response: List[dict]) -> str:
         try:
             combined: str = "\n".join(f"{k}: {v}" for agent in agents_response for k, v in agent.items())
@@ -547,29 +1160,11 @@ Para isso gere uma única resposta unificada e natural para o usuário final."""
             print(f"[ERROR] - Falha ao gerar o prompt final do Manager: {e}")
             return ""
 
-    def __update_history(self, user_input: str, agent_response: str, called_delegated_agents: bool, response_delegated_agents: List[dict], score: int | None = None) -> None:
-        try:
-            actual_conversation = {
-                "id": str(uuid.uuid4()),
-                "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                "interaction": {
-                    "user": user_input,
-                    "agent": []
-                },
-                "type_agent": "manager",
-                "score": score,
-                "called_agents": called_delegated_agents
-            }
-
-            if called_delegated_agents:
-                for agent in response_delegated_agents:
-                    for agente_name, response in agent.items():  # -> Esse for é sempre fixo em 1 item.
-                        actual_conversation["interaction"][agente_name] = [response]
-
-            actual_conversation["interaction"]['agent'] = [agent_response]
-
-            self.history.append(actual_conversation)
-            self.history = self.history[-self.MAX_HISTORY:]  # -> Mantendo apenas os N itens no histórico.
-            self.storage.save_history(self.agent_name, actual_conversation)
-        except Exception as e:
-            print(f'[ERROR] - Ocorreu um erro duração a atualização do histórico: {e}')
+    def __create_interaction(self, user_input: str, agent_response: str, called_delegated_agents: bool, response_delegated_agents: List[dict], score: int | None = None) -> Interaction:
+        delegated: Dict[str, List[str]] = {}
+        if called_delegated_agents:
+            for agent in response_delegated_agents:
+                for agente_name, response in agent.items():  # -> Esse for é sempre fixo em 1 item.
+                    delegated.setdefault(agente_name, []).append(response)  # -> Um agente pode ser chamado em mais de uma etapa do plano.
+
+        return Interaction(user_input, [agent_response], self.TYPE_AGENT, score=score, called_agents=called_delegated_agents, delegated=delegated or None)
@@ -1,7 +1,7 @@
 from typing import TypedDict, List, Optional, Union, TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from tyr_agent import SimpleAgent, ComplexAgent
+    from tyr_agent import SimpleAgent, ComplexAgent, ManagerAgent
 
 
 class ManagerCallAgent(TypedDict):
@@ -9,16 +9,29 @@ class ManagerCallAgent(TypedDict):
     agent_message: str
 
 
-class ManagerCallManyAgents(TypedDict):
+class ManagerPlanStep(TypedDict, total=False):
+    id: str
+    agent_to_call: str
+    agent_message: str
+    depends_on: List[str]
+
+
+class ManagerCallManyAgents(TypedDict, total=False):
     call_agents: bool
     agents_to_call: List[ManagerCallAgent]
+    plan: List[ManagerPlanStep]
 
 
 class AgentCallInfo(TypedDict):
-    agent: "SimpleAgent | ComplexAgent"
+    agent: "SimpleAgent | ComplexAgent | ManagerAgent"
     message: str
 
 
+class PlanStepCall(AgentCallInfo):
+    id: str
+    depends_on: List[str]
+
+
 class AgentInteraction(TypedDict):
     user: str
     agent: List[str]
@@ -29,3 +42,47 @@ class AgentHistory(TypedDict):
     interaction: AgentInteraction
     score: Optional[Union[int, float]]
     type_agent: str
+
+
+class ChatManyInput(TypedDict, total=False):
+    user_input: str
+    files: Optional[List[dict]]
+
+
+class ChatManyResult(TypedDict):
+    user_input: str
+    response: Optional[str]
+    error: Optional[str]
+    interaction_id: Optional[str]
+
+
+class ManagerStreamEvent(TypedDict, total=False):
+    type: str  # -> "routing", "agent_started", "agent_finished", "token", "done" ou "error".
+    agents: List[ManagerCallAgent]
+    plan: List[ManagerPlanStep]
+    step_id: str
+    agent_name: str
+    message: str
+    response: Optional[str]
+    error: Optional[str]
+    latency_ms: float
+    speculative: bool
+    text: str
+    interaction_id: Optional[str]
+
+
+class ModelCallUsage(TypedDict):
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    latency_ms: float
+
+
+class InteractionUsage(TypedDict):
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    model_latency_ms: float
+    calls: List[ModelCallUsage]
+    latency_ms: float
+    history_size: int
@@ -0,0 +1,202 @@
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+_MISSING = object()
+
+
+class Interaction:
+    """
+    Registro compacto de uma interação do agente, utilizado no histórico em memória.
+    O id é mantido em binário (16 bytes) e o timestamp das novas interações como número, sendo convertidos para o
+    formato JSON do histórico (id em texto e timestamp formatado) apenas na serialização (to_dict).
+    Timestamps carregados do histórico são mantidos exatamente como foram salvos (microssegundos e fuso horário).
+    Também pode ser lido como o dicionário original (ex: interaction["id"], interaction.get("score")).
+    """
+    __slots__ = ("uid", "created_at", "user", "agent", "called_functions", "type_agent", "score", "called_agents", "delegated", "usage")
+
+    def __init__(self, user: str, agent: List[str], type_agent: str, called_functions: Optional[List[dict]] = None, score: Optional[Union[int, float]] = None, uid: Union[bytes, str, None] = None, created_at: Union[float, str, None] = None, called_agents: Optional[bool] = None, delegated: Optional[Dict[str, List[str]]] = None, usage: Optional[dict] = None):
+        """
+        :param user: Mensagem do usuário.
+        :param agent: Respostas do agente.
+        :param type_agent: Tipo do agente (simple, complex ou manager).
+        :param called_functions: Funções chamadas durante a interação.
+        :param score: Nota da interação (0 a 5), ou None caso não tenha sido avaliada.
+        :param uid: ID da interação (bytes do uuid, ou texto caso não seja um uuid). Por padrão gera um novo uuid.
+        :param created_at: Momento da interação (timestamp numérico, ou o texto salvo no histórico). Por padrão usa o momento atual.
+        :param called_agents: (ManagerAgent) Define se a interação chamou os sub-agentes.
+        :param delegated: (ManagerAgent) Respostas de cada sub-agente chamado.
+        :param usage: Consumo de tokens e latência da interação.
+        """
+        self.uid: Union[bytes, str] = uid if uid is not None else uuid.uuid4().bytes
+        self.created_at: Union[float, str] = created_at if created_at is not None else time.time()
+        self.user: str = user
+        self.agent: List[str] = agent
+        self.called_functions: Optional[List[dict]] = called_functions or None  # -> None ocupa menos memória que uma lista vazia.
+        self.type_agent: str = type_agent
+        self.score: Optional[Union[int, float]] = score
+        self.called_agents: Optional[bool] = called_agents
+        self.delegated: Optional[Dict[str, List[str]]] = delegated
+        self.usage: Optional[dict] = usage
+
+    @property
+    def id(self) -> str:
+        return str(uuid.UUID(bytes=self.uid)) if isinstance(self.uid, bytes) else self.uid
+
+    @property
+    def timestamp(self) -> str:
+        if isinstance(self.created_at, str):
+            return self.created_at
+        return datetime.fromtimestamp(self.created_at).strftime(TIMESTAMP_FORMAT)
+
+    @staticmethod
+    def parse_id(interaction_id: Union[str, bytes]) -> Union[bytes, str]:
+        """
+        Converte o id em texto para a chave usada internamente (bytes do uuid, ou o próprio texto caso não seja um uuid).
+        """
+        if isinstance(interaction_id, bytes):
+            return interaction_id
+        try:
+            return uuid.UUID(interaction_id).bytes
+        except (ValueError, TypeError, AttributeError):
+            return interaction_id
+
+    @classmethod
+    def from_dict(cls, data: Union[dict, "Interaction"]) -> "Interaction":
+        """
+        Cria a interação a partir do formato JSON do histórico.
+        :param data: Interação no formato de dicionário (ex: carregada do InteractionHistory).
+        :return: Interação.
+        """
+        if isinstance(data, Interaction):
+            return data
+
+        content: dict = data.get("interaction", {})
+        delegated = {k: v for k, v in content.items() if k not in ("user", "agent")} or None
+
+        interaction_id = data.get("id")
+        return cls(
+            user=content.get("user", ""),
+            agent=content.get("agent", []),
+            type_agent=data.get("type_agent", ""),
+            called_functions=data.get("called_functions"),
+            score=data.get("score"),
+            uid=cls.parse_id(interaction_id) if interaction_id is not None else None,
+            created_at=data.get("timestamp"),
+            called_agents=data.get("called_agents"),
+            delegated=delegated,
+            usage=data.get("usage"),
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Converte a interação para o formato JSON do histórico.
+        :return: Dicionário com id, timestamp, interaction, called_functions, type_agent e score.
+        """
+        data = {
+            "id": self.id,
+            "timestamp": self.timestamp,
+            "interaction": self._content(),
+            "called_functions": self.called_functions or [],
+            "type_agent": self.type_agent,
+            "score": self.score,
+        }
+        if self.called_agents is not None:
+            data["called_agents"] = self.called_agents
+        if self.usage is not None:
+            data["usage"] = self.usage
+
+        return data
+
+    # Acesso no formato de dicionário, mantendo a compatibilidade com o código que lê o histórico como dict:
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "interaction":
+            return InteractionContent(self)
+        if key == "called_functions":
+            return self.called_functions or []
+        if key in ("id", "timestamp", "type_agent", "score", "called_agents", "usage"):
+            value = getattr(self, key)
+            return default if value is None and key in ("called_agents", "usage") else value
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in ("score", "type_agent", "called_agents", "usage"):
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Interaction):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def _content(self) -> Dict[str, Any]:
+        content: Dict[str, Any] = {"user": self.user, "agent": self.agent}
+        if self.delegated:
+            content.update(self.delegated)
+        return content
+
+    def __repr__(self) -> str:
+        return f"Interaction(id={self.id!r}, type_agent={self.type_agent!r}, score={self.score!r})"
+
+
+class InteractionContent(dict):
+    """
+    Conteúdo da interação (user, agent e as respostas dos sub-agentes) no formato de dicionário.
+    As alterações são aplicadas na própria interação (ex: item["interaction"]["agent"] = [...]).
+    """
+
+    def __init__(self, interaction: Interaction):
+        super().__init__(interaction._content())
+        self._interaction: Interaction = interaction
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in ("user", "agent"):
+            setattr(self._interaction, key, value)
+        else:
+            if self._interaction.delegated is None:
+                self._interaction.delegated = {}
+            self._interaction.delegated[key] = value
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key in ("user", "agent") or not self._interaction.delegated or key not in self._interaction.delegated:
+            raise KeyError(key)
+        del self._interaction.delegated[key]
+        self._interaction.delegated = self._interaction.delegated or None
+        super().__delitem__(key)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key not in self and default:
+            return default[0]
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        raise TypeError("O conteúdo da interação não suporta popitem.")
+
+    def clear(self) -> None:
+        raise TypeError("O conteúdo da interação não pode ser limpo.")
@@ -1,48 +1,117 @@
-from typing import Optional, Union
-from io import BytesIO
+from typing import Optional, Tuple
 from google.genai import types
+from tyr_agent.utils.file_cache import FileConversionCache
+from tyr_agent.utils.file_input import FileInput, FileLike
+from tyr_agent.utils.attachment_manager import AttachmentManager
+from tyr_agent.utils.image_utils import ImagePreprocessConfig, PREPROCESSABLE_IMAGE_TYPES, preprocess_image, record_attachment
 
 
 class GeminiFileMixin:
-    def convert_item_to_gemini_model(self, file: Union[str, BytesIO], file_name: str) -> Optional[types.Part]:
+    # Cache compartilhado dos arquivos já convertidos para types.Part:
+    file_cache: FileConversionCache = FileConversionCache()
+
+    # Pré-processamento opcional das imagens (redimensionamento e recompressão):
+    image_preprocessing: Optional[ImagePreprocessConfig] = None
+
+    # Gerenciador dos arquivos enviados via Gemini Files API (quando utilizado):
+    attachment_manager: Optional[AttachmentManager] = None
+
+    def convert_item_to_gemini_model(self, file: FileLike, file_name: str) -> Optional[types.Part]:
         """
-        Converte um path, base64 ou BytesIO para o formato ideal para ser enviado na requisição do Gemini.
-        :param file: Arquivo a ser enviado, podendo ser path, base64 ou BytesIO.
+        Converte um path, bytes, memoryview, BytesIO, data URL ou base64 para o formato ideal para ser enviado na requisição do Gemini.
+        :param file: Arquivo a ser enviado, podendo ser path, bytes, memoryview, BytesIO, data URL ou base64.
         :param file_name: Nome do arquivo a ser enviado.
         :return: Retorna um dicionário no formato ideal para ser enviado via Gemini.
         """
         try:
-            bytes_file = self.__get_file_bytes(file)
-            if not bytes_file:
-                return None
-
             mime_type = self.__detect_mime_type(file_name)
 
             if mime_type == "application/octet-stream":
                 raise ValueError(f"Tipo MIME não suportado ou não reconhecido para o arquivo '{file_name}'.")
 
-            return types.Part.from_bytes(data=bytes_file, mime_type=mime_type)
+            # Imagens podem ser reduzidas e recomprimidas antes do envio:
+            preprocessing = self.image_preprocessing if mime_type in PREPROCESSABLE_IMAGE_TYPES else None
+
+            # Validando se o arquivo já foi convertido anteriormente:
+            cache_namespace = f"gemini:{mime_type}:{preprocessing.cache_tag}" if preprocessing else f"gemini:{mime_type}"
+            cache_key = self.file_cache.make_key(file, cache_namespace)
+            cached_item = self.file_cache.get(cache_key)
+            if cached_item is not None:
+                part, original_bytes, sent_bytes = cached_item
+                record_attachment(file_name, original_bytes, sent_bytes)
+                return part
+
+            bytes_file = self.__get_file_bytes(file, file_name)
+            if not bytes_file:
+                return None
+
+            original_bytes = len(bytes_file)
+            if preprocessing is not None:
+                bytes_file, mime_type = preprocess_image(bytes_file, mime_type, preprocessing)
+
+            part = types.Part.from_bytes(data=bytes_file, mime_type=mime_type)
+            self.file_cache.set(cache_key, (part, original_bytes, len(bytes_file)), len(bytes_file))
+            record_attachment(file_name, original_bytes, len(bytes_file))
+
+            return part
         except Exception as e:
             return None
 
-    def __get_file_bytes(self, file: Union[str, BytesIO]) -> Optional[bytes]:
+    def upload_item_to_gemini(self, file: FileLike, file_name: str) -> Optional[types.Part]:
+        """
+        Envia o arquivo via Gemini Files API (apenas na primeira vez) e retorna uma referência ao arquivo enviado,
+        evitando reenviar os bytes do arquivo a cada requisição.
+        :param file: Arquivo a ser enviado, podendo ser path, bytes, memoryview, BytesIO, data URL ou base64.
+        :param file_name: Nome do arquivo a ser enviado.
+        :return: Retorna um types.Part referenciando o arquivo enviado. Caso o envio falhe, o arquivo é enviado
+        na própria requisição (ver convert_item_to_gemini_model).
         """
-        Pega os bytes de um arquivo, seja via path, base64 ou BytesIO.
+        if self.attachment_manager is None:
+            return self.convert_item_to_gemini_model(file, file_name)
+
+        mime_type = self.__detect_mime_type(file_name)
+
+        if mime_type == "application/octet-stream":
+            return None
+
+        preprocessing = self.image_preprocessing if mime_type in PREPROCESSABLE_IMAGE_TYPES else None
+        cache_namespace = f"gemini-upload:{mime_type}:{preprocessing.cache_tag}" if preprocessing else f"gemini-upload:{mime_type}"
+
+        def load_file() -> Optional[Tuple[bytes, str]]:
+            bytes_file = self.__get_file_bytes(file, file_name)
+            if not bytes_file:
+                return None
+            if preprocessing is not None:
+                return preprocess_image(bytes_file, mime_type, preprocessing)
+            return bytes_file, mime_type
+
+        try:
+            uploaded_file = self.attachment_manager.get_or_upload(self.file_cache.make_key(file, cache_namespace), file_name, load_file)
+            if uploaded_file is None:
+                return None
+
+            return types.Part.from_uri(file_uri=uploaded_file.reference, mime_type=uploaded_file.mime_type)
+        except Exception as e:
+            print(f"[ERROR] - Falha ao enviar o arquivo '{file_name}' via Files API, enviando-o na requisição: {type(e).__name__}: {e}")
+            return self.convert_item_to_gemini_model(file, file_name)
+
+    def __get_file_bytes(self, file: FileLike, file_name: str) -> Optional[bytes]:
+        """
+        Pega os bytes de um arquivo, seja via path, bytes, memoryview, BytesIO, data URL ou base64.
+        O tipo da entrada é identificado diretamente (FileInput), sem tentar decodificar paths como base64.
         :param file: Arquivo que terá seus bytes extraídos.
+        :param file_name: Nome do arquivo (usado na mensagem de erro).
         :return: Retorna os bytes do arquivo.
         """
-        if isinstance(file, str):
-            bytes_file = self.__convert_base64_to_bytes(file)
-            if bytes_file is None:  # Não é base64, então é path.
-                try:
-                    with open(file, "rb") as f:
-                        bytes_file = f.read()
-                except Exception:
-                    return None
-            return bytes_file
-        elif isinstance(file, BytesIO):
-            return file.read()
-        return None
+        file_input = FileInput.detect(file)
+        if file_input is None:
+            print(f"[ERROR] - Arquivo '{file_name}' não encontrado ou inválido (não é um path, data URL ou base64 válido).")
+            return None
+
+        bytes_file = file_input.read_bytes()
+        if bytes_file is None and file_input.is_encoded:
+            print(f"[ERROR] - Não foi possível decodificar o base64 do arquivo '{file_name}'.")
+        return bytes_file
 
     def __detect_mime_type(self, file_name: str) -> str:
         """
@@ -69,27 +138,3 @@ class GeminiFileMixin:
 
         mime_type, _ = mimetypes.guess_type(file_name)
         return mime_type or "application/octet-stream"
-
-    def __convert_base64_to_bytes(self, string_base64: str) -> Optional[bytes]:
-        """
-        Tenta decodificar um conteúdo base64 (com ou sem header).
-        :param string_base64: String a ser validada.
-        :return: Retorna os bytes ou levanta None se não for válido.
-        """
-        import base64
-
-        try:
-            if string_base64.startswith("data:"):
-                header, b64data = string_base64.split(",", 1)
-            else:
-                b64data = string_base64
-
-            # Validando o tamanho e padding: (b64 precisa ser múltiplo de 4)
-            if len(b64data.strip()) % 4 != 0:
-                b64data += '=' * (4 - len(b64data.strip()) % 4)
-
-            # Decodificando a string base64 (b64data) para bytes e Validando se a string é um base64 válido e bem formado:
-            return base64.b64decode(b64data, validate=True)
-        except Exception:
-            # print(f'[ERROR] - __detect_base64: {type(e).__name__}: {e}')
-            return None
@@ -1,5 +1,8 @@
-from typing import Optional, Union, Tuple
-from io import BytesIO
+from typing import Optional, Tuple, Union
+from tyr_agent.utils.file_cache import FileConversionCache
+from tyr_agent.utils.file_input import FileInput, FileInputKind, FileLike
+from tyr_agent.utils.attachment_manager import AttachmentManager
+from tyr_agent.utils.image_utils import ImagePreprocessConfig, PREPROCESSABLE_IMAGE_TYPES, preprocess_image, record_attachment
 
 
 class GPTFileMixin:
@@ -10,33 +13,129 @@ class GPTFileMixin:
         "application/pdf"
     }
 
-    def convert_item_to_gpt_model(self, file: Union[str, bytes, BytesIO], file_name: str) -> Optional[Tuple[str, str]]:
+    # Tamanho dos blocos codificados de arquivos grandes (múltiplo de 3 para que o base64 de cada bloco não tenha padding):
+    STREAM_CHUNK_SIZE = 3 * 256 * 1024
+
+    # Cache compartilhado dos arquivos já convertidos para data URL:
+    file_cache: FileConversionCache = FileConversionCache()
+
+    # Pré-processamento opcional das imagens (redimensionamento e recompressão):
+    image_preprocessing: Optional[ImagePreprocessConfig] = None
+
+    # Gerenciador dos arquivos enviados via OpenAI Files API (quando utilizado):
+    attachment_manager: Optional[AttachmentManager] = None
+
+    def convert_item_to_gpt_model(self, file: FileLike, file_name: str) -> Optional[Tuple[str, str]]:
         """
-        Converte um arquivo (path, bytes ou BytesIO) para base64 com prefixo data URL (data:image/png;base64,...).
-        Suporta apenas imagens.
-        :param file: Caminho para o arquivo, bytes ou BytesIO.
+        Converte um arquivo (path, bytes, memoryview, BytesIO, data URL ou base64) para base64 com prefixo data URL (data:image/png;base64,...).
+        Suporta apenas imagens e PDFs.
+        :param file: Caminho para o arquivo, bytes, memoryview, BytesIO, data URL ou base64.
         :param file_name: Nome original do arquivo (usado para detectar o mime type).
         :return: Tupla de Strings onde 0: base64 formatada como data URL; 1: Nome do arquivo.
-        :raises: ValueError para tipos de arquivo não suportados ou erros de leitura.
         """
-        import base64
-
         # Detecta o mime type com base no nome
         mime_type = self.__detect_mime_type(file_name)
 
         if mime_type not in self.SUPPORTED_TYPES:
             return None
 
-        # Obtendo os bytes do arquivo:
-        bytes_file = self.__get_file_bytes(file)
-        if not bytes_file:
+        # Imagens podem ser reduzidas e recomprimidas antes do envio:
+        preprocessing = self.image_preprocessing if mime_type in PREPROCESSABLE_IMAGE_TYPES else None
+
+        # Validando se o arquivo já foi convertido anteriormente:
+        cache_namespace = f"gpt:{mime_type}:{preprocessing.cache_tag}" if preprocessing else f"gpt:{mime_type}"
+        cache_key = self.file_cache.make_key(file, cache_namespace)
+        cached_item = self.file_cache.get(cache_key)
+        if cached_item is not None:
+            data_url, original_bytes, sent_bytes = cached_item
+            record_attachment(file_name, original_bytes, sent_bytes)
+            return data_url, file_name
+
+        file_input = FileInput.detect(file)
+        if file_input is None:
+            print(f"[ERROR] - Arquivo '{file_name}' não encontrado ou inválido (não é um path, data URL ou base64 válido).")
             return None
 
-        # Codificando em base64:
-        b64_string = base64.b64encode(bytes_file).decode()
+        header = f"data:{mime_type};base64,"
+
+        if preprocessing is not None:
+            bytes_file = file_input.read_bytes()
+            if not bytes_file:
+                return None
+
+            processed_file, processed_mime_type = preprocess_image(bytes_file, mime_type, preprocessing)
+            data_url = self.__encode_base64(processed_file, f"data:{processed_mime_type};base64,")
+            original_bytes, sent_bytes = len(bytes_file), len(processed_file)
+        elif file_input.kind == FileInputKind.DATA_URL and file_input.value.startswith(header):
+            # O data URL já está no formato esperado, então é reaproveitado sem nenhuma cópia:
+            data_url = file_input.value
+            original_bytes = sent_bytes = (len(data_url) - len(header)) * 3 // 4
+        elif file_input.is_encoded:
+            # O conteúdo já está em base64, então é reaproveitado sem decodificar e codificar novamente:
+            b64_string = file_input.base64_payload()
+            if b64_string is None:
+                return None
+            data_url = header + b64_string
+            original_bytes = sent_bytes = len(b64_string) * 3 // 4
+        else:
+            with file_input.open_buffer() as buffer:
+                if not buffer:
+                    return None
+
+                # Retorna no formato data URL
+                data_url = self.__encode_base64(buffer, header)
+                original_bytes = sent_bytes = len(buffer)
+
+        self.file_cache.set(cache_key, (data_url, original_bytes, sent_bytes), len(data_url))
+        record_attachment(file_name, original_bytes, sent_bytes)
 
-        # Retorna no formato data URL
-        return f"data:{mime_type};base64,{b64_string}", file_name
+        return data_url, file_name
+
+    def upload_item_to_gpt(self, file: FileLike, file_name: str) -> Optional[Union[dict, Tuple[str, str]]]:
+        """
+        Envia o arquivo via OpenAI Files API (apenas na primeira vez) e retorna o conteúdo da mensagem referenciando o arquivo enviado,
+        evitando reenviar os bytes do arquivo a cada requisição.
+        :param file: Caminho para o arquivo, bytes, memoryview, BytesIO, data URL ou base64.
+        :param file_name: Nome original do arquivo (usado para detectar o mime type).
+        :return: Dicionário no formato de conteúdo da Responses API (input_image ou input_file) com o file_id do arquivo.
+        Caso o envio falhe, o arquivo é convertido para data URL (ver convert_item_to_gpt_model).
+        """
+        if self.attachment_manager is None:
+            return self.convert_item_to_gpt_model(file, file_name)
+
+        mime_type = self.__detect_mime_type(file_name)
+
+        if mime_type not in self.SUPPORTED_TYPES:
+            return None
+
+        preprocessing = self.image_preprocessing if mime_type in PREPROCESSABLE_IMAGE_TYPES else None
+        cache_namespace = f"gpt-upload:{mime_type}:{preprocessing.cache_tag}" if preprocessing else f"gpt-upload:{mime_type}"
+
+        def load_file() -> Optional[Tuple[bytes, str]]:
+            file_input = FileInput.detect(file)
+            if file_input is None:
+                print(f"[ERROR] - Arquivo '{file_name}' não encontrado ou inválido (não é um path, data URL ou base64 válido).")
+                return None
+
+            bytes_file = file_input.read_bytes()
+            if not bytes_file:
+                return None
+            if preprocessing is not None:
+                return preprocess_image(bytes_file, mime_type, preprocessing)
+            return bytes_file, mime_type
+
+        try:
+            uploaded_file = self.attachment_manager.get_or_upload(self.file_cache.make_key(file, cache_namespace), file_name, load_file)
+        except Exception as e:
+            print(f"[ERROR] - Falha ao enviar o arquivo '{file_name}' via Files API, enviando-o na requisição: {type(e).__name__}: {e}")
+            return self.convert_item_to_gpt_model(file, file_name)
+
+        if uploaded_file is None:
+            return None
+
+        if uploaded_file.mime_type == "application/pdf":
+            return {"type": "input_file", "file_id": uploaded_file.reference}
+        return {"type": "input_image", "file_id": uploaded_file.reference, "detail": "auto"}
 
     def __detect_mime_type(self, file_name: str) -> str:
         """
@@ -62,20 +161,18 @@ class GPTFileMixin:
         mime_type, _ = mimetypes.guess_type(file_name)
         return mime_type or "application/octet-stream"
 
-    def __get_file_bytes(self, file: Union[str, BytesIO]) -> Optional[bytes]:
+    def __encode_base64(self, buffer, prefix: str = "") -> str:
         """
-        Pega os bytes de um arquivo, seja via path ou BytesIO.
-        :param file: Arquivo que terá seus bytes extraídos.
-        :return: Retorna os bytes do arquivo.
+        Codifica um buffer em base64. Buffers grandes são codificados em blocos através de memoryview,
+        sem copiar o conteúdo original (inclusive arquivos mapeados via mmap).
+        :param buffer: Conteúdo do arquivo (bytes-like).
+        :param prefix: Texto adicionado antes do base64 (ex: header do data URL), sem cópias extras.
+        :return: Retorna a string base64 do conteúdo.
         """
-        if isinstance(file, str):
-            try:
-                with open(file, "rb") as f:
-                    return f.read()
-            except Exception:
-                return None
-        elif isinstance(file, BytesIO):
-            return file.read()
-        elif isinstance(file, bytes):
-            return file
-        return None
+        import base64
+
+        with memoryview(buffer) as view:
+            return "".join([
+                prefix,
+                *(base64.b64encode(view[i:i + self.STREAM_CHUNK_SIZE]).decode() for i in range(0, len(view), self.STREAM_CHUNK_SIZE))
+            ])
@@ -0,0 +1,162 @@
+import asyncio
+import inspect
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tyr_agent.entities.interaction import Interaction
+from tyr_agent.utils.file_conversion_utils import convert_files_concurrently
+from tyr_agent.utils.image_utils import AttachmentReport, current_attachment_report
+from tyr_agent.utils.tracing import trace_span
+from tyr_agent.utils.usage_utils import record_attachments, record_usage
+
+
+class BaseModel(ABC):
+    """
+    Interface comum dos modelos utilizados pelos agentes (Gemini, GPT, FakeModel, etc).
+    Define os métodos de geração e concentra a lógica compartilhada de histórico, arquivos e execução de funções.
+    """
+
+    # Quantidade máxima de arquivos enviados em uma mesma mensagem:
+    MAX_FILES_PER_MESSAGE = 10
+
+    model_name: str
+
+    @abstractmethod
+    def generate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
+        """
+        Gera a resposta do modelo (chamada bloqueante).
+        :param prompt_build: Prompt de sistema do agente.
+        :param user_input: Mensagem do usuário.
+        :param files: Arquivos enviados junto da mensagem.
+        :param history: Histórico de interações do agente.
+        :param use_history: Define se o histórico será enviado ao modelo.
+        :return: Texto da resposta do modelo.
+        """
+
+    @abstractmethod
+    async def generate_with_functions(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool, functions: Optional[List[Callable]], final_prompt: Optional[str]) -> str:
+        """
+        Gera a resposta do modelo permitindo que ele solicite a execução das funções informadas.
+        :param functions: Funções Python disponíveis para o modelo.
+        :param final_prompt: Prompt de sistema usado na chamada feita após a execução das funções.
+        :return: Texto da resposta final do modelo.
+        """
+
+    async def agenerate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
+        """
+        Versão assíncrona do generate. Por padrão executa o generate em uma thread, sem bloquear o event loop.
+        """
+        return await asyncio.to_thread(self.generate, prompt_build, user_input, files, history, use_history)
+
+    async def async_generate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
+        return await self.agenerate(prompt_build, user_input, files, history, use_history)
+
+    async def stream(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> AsyncIterator[str]:
+        """
+        Gera a resposta do modelo em partes (chunks), conforme elas são recebidas.
+        Por padrão retorna a resposta completa em uma única parte.
+        """
+        yield await self.agenerate(prompt_build, user_input, files, history, use_history)
+
+    @staticmethod
+    def _iter_history_turns(history: Optional[Iterable[dict]], use_history: bool) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Percorre o histórico retornando, para cada interação, a mensagem do usuário e as respostas do agente.
+        :return: Iterador de tuplas (mensagem do usuário, respostas do agente).
+        """
+        if not history or not use_history:
+            return
+
+        for interaction in history:
+            if isinstance(interaction, Interaction):
+                yield interaction.user, interaction.agent
+            else:
+                yield interaction["interaction"]["user"], interaction["interaction"]["agent"]
+
+    def _convert_files(self, files: List[dict], convert: Callable[[Any, str], Any]) -> List[Any]:
+        """
+        Converte os arquivos da requisição em paralelo, registrando o relatório dos arquivos no consumo da interação atual (campo "attachments" do usage).
+        :param files: Arquivos da requisição.
+        :param convert: Função de conversão do mixin do modelo.
+        :return: Lista com os arquivos convertidos com sucesso, limitada a MAX_FILES_PER_MESSAGE.
+        """
+        # Registrando o tamanho original e o tamanho enviado de cada arquivo da requisição:
+        attachment_report = AttachmentReport()
+        token = current_attachment_report.set(attachment_report)
+        try:
+            with trace_span("files.convert", model_name=self.model_name, files=len(files)):
+                files_formated = convert_files_concurrently(convert, files)
+        finally:
+            current_attachment_report.reset(token)
+        record_attachments(attachment_report.items)
+
+        return [file for file in files_formated if file][:self.MAX_FILES_PER_MESSAGE]
+
+    @staticmethod
+    def _record_usage(start: float, input_tokens: Optional[int], output_tokens: Optional[int], cached_tokens: Optional[int] = 0) -> None:
+        """
+        Registra os tokens e a latência de uma chamada ao modelo na interação atual (ver TokenUsage).
+        :param start: Início da chamada (time.perf_counter()).
+        """
+        record_usage(input_tokens, output_tokens, cached_tokens, (time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    async def _execute_function(dict_functions: Dict[str, Callable], name: str, args: Dict[str, Any]) -> Any:
+        """
+        Executa uma função solicitada pelo modelo (síncrona ou assíncrona).
+        Erros durante a execução são retornados ao modelo como resultado da função.
+        :param dict_functions: Dicionário com o nome e a função.
+        :param name: Nome da função solicitada.
+        :param args: Argumentos da função.
+        :return: Resultado da função.
+        """
+        fn = dict_functions.get(name)
+        if fn is None:
+            raise Exception(f"[ERROR] - Função '{name}' não encontrada.")
+
+        with trace_span("tool.execute", tool_name=name) as span:
+            try:
+                if inspect.iscoroutinefunction(fn):
+                    return await fn(**args)
+                return fn(**args)
+            except Exception as e:
+                span.record_error(e)
+                return {"error": f"Ocorreu um erro durante a execução da função: {str(e)}"}
+
+    @staticmethod
+    async def _iterate_in_thread(create_iterator: Callable[[], Iterable[Any]]) -> AsyncIterator[Any]:
+        """
+        Consome um iterador bloqueante (ex: streaming das SDKs) em uma thread, repassando os itens ao event loop.
+        :param create_iterator: Função que cria o iterador (chamada dentro da thread).
+        :return: Iterador assíncrono com os itens do iterador original.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        cancelled = threading.Event()
+
+        def consume() -> None:
+            try:
+                for item in create_iterator():
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (finished, e))
+                return
+            loop.call_soon_threadsafe(queue.put_nowait, (finished, None))
+
+        loop.run_in_executor(None, consume)
+        try:
+            while True:
+                item, error = await queue.get()
+                if error is not None:
+                    raise error
+                if item is finished:
+                    break
+                yield item
+        finally:
+            # Caso o consumidor pare antes do fim, a thread é avisada para encerrar no próximo item:
+            cancelled.set()
@@ -0,0 +1,273 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from typing import AsyncIterator, Callable, Iterable, List, Optional
+
+from tyr_agent.models.base_model import BaseModel
+from tyr_agent.utils.tracing import trace_span
+
+# Verificação da resposta de um nível da cascata: retorna True quando a resposta pode ser usada.
+CascadeCheck = Callable[[str], bool]
+
+# Expressões que indicam baixa confiança do modelo na própria resposta:
+UNCERTAINTY_PHRASES = (
+    "não sei", "não tenho certeza", "não tenho informações", "não consigo responder", "não é possível responder",
+    "i don't know", "i'm not sure", "i am not sure", "i cannot answer", "i can't answer",
+)
+
+
+class CascadeTierStats:
+    """
+    Estatísticas de um nível da cascata: chamadas, respostas aceitas, escalonamentos, erros e latência.
+    """
+    __slots__ = ("model_name", "calls", "accepted", "escalated", "errors", "latency_ms")
+
+    def __init__(self, model_name: str):
+        self.model_name: str = model_name
+        self.calls: int = 0
+        self.accepted: int = 0
+        self.escalated: int = 0
+        self.errors: int = 0
+        self.latency_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "calls": self.calls,
+            "accepted": self.accepted,
+            "escalated": self.escalated,
+            "errors": self.errors,
+            "acceptance_rate": self.accepted / self.calls if self.calls else 0.0,
+            "latency_ms": self.latency_ms,
+            "avg_latency_ms": self.latency_ms / self.calls if self.calls else 0.0,
+        }
+
+
+class CascadeModel(BaseModel):
+    """
+    Modelo em cascata: responde primeiro com o modelo mais rápido/barato e só escala para o próximo modelo quando a
+    resposta não passa nas verificações (ex: JSON inválido, resposta curta ou com baixa confiança) ou a chamada falha.
+    No generate_with_functions, um nível que já executou alguma função nunca é escalado.
+    Pode ser usado em qualquer lugar que aceite um modelo (SimpleAgent, ComplexAgent e ManagerAgent).
+    """
+
+    def __init__(self, models: List[BaseModel], checks: Optional[List[CascadeCheck]] = None, model_name: Optional[str] = None):
+        """
+        :param models: Modelos da cascata, do mais rápido/barato para o mais forte. A resposta do último modelo é
+        sempre usada.
+        :param checks: Verificações aplicadas à resposta de cada nível (exceto o último). Por padrão, apenas rejeita
+        respostas vazias. Ver CascadeModel.min_length, CascadeModel.valid_json e CascadeModel.confident.
+        :param model_name: Nome do modelo, por padrão usa o nome dos modelos da cascata.
+        """
+        if not models:
+            raise ValueError("A cascata precisa de pelo menos um modelo.")
+
+        self.models: List[BaseModel] = list(models)
+        self.checks: List[CascadeCheck] = list(checks) if checks is not None else [self.min_length(1)]
+        self.model_name: str = model_name or "cascade(" + " -> ".join(model.model_name for model in self.models) + ")"
+
+        self.stats: List[CascadeTierStats] = [CascadeTierStats(model.model_name) for model in self.models]
+        self._lock = threading.Lock()
+
+    def generate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
+        for tier, model in enumerate(self.models):
+            start = time.perf_counter()
+            try:
+                with trace_span("cascade.tier", model_name=model.model_name, tier=tier):
+                    response = model.generate(prompt_build, user_input, files, history, use_history)
+            except Exception as e:
+                if self.__escalate_on_error(tier, start, e):
+                    continue
+                raise
+
+            if self.__accept(tier, start, response):
+                return response
+
+    async def agenerate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
+        for tier, model in enumerate(self.models):
+            start = time.perf_counter()
+            try:
+                with trace_span("cascade.tier", model_name=model.model_name, tier=tier):
+                    response = await model.agenerate(prompt_build, user_input, files, history, use_history)
+            except Exception as e:
+                if self.__escalate_on_error(tier, start, e):
+                    continue
+                raise
+
+            if self.__accept(tier, start, response):
+                return response
+
+    async def generate_with_functions(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool, functions: Optional[List[Callable]], final_prompt: Optional[str]) -> str:
+        """
+        Gera a resposta com funções, escalando como no generate enquanto nenhuma função foi executada.
+        As funções podem ter efeitos colaterais (ex: enviar um e-mail ou gravar um registro), então, após um nível
+        executar alguma função, a resposta dele é aceita (e um erro é propagado) sem escalar, evitando que o próximo
+        modelo execute as funções novamente.
+        """
+        for tier, model in enumerate(self.models):
+            executed: List[str] = []
+            tier_functions = [self.__track_execution(fn, executed) for fn in functions] if functions else functions
+            start = time.perf_counter()
+            try:
+                with trace_span("cascade.tier", model_name=model.model_name, tier=tier) as span:
+                    response = await model.generate_with_functions(prompt_build, user_input, files, history, use_history, tier_functions, final_prompt)
+                    span.set_attribute("executed_functions", len(executed))
+            except Exception as e:
+                if self.__escalate_on_error(tier, start, e, can_escalate=not executed):
+                    continue
+                raise
+
+            if self.__accept(tier, start, response, force=bool(executed)):
+                return response
+
+    async def stream(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> AsyncIterator[str]:
+        """
+        Streaming em cascata: as respostas dos níveis intermediários precisam estar completas para serem verificadas,
+        então são enviadas apenas após a verificação. O último nível é enviado conforme os trechos chegam.
+        """
+        for tier, model in enumerate(self.models[:-1]):
+            start = time.perf_counter()
+            chunks: List[str] = []
+            try:
+                with trace_span("cascade.tier", model_name=model.model_name, tier=tier):
+                    async for chunk in model.stream(prompt_build, user_input, files, history, use_history):
+                        chunks.append(chunk)
+            except Exception as e:
+                self.__escalate_on_error(tier, start, e)
+                continue
+
+            if self.__accept(tier, start, "".join(chunks)):
+                for chunk in chunks:
+                    yield chunk
+                return
+
+        tier = len(self.models) - 1
+        start = time.perf_counter()
+        try:
+            with trace_span("cascade.tier", model_name=self.models[tier].model_name, tier=tier):
+                async for chunk in self.models[tier].stream(prompt_build, user_input, files, history, use_history):
+                    yield chunk
+        except Exception as e:
+            self.__escalate_on_error(tier, start, e)
+            raise
+        self.__accept(tier, start, "")
+
+    def get_stats(self) -> List[dict]:
+        """
+        Pega as estatísticas de cada nível da cascata (chamadas, aceitas, escalonadas, erros e latência).
+        :return: Lista com as estatísticas, na ordem dos modelos.
+        """
+        with self._lock:
+            return [stats.to_dict() for stats in self.stats]
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = [CascadeTierStats(model.model_name) for model in self.models]
+
+    def __accept(self, tier: int, start: float, response: str, force: bool = False) -> bool:
+        """
+        Verifica a resposta de um nível e registra as estatísticas. A resposta do último nível é sempre aceita.
+        :param force: Aceita a resposta sem verificá-la (ex: o nível já executou funções).
+        """
+        is_last = tier == len(self.models) - 1
+        accepted = is_last or force or self.__passes_checks(response)
+
+        with self._lock:
+            stats = self.stats[tier]
+            stats.calls += 1
+            stats.latency_ms += (time.perf_counter() - start) * 1000
+            if accepted:
+                stats.accepted += 1
+            else:
+                stats.escalated += 1
+
+        return accepted
+
+    def __escalate_on_error(self, tier: int, start: float, error: Exception, can_escalate: bool = True) -> bool:
+        """
+        Registra o erro de um nível.
+        :param can_escalate: Define se o erro pode ser escalado (ex: False quando o nível já executou funções).
+        :return: True caso exista um próximo nível para escalar.
+        """
+        with self._lock:
+            stats = self.stats[tier]
+            stats.calls += 1
+            stats.errors += 1
+            stats.latency_ms += (time.perf_counter() - start) * 1000
+
+        escalate = can_escalate and tier < len(self.models) - 1
+        if escalate:
+            print(f"[ERROR] - Falha no modelo '{self.models[tier].model_name}' da cascata, escalando: {type(error).__name__}: {error}")
+        return escalate
+
+    @staticmethod
+    def __track_execution(fn: Callable, executed: List[str]) -> Callable:
+        """
+        Envolve a função registrando cada execução, mantendo o nome, a docstring e a assinatura (usados no schema das funções).
+        """
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                executed.append(fn.__name__)
+                return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            executed.append(fn.__name__)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    def __passes_checks(self, response: str) -> bool:
+        for check in self.checks:
+            try:
+                if not check(response):
+                    return False
+            except Exception as e:
+                print(f"[ERROR] - Falha ao verificar a resposta da cascata: {e}")
+                return False
+        return True
+
+    @staticmethod
+    def min_length(chars: int) -> CascadeCheck:
+        """
+        Rejeita respostas com menos caracteres que o informado (ignorando espaços nas pontas).
+        """
+        return lambda response: isinstance(response, str) and len(response.strip()) >= chars
+
+    @staticmethod
+    def max_length(chars: int) -> CascadeCheck:
+        """
+        Rejeita respostas com mais caracteres que o informado (ex: modelo que não seguiu o formato pedido).
+        """
+        return lambda response: isinstance(response, str) and len(response) <= chars
+
+    @staticmethod
+    def valid_json(required: bool = False) -> CascadeCheck:
+        """
+        Rejeita respostas em JSON inválido (inclusive dentro de um bloco ```json).
+        :param required: Caso True, rejeita também respostas que não são JSON. Caso False, apenas respostas que
+        parecem JSON (ex: roteamento do ManagerAgent, que pode responder com texto comum) são verificadas.
+        """
+        def check(response: str) -> bool:
+            text = response.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+            if not text.startswith(("{", "[")):
+                return not required
+            try:
+                json.loads(text)
+                return True
+            except json.JSONDecodeError:
+                return False
+
+        return check
+
+    @staticmethod
+    def confident(phrases: Optional[Iterable[str]] = None) -> CascadeCheck:
+        """
+        Heurística de confiança: rejeita respostas que contêm expressões de incerteza (ex: "não tenho certeza").
+        :param phrases: Expressões de incerteza, por padrão usa UNCERTAINTY_PHRASES.
+        """
+        lowered_phrases = [phrase.lower() for phrase in (phrases if phrases is not None else UNCERTAINTY_PHRASES)]
+        return lambda response: not any(phrase in response.lower() for phrase in lowered_phrases)
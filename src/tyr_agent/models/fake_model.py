@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+
+from tyr_agent.models.base_model import BaseModel
+
+
+class FakeModel(BaseModel):
+    """
+    Modelo determinístico e local, sem nenhuma chamada de rede.
+    Útil para testes e para medir o desempenho dos agentes, do storage e do ManagerAgent de forma offline.
+    """
+
+    def __init__(self, model_name: str = "fake-model", latency: float = 0.0, response: Optional[Union[str, Callable[[str], str]]] = None, output_tokens: int = 20, token_latency: float = 0.0, function_calls: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        :param model_name: Nome do modelo.
+        :param latency: Latência simulada (em segundos) de cada chamada ao modelo.
+        :param response: Resposta fixa, ou função que recebe a mensagem do usuário e retorna a resposta.
+        :param output_tokens: Quantidade de tokens da resposta padrão (quando response não é informado).
+        :param token_latency: Latência simulada (em segundos) entre os tokens no streaming.
+        :param function_calls: Funções "solicitadas" pelo modelo no generate_with_functions, no formato {nome: argumentos}.
+        """
+        self.model_name: str = model_name
+        self.latency: float = latency
+        self.response: Optional[Union[str, Callable[[str], str]]] = response
+        self.output_tokens: int = output_tokens
+        self.token_latency: float = token_latency
+        self.function_calls: Dict[str, Dict[str, Any]] = function_calls or {}
+
+        self.calls: int = 0
+        self.last_messages: List[dict] = []
+
+    def generate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
+        start = time.perf_counter()
+        input_tokens = self.__register_call(prompt_build, user_input, history, use_history)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.__respond(user_input, input_tokens, start)
+
+    async def agenerate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
+        start = time.perf_counter()
+        input_tokens = self.__register_call(prompt_build, user_input, history, use_history)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.__respond(user_input, input_tokens, start)
+
+    async def stream(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        input_tokens = self.__register_call(prompt_build, user_input, history, use_history)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        tokens = self.__build_response(user_input).split(" ")
+        for index, token in enumerate(tokens):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield token if index == 0 else f" {token}"
+
+        self._record_usage(start, input_tokens, len(tokens))
+
+    async def generate_with_functions(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool, functions: Optional[List[Callable]], final_prompt: Optional[str]) -> str:
+        start = time.perf_counter()
+        input_tokens = self.__register_call(prompt_build, user_input, history, use_history)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        dict_functions: Dict[str, Callable] = {fn.__name__: fn for fn in functions or []}
+        requested_calls = {name: args for name, args in self.function_calls.items() if name in dict_functions}
+
+        if not requested_calls:
+            return self.__respond(user_input, input_tokens, start)
+
+        results: Dict[str, Any] = {}
+        for name, args in requested_calls.items():
+            results[name] = await self._execute_function(dict_functions, name, args)
+
+        self._record_usage(start, input_tokens, len(requested_calls))
+
+        # Segunda chamada: resposta final com base no resultado das funções.
+        start = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        response = self.__build_response(user_input) + " " + " ".join(f"{name}={result}" for name, result in results.items())
+        self._record_usage(start, input_tokens + len(results), len(response.split(" ")))
+        return response
+
+    def __register_call(self, prompt_build: str, user_input: str, history: Optional[List[dict]], use_history: bool) -> int:
+        """
+        Registra a chamada e monta as mensagens.
+        :return: Quantidade estimada de tokens de entrada (uma palavra = um token).
+        """
+        self.calls += 1
+
+        # Montando as mensagens no mesmo formato dos modelos reais, para que o custo de montagem também seja medido:
+        messages: List[dict] = [{"role": "system", "content": prompt_build}]
+        for user_text, agent_texts in self._iter_history_turns(history, use_history):
+            messages.append({"role": "user", "content": user_text})
+            messages.extend({"role": "assistant", "content": agent_text} for agent_text in agent_texts)
+        messages.append({"role": "user", "content": user_input})
+
+        self.last_messages = messages
+        return sum(len(message["content"].split()) for message in messages)
+
+    def __respond(self, user_input: str, input_tokens: int, start: float) -> str:
+        response = self.__build_response(user_input)
+        self._record_usage(start, input_tokens, len(response.split(" ")))
+        return response
+
+    def __build_response(self, user_input: str) -> str:
+        if callable(self.response):
+            return self.response(user_input)
+        if self.response is not None:
+            return self.response
+
+        return " ".join(["resposta"] + [f"token{i}" for i in range(1, self.output_tokens)])
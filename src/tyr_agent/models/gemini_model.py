@@ -1,13 +1,26 @@
-from typing import List, Optional, Union, Callable, Dict, Any
-from google.genai import types
+from typing import List, Optional, Union, Callable, Dict, Any, AsyncIterator, Tuple
+from io import BytesIO
+from google.genai import errors, types
 from tyr_agent.mixins.gemini_file_mixins import GeminiFileMixin
+from tyr_agent.models.base_model import BaseModel
+from tyr_agent.utils.attachment_manager import AttachmentManager, UploadedFile
+from tyr_agent.utils.context_cache import CachedContext, ContextCacheManager
+from tyr_agent.utils.file_conversion_utils import convert_files_concurrently
+from tyr_agent.utils.image_utils import ImagePreprocessConfig
 from tyr_agent.core.ai_config import configure_gemini
-import json
-import inspect
+from tyr_agent.utils.tracing import trace_span
+import asyncio
+import time
 
 
-class GeminiModel(GeminiFileMixin):
-    def __init__(self, model_name: str, temperature: Union[int, float] = 0.4, max_tokens: int = 600, api_key: Optional[str] = None):
+class GeminiModel(BaseModel, GeminiFileMixin):
+    # Tempo de vida dos arquivos na Gemini Files API (48 horas):
+    FILES_API_TTL = 48 * 60 * 60
+
+    # Erros retornados pelo Gemini quando o conteúdo em cache expirou ou foi removido:
+    CACHE_MISSING_CODES = (400, 403, 404)
+
+    def __init__(self, model_name: str, temperature: Union[int, float] = 0.4, max_tokens: int = 600, api_key: Optional[str] = None, image_preprocessing: Optional[ImagePreprocessConfig] = None, use_files_api: bool = False, attachment_manager: Optional[AttachmentManager] = None, pinned_files: Optional[List[dict]] = None, use_context_cache: bool = False, context_cache: Optional[ContextCacheManager] = None):
         self.client = configure_gemini(api_key)
 
         self.model_name = model_name
@@ -15,42 +28,80 @@ class GeminiModel(GeminiFileMixin):
         self.temperature = temperature
         self.max_tokens = max_tokens
 
+        self.image_preprocessing: Optional[ImagePreprocessConfig] = image_preprocessing
+
+        # Arquivos enviados uma única vez via Files API e referenciados nas próximas requisições:
+        self.attachment_manager: Optional[AttachmentManager] = attachment_manager
+        if self.attachment_manager is None and use_files_api:
+            self.attachment_manager = AttachmentManager(self.__upload_file, default_ttl=self.FILES_API_TTL)
+
+        # Arquivos de referência enviados em todas as chamadas, antes do histórico:
+        self.pinned_files: List[dict] = pinned_files or []
+
+        # Prompt de sistema + arquivos fixados mantidos em cache no Gemini (cachedContents), sem reenviá-los a cada chamada:
+        self.context_cache: Optional[ContextCacheManager] = context_cache
+        if self.context_cache is None and use_context_cache:
+            self.context_cache = ContextCacheManager(self.__create_cached_content, self.__refresh_cached_content, self.__delete_cached_content)
+
     def generate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
         messages = self.__create_messages(user_input, files, history, use_history)
+        cache_key, cached = self.__get_cached_context(prompt_build)
 
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=messages,
-            config=types.GenerateContentConfig(
-                system_instruction=prompt_build,
-                max_output_tokens=self.max_tokens,
-                temperature=self.temperature,
-            )
-        )
+        try:
+            response = self.__generate_content(prompt_build, messages, cached)
+        except errors.ClientError as e:
+            if cached is None or e.code not in self.CACHE_MISSING_CODES:
+                raise
+
+            # O conteúdo em cache não existe mais no Gemini (expirado ou removido), enviando o prompt completo:
+            self.context_cache.invalidate(cache_key)
+            response = self.__generate_content(prompt_build, messages, None)
 
         return response.text.strip()
 
-    async def async_generate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
-        messages = self.__create_messages(user_input, files, history, use_history)
+    async def stream(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> AsyncIterator[str]:
+        messages = await asyncio.to_thread(self.__create_messages, user_input, files, history, use_history)
+        cache_key, cached = await asyncio.to_thread(self.__get_cached_context, prompt_build)
 
-        final_response: str = ""
-        for chunk in self.client.models.generate_content_stream(
+        while True:
+            contents = messages if cached is not None else await asyncio.to_thread(self.__with_pinned_files, messages)
+            config = self.__generation_config(prompt_build, cached)
+
+            start = time.perf_counter()
+            chunks = self._iterate_in_thread(lambda contents=contents, config=config: self.client.models.generate_content_stream(
                 model=self.model_name,
-                contents=messages,
-                config=types.GenerateContentConfig(
-                    system_instruction=prompt_build,
-                    max_output_tokens=self.max_tokens,
-                    temperature=self.temperature,
-                )
-            ):
-            final_response += chunk.text
+                contents=contents,
+                config=config
+            ))
 
-        return final_response.strip()
+            last_chunk = None
+            try:
+                async for chunk in chunks:
+                    last_chunk = chunk
+                    if chunk.text:
+                        yield chunk.text
+            except errors.ClientError as e:
+                if last_chunk is not None or cached is None or e.code not in self.CACHE_MISSING_CODES:
+                    raise
+
+                # O conteúdo em cache não existe mais no Gemini (expirado ou removido), enviando o prompt completo:
+                self.context_cache.invalidate(cache_key)
+                cached = None
+                continue
+
+            # O consumo total da resposta é informado no último chunk:
+            if last_chunk is not None:
+                self.__record_usage(last_chunk, start)
+            return
 
     async def generate_with_functions(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool, functions: Optional[List[Callable]], final_prompt: Optional[str]):
-        messages = self.__create_messages(user_input, files, history, use_history)
+        # As ferramentas não podem ser enviadas junto de um conteúdo em cache, então o prompt e os arquivos fixados são enviados:
+        messages = await asyncio.to_thread(self.__create_messages, user_input, files, history, use_history)
+        messages = await asyncio.to_thread(self.__with_pinned_files, messages)
 
-        response = self.client.models.generate_content(
+        start = time.perf_counter()
+        response = await asyncio.to_thread(
+            self.client.models.generate_content,
             model=self.model_name,
             contents=messages,
             config=types.GenerateContentConfig(
@@ -61,6 +112,7 @@ class GeminiModel(GeminiFileMixin):
                 automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
             ),
         )
+        self.__record_usage(response, start)
 
         # Pegando as funções chamadas pelo modelo:
         calls = response.function_calls
@@ -72,7 +124,9 @@ class GeminiModel(GeminiFileMixin):
         tool_content = await self.__execute_functions(calls, functions)
 
         # Parte 5 - Segunda chamada: modelo continua raciocínio com base na resposta da função
-        final_response = self.client.models.generate_content(
+        start = time.perf_counter()
+        final_response = await asyncio.to_thread(
+            self.client.models.generate_content,
             model=self.model_name,
             contents=[
                 *messages,
@@ -85,47 +139,137 @@ class GeminiModel(GeminiFileMixin):
                 temperature=self.temperature
             ),
         )
+        self.__record_usage(final_response, start)
 
         return final_response.text.strip()
 
+    def __generate_content(self, prompt_build: str, messages: List[Any], cached: Optional[CachedContext]):
+        start = time.perf_counter()
+        response = self.client.models.generate_content(
+            model=self.model_name,
+            contents=messages if cached is not None else self.__with_pinned_files(messages),
+            config=self.__generation_config(prompt_build, cached)
+        )
+        self.__record_usage(response, start)
+
+        return response
+
+    def __generation_config(self, prompt_build: str, cached: Optional[CachedContext]) -> types.GenerateContentConfig:
+        if cached is not None:
+            # O prompt de sistema e os arquivos fixados já estão no conteúdo em cache:
+            return types.GenerateContentConfig(
+                cached_content=cached.name,
+                max_output_tokens=self.max_tokens,
+                temperature=self.temperature,
+            )
+
+        return types.GenerateContentConfig(
+            system_instruction=prompt_build,
+            max_output_tokens=self.max_tokens,
+            temperature=self.temperature,
+        )
+
+    def __get_cached_context(self, prompt_build: str) -> Tuple[Optional[str], Optional[CachedContext]]:
+        if self.context_cache is None:
+            return None, None
+
+        file_keys = [self.file_cache.make_key(file["file"], f"gemini-pinned:{file['file_name']}") for file in self.pinned_files]
+        cache_key = ContextCacheManager.make_key(self.model_name, prompt_build, file_keys)
+
+        return cache_key, self.context_cache.get_or_create(cache_key, lambda: (prompt_build, self.__convert_pinned_files()))
+
+    def __with_pinned_files(self, messages: List[Any]) -> List[Any]:
+        if not self.pinned_files:
+            return messages
+
+        pinned_parts = self.__convert_pinned_files()
+        if not pinned_parts:
+            return messages
+
+        return [types.Content(role="user", parts=pinned_parts), *messages]
+
+    def __convert_pinned_files(self) -> List[types.Part]:
+        # As conversões ficam no cache de arquivos do mixin, então os arquivos fixados são lidos uma única vez:
+        return [part for part in convert_files_concurrently(self.convert_item_to_gemini_model, self.pinned_files) if part]
+
+    def __create_cached_content(self, cache_key: str, system_instruction: str, pinned_parts: List[types.Part], ttl: float) -> CachedContext:
+        with trace_span("context_cache.create", model_name=self.model_name, pinned_files=len(pinned_parts)):
+            cached_content = self.client.caches.create(
+                model=self.model_name,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"tyr-agent-{cache_key[:16]}",
+                    system_instruction=system_instruction,
+                    contents=[types.Content(role="user", parts=pinned_parts)] if pinned_parts else None,
+                    ttl=f"{int(ttl)}s",
+                )
+            )
+
+        return self.__to_cached_context(cached_content)
+
+    def __refresh_cached_content(self, name: str, ttl: float) -> CachedContext:
+        cached_content = self.client.caches.update(name=name, config=types.UpdateCachedContentConfig(ttl=f"{int(ttl)}s"))
+        return self.__to_cached_context(cached_content)
+
+    def __delete_cached_content(self, name: str) -> None:
+        self.client.caches.delete(name=name)
+
+    @staticmethod
+    def __to_cached_context(cached_content) -> CachedContext:
+        expires_at = cached_content.expire_time.timestamp() if cached_content.expire_time else None
+        return CachedContext(cached_content.name, expires_at)
+
+    def __record_usage(self, response, start: float) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            self._record_usage(start, 0, 0)
+            return
+
+        self._record_usage(start, usage.prompt_token_count, usage.candidates_token_count, usage.cached_content_token_count)
+
     def __create_messages(self, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> List[Any]:
         messages = self.__build_messages(user_input, history, use_history)
 
         if files:
-            files_formated = [self.convert_item_to_gemini_model(item["file"], item["file_name"]) for item in files]
-            files_valid = [file for file in files_formated if file]
+            convert_item = self.upload_item_to_gemini if self.attachment_manager is not None else self.convert_item_to_gemini_model
+            files_valid = self._convert_files(files, convert_item)
 
             # Adicionando os arquivos identificados dentro do parts da pergunta atual do usuário:
             if files_valid:
-                messages[-1].parts.extend(files_valid[:10])
+                messages[-1].parts.extend(files_valid)
 
         if not messages:
             raise Exception("[ERROR] - Erro ao gerar o prompt do GEMINI.")
 
         return messages
 
+    def __upload_file(self, bytes_file: bytes, file_name: str, mime_type: str) -> UploadedFile:
+        uploaded_file = self.client.files.upload(
+            file=BytesIO(bytes_file),
+            config=types.UploadFileConfig(mime_type=mime_type, display_name=file_name)
+        )
+
+        expires_at = uploaded_file.expiration_time.timestamp() if uploaded_file.expiration_time else None
+        return UploadedFile(uploaded_file.uri, uploaded_file.mime_type or mime_type, expires_at)
+
     def __build_messages(self, user_input: str, history: Optional[List[dict]], use_history: bool):
         messages: List = []
 
-        if history and use_history:
-            for interaction in history:
-                user_text = interaction["interaction"]["user"]
+        for user_text, agent_texts in self._iter_history_turns(history, use_history):
+            messages.append(
+                types.Content(
+                    role="user",
+                    parts=[types.Part.from_text(text=user_text)]
+                )
+            )
 
+            for agent_text in agent_texts:
                 messages.append(
                     types.Content(
-                        role="user",
-                        parts=[types.Part.from_text(text=user_text)]
+                        role="model",
+                        parts=[types.Part.from_text(text=agent_text)]
                     )
                 )
 
-                for agent_text in interaction["interaction"]["agent"]:
-                    messages.append(
-                        types.Content(
-                            role="model",
-                            parts=[types.Part.from_text(text=agent_text)]
-                        )
-                    )
-
         messages.append(
             types.Content(
                 role="user",
@@ -142,17 +286,7 @@ class GeminiModel(GeminiFileMixin):
         # Parte 2:
         tool_parts: list = []
         for call in calls:
-            fn = dict_functions.get(call.name)
-            if fn is None:
-                raise Exception(f"[ERROR] - Função '{call.name}' não encontrada.")
-
-            try:
-                if inspect.iscoroutinefunction(fn):
-                    result = await fn(**call.args)
-                else:
-                    result = fn(**call.args)
-            except Exception as e:
-                result = {"error": f"Ocorreu um erro durante a execução da função: {str(e)}"}
+            result = await self._execute_function(dict_functions, call.name, call.args or {})
 
             part = types.Part.from_function_response(
                 name=call.name,
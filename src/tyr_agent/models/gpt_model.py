@@ -1,15 +1,20 @@
-from openai import OpenAI
-from typing import Optional, Union, Callable, List, Dict, Any
+from openai import OpenAI, BadRequestError, NotFoundError
+from typing import Optional, Union, Callable, List, Dict, Any, AsyncIterator
 from openai.types.responses import ResponseTextConfigParam
+from tyr_agent.models.base_model import BaseModel
+from tyr_agent.utils.attachment_manager import AttachmentManager, UploadedFile
+from tyr_agent.utils.image_utils import ImagePreprocessConfig
+from tyr_agent.utils.response_chain import ChainRequest, ResponseChainStore, current_conversation_key, current_history_window
 from tyr_agent.core.ai_config import configure_gpt
 from tyr_agent.mixins.gpt_file_mixins import GPTFileMixin
 from tyr_agent.utils.gpt_function_format_utils import to_openai_tool
 import json
-import inspect
+import asyncio
+import time
 
 
-class GPTModel(GPTFileMixin):
-    def __init__(self, model_name: str, temperature: Union[int, float] = 0.4, max_tokens: int = 600, effort: str = "medium", response_template: Optional[ResponseTextConfigParam] = None, api_key: Optional[str] = None):
+class GPTModel(BaseModel, GPTFileMixin):
+    def __init__(self, model_name: str, temperature: Union[int, float] = 0.4, max_tokens: int = 600, effort: str = "medium", response_template: Optional[ResponseTextConfigParam] = None, api_key: Optional[str] = None, image_preprocessing: Optional[ImagePreprocessConfig] = None, use_files_api: bool = False, attachment_manager: Optional[AttachmentManager] = None, use_previous_response_id: bool = False, max_chain_turns: int = 50):
         self.client: OpenAI = configure_gpt(api_key)
 
         if model_name == "economy":
@@ -27,32 +32,78 @@ class GPTModel(GPTFileMixin):
         self.effort = effort
         self.response_template = response_template
 
+        self.image_preprocessing: Optional[ImagePreprocessConfig] = image_preprocessing
+
+        # Arquivos enviados uma única vez via Files API e referenciados nas próximas requisições:
+        self.attachment_manager: Optional[AttachmentManager] = attachment_manager
+        if self.attachment_manager is None and use_files_api:
+            self.attachment_manager = AttachmentManager(self.__upload_file)
+
+        # Conversa mantida no servidor (previous_response_id): apenas a nova mensagem do usuário é enviada a cada chamada:
+        self.response_chains: Optional[ResponseChainStore] = ResponseChainStore(max_chain_turns) if use_previous_response_id else None
+
     def generate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
-        messages = self.__create_messages(prompt_build, user_input, files, history, use_history)
+        chain = self.__begin_chain(prompt_build, history, use_history)
 
-        response = self.client.responses.create(
-            model=self.model_name,
-            reasoning={"effort": self.effort},
-            max_output_tokens=self.max_tokens,
-            input=messages,
-            text=self.response_template
-        )
+        try:
+            response = self.__create_response(chain, prompt_build, user_input, files, history, use_history)
+        except (NotFoundError, BadRequestError):
+            if chain is None or chain.previous_response_id is None:
+                raise
 
-        return response.output_text
+            # A resposta anterior não está mais disponível no servidor, reenviando o histórico completo:
+            chain = self.__restart_chain(chain, prompt_build, history, use_history)
+            response = self.__create_response(chain, prompt_build, user_input, files, history, use_history)
 
+        self.__commit_chain(chain, user_input, response)
+        return response.output_text
 
-    async def async_generate(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> str:
-        pass
+    async def stream(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> AsyncIterator[str]:
+        chain = self.__begin_chain(prompt_build, history, use_history)
+
+        while True:
+            messages = await asyncio.to_thread(self.__chain_messages, chain, prompt_build, user_input, files, history, use_history)
+            options = self.__chain_options(chain)
+
+            start = time.perf_counter()
+            events = self._iterate_in_thread(lambda messages=messages, options=options: self.client.responses.create(
+                model=self.model_name,
+                reasoning={"effort": self.effort},
+                max_output_tokens=self.max_tokens,
+                input=messages,
+                text=self.response_template,
+                stream=True,
+                **options
+            ))
+
+            started = False
+            try:
+                async for event in events:
+                    if event.type == "response.output_text.delta":
+                        started = True
+                        yield event.delta
+                    elif event.type == "response.completed":
+                        self.__record_usage(event.response, start)
+                        self.__commit_chain(chain, user_input, event.response)
+                return
+            except (NotFoundError, BadRequestError):
+                if started or chain is None or chain.previous_response_id is None:
+                    raise
+
+                # A resposta anterior não está mais disponível no servidor, reenviando o histórico completo:
+                chain = self.__restart_chain(chain, prompt_build, history, use_history)
 
     async def generate_with_functions(self, prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool, functions: Optional[List[Callable]], final_prompt: Optional[str]):
-        messages = self.__create_messages(prompt_build, user_input, files, history, use_history)
+        messages = await asyncio.to_thread(self.__create_messages, prompt_build, user_input, files, history, use_history)
 
         # Criando um array com as funções no formato que o GPT precisa:
         tools = []
         for f in functions:
             tools.append(to_openai_tool(f, True))
 
-        response = self.client.responses.create(
+        start = time.perf_counter()
+        response = await asyncio.to_thread(
+            self.client.responses.create,
             model=self.model_name,
             reasoning={"effort": self.effort},
             max_output_tokens=self.max_tokens,
@@ -60,6 +111,7 @@ class GPTModel(GPTFileMixin):
             tools=tools if tools else None,
             text=self.response_template
         )
+        self.__record_usage(response, start)
 
         # Pegando as funções chamadas pelo modelo:
         calls = response.output
@@ -75,24 +127,84 @@ class GPTModel(GPTFileMixin):
             new_messages[0]["content"] = final_prompt
 
         # Parte 5 - Segunda chamada: modelo continua raciocínio com base na resposta da função
-        response_answer_functions = self.client.responses.create(
+        start = time.perf_counter()
+        response_answer_functions = await asyncio.to_thread(
+            self.client.responses.create,
             model=self.model_name,
             reasoning={"effort": self.effort},
             max_output_tokens=self.max_tokens,
             input=new_messages,
             text=self.response_template
         )
+        self.__record_usage(response_answer_functions, start)
 
         return response_answer_functions.output_text
 
+    def __create_response(self, chain: Optional[ChainRequest], prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool):
+        messages = self.__chain_messages(chain, prompt_build, user_input, files, history, use_history)
+
+        start = time.perf_counter()
+        response = self.client.responses.create(
+            model=self.model_name,
+            reasoning={"effort": self.effort},
+            max_output_tokens=self.max_tokens,
+            input=messages,
+            text=self.response_template,
+            **self.__chain_options(chain)
+        )
+        self.__record_usage(response, start)
+
+        return response
+
+    def __begin_chain(self, prompt_build: str, history: Optional[List[dict]], use_history: bool) -> Optional[ChainRequest]:
+        key = current_conversation_key.get()
+        if self.response_chains is None or key is None or not use_history:
+            return None
+
+        return self.response_chains.begin(key, prompt_build, self._iter_history_turns(history, use_history), current_history_window.get())
+
+    def __restart_chain(self, chain: ChainRequest, prompt_build: str, history: Optional[List[dict]], use_history: bool) -> Optional[ChainRequest]:
+        self.response_chains.invalidate(chain.key)
+        return self.__begin_chain(prompt_build, history, use_history)
+
+    def __commit_chain(self, chain: Optional[ChainRequest], user_input: str, response) -> None:
+        response_id = getattr(response, "id", None)
+        if chain is not None and response_id:
+            self.response_chains.commit(chain, user_input, response_id, response.output_text)
+
+    def __chain_messages(self, chain: Optional[ChainRequest], prompt_build: str, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> List[Any]:
+        if chain is not None and chain.previous_response_id is not None:
+            # O prompt e o histórico já estão na conversa do servidor, enviando apenas a pergunta atual (com os arquivos):
+            return self.__create_messages(prompt_build, user_input, files, None, False)[-1:]
+
+        return self.__create_messages(prompt_build, user_input, files, history, use_history)
+
+    @staticmethod
+    def __chain_options(chain: Optional[ChainRequest]) -> Dict[str, Any]:
+        if chain is not None and chain.previous_response_id is not None:
+            return {"previous_response_id": chain.previous_response_id}
+        return {}
+
+    def __record_usage(self, response, start: float) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            self._record_usage(start, 0, 0)
+            return
+
+        input_details = getattr(usage, "input_tokens_details", None)
+        self._record_usage(start, usage.input_tokens, usage.output_tokens, getattr(input_details, "cached_tokens", 0))
+
     def __create_messages(self, prompt_build, user_input: str, files: Optional[List[dict]], history: Optional[List[dict]], use_history: bool) -> List[Any]:
         messages = self.__build_messages(prompt_build, user_input, history, use_history)
 
         if files:
-            files_formated = [self.convert_item_to_gpt_model(item["file"], item["file_name"]) for item in files]
+            convert_item = self.upload_item_to_gpt if self.attachment_manager is not None else self.convert_item_to_gpt_model
+            files_formated = self._convert_files(files, convert_item)
+
             files_valid = []
             for file in files_formated:
-                if file is None:
+                if isinstance(file, dict):  # -> Arquivo já enviado via Files API.
+                    files_valid.append(file)
                     continue
 
                 if file[0].startswith("data:application/pdf"):
@@ -107,7 +219,7 @@ class GPTModel(GPTFileMixin):
                     "role": "user",
                     "content": [
                         {"type": "input_text", "text": user_input},
-                        *files_valid[:10]
+                        *files_valid
                     ]
                 }
 
@@ -116,17 +228,20 @@ class GPTModel(GPTFileMixin):
 
         return messages
 
+    def __upload_file(self, bytes_file: bytes, file_name: str, mime_type: str) -> UploadedFile:
+        purpose = "user_data" if mime_type == "application/pdf" else "vision"
+        uploaded_file = self.client.files.create(file=(file_name, bytes_file, mime_type), purpose=purpose)
+
+        return UploadedFile(uploaded_file.id, mime_type, getattr(uploaded_file, "expires_at", None))
+
     def __build_messages(self, prompt_build: str, user_input: str, history: Optional[List[dict]], use_history: bool) -> List[Any]:
         messages: List[dict] = [{"role": "system", "content": prompt_build}]
 
-        if history and use_history:
-            for interaction in history:
-                user_text = interaction["interaction"]["user"]
-
-                messages.append({"role": "user", "content": user_text})
+        for user_text, agent_texts in self._iter_history_turns(history, use_history):
+            messages.append({"role": "user", "content": user_text})
 
-                for agent_text in interaction["interaction"]["agent"]:
-                    messages.append({"role": "assistant", "content": agent_text})
+            for agent_text in agent_texts:
+                messages.append({"role": "assistant", "content": agent_text})
 
         messages.append({"role": "user", "content": user_input})
 
@@ -142,17 +257,12 @@ class GPTModel(GPTFileMixin):
         # Parte 3: Executando as funções solicitadas pelo GPT:
         for call in calls:
             if call.type == "function_call":
-                fn = dict_functions.get(call.name)
-                if fn is None:
-                    raise Exception(f"[ERROR] - Função '{call.name}' não encontrada.")
                 try:
                     args = json.loads(call.arguments)
-                    if inspect.iscoroutinefunction(fn):
-                        result = await fn(**args)
-                    else:
-                        result = fn(**args)
-                except Exception as e:
+                except json.JSONDecodeError as e:
                     result = {"error": f"Ocorreu um erro durante a execução da função: {str(e)}"}
+                else:
+                    result = await self._execute_function(dict_functions, call.name, args)
 
                 # Parte 4: Adicionando a resposta da função executada ao histórico de mensagens:
                 messages.append({
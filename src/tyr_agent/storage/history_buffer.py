@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from collections.abc import Sequence
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Union
+
+from tyr_agent.entities.interaction import Interaction
+
+
+class HistoryBuffer(Sequence):
+    """
+    Histórico em memória de um agente (ou de uma sessão), limitado às N interações mais recentes.
+    As interações ficam indexadas pelo id, permitindo inserir, buscar, avaliar e remover em O(1).
+    Interações recebidas como dicionário são convertidas para Interaction (registro compacto).
+    Pode ser usado como uma lista (somente leitura) pelos modelos e pelos métodos de score.
+    """
+
+    def __init__(self, maxlen: Optional[int] = None, interactions: Iterable[Union[dict, Interaction]] = ()):
+        """
+        :param maxlen: Quantidade máxima de interações mantidas (as mais antigas são descartadas), None para ilimitado.
+        :param interactions: Interações iniciais, da mais antiga para a mais recente.
+        """
+        self.maxlen: Optional[int] = maxlen
+        self._entries: "OrderedDict[Union[bytes, str], Interaction]" = OrderedDict()
+        self.extend(interactions)
+
+    def append(self, interaction: Union[dict, Interaction]) -> None:
+        interaction = Interaction.from_dict(interaction)
+        key = interaction.uid
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = interaction
+
+        if self.maxlen is not None:
+            while len(self._entries) > self.maxlen:
+                self._entries.popitem(last=False)  # -> Descartando a interação mais antiga.
+
+    def extend(self, interactions: Iterable[Union[dict, Interaction]]) -> None:
+        for interaction in interactions:
+            self.append(interaction)
+
+    def get(self, interaction_id: str) -> Optional[Interaction]:
+        return self._entries.get(Interaction.parse_id(interaction_id))
+
+    def rate(self, interaction_id: str, score: Union[int, float]) -> Optional[Interaction]:
+        """
+        Define o score de uma interação.
+        :param interaction_id: ID da interação.
+        :param score: Nota da interação.
+        :return: A interação avaliada, ou None caso ela não esteja no histórico.
+        """
+        interaction = self.get(interaction_id)
+        if interaction is not None:
+            interaction.score = score
+        return interaction
+
+    def remove(self, interaction_id: str) -> bool:
+        return self._entries.pop(Interaction.parse_id(interaction_id), None) is not None
+
+    def keep_only(self, predicate) -> None:
+        """
+        Remove as interações que não atendem ao filtro informado (ex: score abaixo da média do agente).
+        :param predicate: Função que recebe a interação e retorna se ela deve continuar no histórico.
+        :return: None
+        """
+        for key in [key for key, interaction in self._entries.items() if not predicate(interaction)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def to_list(self) -> List[Interaction]:
+        return list(self._entries.values())
+
+    def to_dicts(self) -> List[dict]:
+        """
+        Converte o histórico para o formato JSON (lista de dicionários).
+        """
+        return [interaction.to_dict() for interaction in self.to_list()]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Interaction]:
+        # Iterando sobre uma cópia: o histórico pode receber novas interações enquanto um modelo monta as mensagens em outra thread.
+        return iter(self.to_list())
+
+    def __reversed__(self) -> Iterator[Interaction]:
+        return iter(list(reversed(self._entries.values())))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+
+        size = len(self._entries)
+        position = index + size if index < 0 else index
+        if not 0 <= position < size:
+            raise IndexError("HistoryBuffer index out of range")
+
+        # Percorre o OrderedDict a partir da ponta mais próxima, sem copiar o histórico (ex: history[-1] é O(1)):
+        if position < size - position:
+            return next(islice(iter(self._entries.values()), position, None))
+        return next(islice(reversed(self._entries.values()), size - 1 - position, None))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, HistoryBuffer):
+            return self.to_list() == other.to_list()
+        if isinstance(other, list):
+            return self.to_dicts() == [Interaction.from_dict(item).to_dict() for item in other]
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HistoryBuffer(maxlen={self.maxlen}, interactions={len(self._entries)})"
@@ -1,82 +1,283 @@
-import json
 import os
-from typing import List
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from tyr_agent.storage.retention import RetentionPolicy
+from tyr_agent.storage.serializers import HistorySerializer, detect_serializer, get_serializer, migrate_history
+from tyr_agent.utils.tracing import trace_span
 
 
 class InteractionHistory:
-    def __init__(self, filename: str = "conversation_history.json"):
+    def __init__(self, filename: str = "conversation_history.json", serializer: Union[str, HistorySerializer, None] = None, retention: Optional[RetentionPolicy] = None):
+        """
+        :param filename: Arquivo do histórico.
+        :param serializer: Formato de gravação do arquivo ("json", "jsonl", "jsonl.gz", "jsonl.zst" ou "msgpack"), por padrão
+        usa JSON. Na leitura, o formato é identificado automaticamente, e o arquivo é convertido para o formato informado
+        na próxima gravação completa (ou via migrate).
+        :param retention: Política de retenção (quantidade máxima, idade máxima e score mínimo das interações), aplicada
+        a cada gravação do agente e na limpeza periódica (prune / start_pruning). None para manter todas as interações.
+        """
         self.filename = filename
+        self.serializer: HistorySerializer = get_serializer(serializer)
+        self.retention: Optional[RetentionPolicy] = retention
+
+        # Gravações (inclusive da limpeza periódica, em outra thread) são feitas uma de cada vez:
+        self._lock = threading.RLock()
+        self._appended_since_prune: int = 0
+        self._pruning_stop: Optional[threading.Event] = None
+
         if not os.path.exists(self.filename):
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump({}, f, ensure_ascii=False)
+            self.serializer.write(self.filename, {})
 
     def save_history(self, agent_name: str, history: dict) -> None:
-        try:
-            data = self.load_all()
+        with trace_span("storage.save_history", agent_name=agent_name, filename=self.filename) as span:
+            try:
+                self._append(agent_name, [history])
+            except Exception as e:
+                span.record_error(e)
+                print(f"[ERROR] - Erro ao salvar histórico: {e}")
 
-            if data.get(agent_name, False):
-                data[agent_name].append(history)
-            else:
-                data[agent_name] = [history]
+    def save_many_history(self, agent_name: str, histories: List[dict]) -> None:
+        """
+        Salva várias interações de um agente com uma única leitura e uma única escrita do arquivo.
+        :param agent_name: Nome do agente dono das interações.
+        :param histories: Interações a serem salvas.
+        :return: None
+        """
+        if not histories:
+            return
 
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"[ERROR] - Erro ao salvar histórico: {e}")
+        with trace_span("storage.save_many_history", agent_name=agent_name, filename=self.filename, interactions=len(histories)) as span:
+            try:
+                self._append(agent_name, histories)
+            except Exception as e:
+                span.record_error(e)
+                print(f"[ERROR] - Erro ao salvar histórico: {e}")
 
     def load_history(self, agent_name: str) -> List[dict]:
-        data = self.load_all()
-        return data.get(agent_name, [])
+        return list(self.iter_history(agent_name))
+
+    def load_recent_history(self, agent_name: str, limit: int, predicate: Optional[Callable[[dict], bool]] = None) -> List[dict]:
+        """
+        Carrega apenas as últimas interações de um agente, sem manter o histórico completo em memória.
+        :param agent_name: Nome do agente (ou chave da sessão).
+        :param limit: Quantidade máxima de interações retornadas (as mais recentes).
+        :param predicate: Filtro das interações (ex: score acima da média), aplicado antes do limite.
+        :return: Interações mais recentes, da mais antiga para a mais recente.
+        """
+        with trace_span("storage.load_recent_history", agent_name=agent_name, filename=self.filename, limit=limit) as span:
+            if limit <= 0:
+                return []
+
+            serializer = detect_serializer(self.filename)
+            if serializer is None:
+                return []
+
+            reverse_interactions = serializer.iter_recent(self.filename, agent_name)
+            span.set_attribute("indexed", reverse_interactions is not None)
+
+            if reverse_interactions is not None:
+                # Lendo o arquivo de trás para frente, apenas até encontrar as N interações mais recentes:
+                recent = []
+                for interaction in reverse_interactions:
+                    if predicate is None or predicate(interaction):
+                        recent.append(interaction)
+                        if len(recent) >= limit:
+                            break
+                return recent[::-1]
+
+            recent = deque(maxlen=limit)
+            for interaction in self.iter_history(agent_name):
+                if predicate is None or predicate(interaction):
+                    recent.append(interaction)
+            return list(recent)
+
+    def iter_history(self, agent_name: Optional[str] = None) -> Iterator[dict]:
+        """
+        Percorre as interações salvas lendo o arquivo de forma incremental (ex: análises sobre todo o histórico).
+        :param agent_name: Nome do agente (ou chave da sessão), None para percorrer as interações de todos os agentes.
+        :return: Iterador das interações, na ordem em que foram salvas.
+        """
+        for _, interaction in self.iter_all(agent_name):
+            yield interaction
+
+    def iter_all(self, agent_name: Optional[str] = None) -> Iterator[Tuple[str, dict]]:
+        """
+        Percorre as interações salvas de todos os agentes, sem carregar o arquivo inteiro em memória.
+        :param agent_name: Caso informado, retorna apenas as interações desse agente (ou sessão).
+        :return: Iterador de tuplas (nome do agente, interação).
+        """
+        serializer = detect_serializer(self.filename)
+        if serializer is not None:
+            yield from serializer.iter_items(self.filename, {agent_name} if agent_name is not None else None)
 
     def load_all(self) -> dict:
-        try:
-            with open(self.filename, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+        with trace_span("storage.load_all", filename=self.filename):
+            serializer = detect_serializer(self.filename)
+            return serializer.read_all(self.filename) if serializer is not None else {}
+
+    def migrate(self, serializer: Union[str, HistorySerializer]) -> None:
+        """
+        Converte o arquivo do histórico para outro formato, que passa a ser usado nas próximas gravações.
+        :param serializer: Novo formato (nome ou instância).
+        :return: None
+        """
+        with trace_span("storage.migrate", filename=self.filename) as span, self._lock:
+            self.serializer = get_serializer(serializer)
+            span.set_attribute("serializer", self.serializer.name)
+            migrate_history(self.filename, self.serializer)
+
+    def prune(self) -> int:
+        """
+        Aplica a política de retenção em todas as interações salvas (de todos os agentes e sessões).
+        :return: Quantidade de interações removidas.
+        """
+        if self.retention is None or not self.retention.is_active:
+            return 0
+
+        with trace_span("storage.prune", filename=self.filename) as span, self._lock:
+            data = self.load_all()
+            removed = self._apply_retention(data, list(data))
+            if removed:
+                self._write_all(data)
+
+            self._appended_since_prune = 0
+            span.set_attribute("removed", removed)
+            return removed
+
+    def start_pruning(self, interval: float = 3600) -> None:
+        """
+        Inicia a limpeza periódica (prune) em uma thread em segundo plano.
+        :param interval: Intervalo (em segundos) entre cada limpeza.
+        :return: None
+        """
+        if self._pruning_stop is not None:
+            return
+
+        stop = self._pruning_stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval):
+                try:
+                    self.prune()
+                except Exception as e:
+                    print(f"[ERROR] - Erro na limpeza periódica do histórico: {e}")
+
+        threading.Thread(target=run, name=f"tyr-agent-prune:{self.filename}", daemon=True).start()
+
+    def stop_pruning(self) -> None:
+        if self._pruning_stop is not None:
+            self._pruning_stop.set()
+            self._pruning_stop = None
+
+    def _append(self, agent_name: str, interactions: List[dict]) -> None:
+        """
+        Adiciona interações ao histórico: formatos que permitem adicionar ao final do arquivo (jsonl e msgpack) não
+        reescrevem o arquivo. Nos demais casos (ou quando o arquivo está em outro formato), o histórico é regravado.
+        """
+        with self._lock:
+            self._appended_since_prune += len(interactions)
+
+            current = detect_serializer(self.filename)
+            if current is not None and current.name == self.serializer.name and self.serializer.append(self.filename, agent_name, interactions):
+                # As interações antigas são removidas em uma limpeza completa a cada prune_every interações adicionadas:
+                if self.retention is not None and self._appended_since_prune >= self.retention.prune_every:
+                    self.prune()
+                return
+
+            data = current.read_all(self.filename) if current is not None else {}
+            data.setdefault(agent_name, []).extend(interactions)
+            self._apply_retention(data, [agent_name])
+            self._write_all(data)
+
+    def _apply_retention(self, data: dict, agent_names: Iterable[str]) -> int:
+        """
+        Aplica a política de retenção nas interações dos agentes informados, removendo os agentes sem interações.
+        :return: Quantidade de interações removidas.
+        """
+        if self.retention is None or not self.retention.is_active:
+            return 0
+
+        removed = 0
+        for agent_name in agent_names:
+            interactions = data.get(agent_name)
+            if not isinstance(interactions, list):
+                continue
+
+            kept = self.retention.apply(interactions)
+            removed += len(interactions) - len(kept)
+            if kept:
+                data[agent_name] = kept
+            else:
+                del data[agent_name]
+        return removed
+
+    def _write_all(self, data: dict) -> None:
+        with self._lock:
+            self.serializer.write(self.filename, data)
 
     def clear_history(self) -> None:
         try:
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump({}, f, indent=2, ensure_ascii=False)
+            self._write_all({})
         except Exception as e:
             print(f"[ERROR] - Erro ao limpar o histórico.")
 
     def update_score(self, agent_name: str, interaction_id: str, score: float) -> bool:
-        try:
-            if not isinstance(score, (int, float)) or not (0 <= score <= 5):
-                raise ValueError("Score deve ser um número entre 0 e 5.")
+        return self.update_scores(agent_name, {interaction_id: score}).get(interaction_id, False)
 
-            data = self.load_all()
+    def update_scores(self, agent_name: str, scores: Dict[str, Union[int, float]]) -> Dict[str, bool]:
+        """
+        Atualiza o score de várias interações de um agente com uma única leitura e uma única escrita do arquivo.
+        :param agent_name: Nome do agente (ou chave da sessão) dono das interações.
+        :param scores: Dicionário {id da interação: score}, com scores de 0 a 5.
+        :return: Dicionário {id da interação: se a interação foi encontrada e atualizada}.
+        """
+        updated = {interaction_id: False for interaction_id in scores}
+        if not scores:
+            return updated
 
-            if data.get(agent_name, False):
-                for interaction in data[agent_name]:
-                    if interaction["id"] == interaction_id:
-                        interaction["score"] = score
+        with trace_span("storage.update_scores", agent_name=agent_name, filename=self.filename, interactions=len(scores)) as span:
+            try:
+                for score in scores.values():
+                    if not isinstance(score, (int, float)) or not (0 <= score <= 5):
+                        raise ValueError("Score deve ser um número entre 0 e 5.")
 
-                        with open(self.filename, "w", encoding="utf-8") as f:
-                            json.dump(data, f, indent=2, ensure_ascii=False)
+                with self._lock:
+                    data = self.load_all()
 
-                        return True
-            else:
-                return False
-        except Exception as e:
-            print(f"[ERROR] - Erro ao atualizar o score: {e}")
-            return False
+                    for interaction in data.get(agent_name) or []:
+                        interaction_id = interaction.get("id")
+                        if interaction_id in scores:
+                            interaction["score"] = scores[interaction_id]
+                            updated[interaction_id] = True
+
+                    span.set_attribute("updated", sum(updated.values()))
+                    if any(updated.values()):
+                        self._apply_retention(data, [agent_name])  # -> Ex: score abaixo do mínimo da retenção.
+                        self._write_all(data)
+            except Exception as e:
+                span.record_error(e)
+                print(f"[ERROR] - Erro ao atualizar o score: {e}")
+                return {interaction_id: False for interaction_id in scores}
+
+        return updated
 
     def delete_history(self, agent_name: str, interaction_id: str) -> bool:
-        try:
-            data = self.load_all()
+        with trace_span("storage.delete_history", agent_name=agent_name, filename=self.filename) as span:
+            try:
+                with self._lock:
+                    data = self.load_all()
 
-            if data.get(agent_name, False):
-                data[agent_name] = list(filter(lambda x: x["id"] != interaction_id, data[agent_name]))
+                    if data.get(agent_name, False):
+                        data[agent_name] = list(filter(lambda x: x["id"] != interaction_id, data[agent_name]))
 
-                with open(self.filename, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                        self._write_all(data)
 
-                return True
-            else:
+                        return True
+                    else:
+                        return False
+            except Exception as e:
+                span.record_error(e)
+                print(f"[ERROR] - Erro ao excluir interação: {e}")
                 return False
-        except Exception as e:
-            print(f"[ERROR] - Erro ao excluir interação: {e}")
-            return False
@@ -0,0 +1,123 @@
+import json
+from typing import Any, Collection, Iterator, Optional, TextIO, Tuple
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonStreamReader:
+    """
+    Leitor incremental de um documento JSON no formato do InteractionHistory ({"agente": [interações], ...}).
+    O arquivo é lido em blocos e cada interação é decodificada individualmente, então o consumo de memória
+    não depende do tamanho do arquivo, apenas do tamanho de cada interação.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = 64 * 1024):
+        """
+        :param file: Arquivo aberto em modo texto.
+        :param chunk_size: Quantidade de caracteres lidos por vez.
+        """
+        self.file: TextIO = file
+        self.chunk_size: int = chunk_size
+
+        self._decoder = json.JSONDecoder()
+        self._buffer: str = ""
+        self._pos: int = 0
+        self._eof: bool = False
+
+    def iter_items(self, keys: Optional[Collection[str]] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Percorre os itens das listas do documento, na ordem do arquivo.
+        :param keys: Chaves (agentes) cujos itens devem ser retornados, None para todas. Os itens das demais chaves
+        são decodificados um a um e descartados.
+        :return: Iterador de tuplas (chave, item).
+        """
+        if self.__peek() is None:
+            return  # -> Arquivo vazio.
+
+        self.__expect("{")
+        if self.__peek() == "}":
+            return
+
+        while True:
+            key = self.__decode_value()
+            self.__expect(":")
+
+            if self.__peek() == "[":
+                wanted = keys is None or key in keys
+                for item in self.__iter_array():
+                    if wanted:
+                        yield key, item
+            else:
+                self.__decode_value()  # -> Valor que não é uma lista de interações, ignorado.
+
+            separator = self.__peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"JSON inválido: esperado ',' ou '}}' na posição {self._pos}.")
+
+    def __iter_array(self) -> Iterator[Any]:
+        self.__expect("[")
+        if self.__peek() == "]":
+            self._pos += 1
+            return
+
+        while True:
+            yield self.__decode_value()
+
+            separator = self.__peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"JSON inválido: esperado ',' ou ']' na posição {self._pos}.")
+
+    def __decode_value(self) -> Any:
+        self.__peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self.__read():
+                    raise
+                continue
+
+            # Um número no fim do bloco pode ter sido cortado, confirmando com o próximo bloco:
+            if end == len(self._buffer) and not self._eof:
+                self.__read()
+                continue
+
+            self._pos = end
+            return value
+
+    def __expect(self, char: str) -> None:
+        if self.__peek() != char:
+            raise ValueError(f"JSON inválido: esperado '{char}' na posição {self._pos}.")
+        self._pos += 1
+
+    def __peek(self) -> Optional[str]:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self.__read():
+                return None
+
+    def __read(self) -> bool:
+        if self._eof:
+            return False
+
+        # Descartando a parte já processada do buffer:
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+
+        # Lendo blocos maiores enquanto um mesmo valor não couber no buffer:
+        chunk = self.file.read(max(self.chunk_size, len(self._buffer)))
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buffer += chunk
+        return True
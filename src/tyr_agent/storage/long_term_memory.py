@@ -0,0 +1,290 @@
+import json
+import math
+import os
+import re
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from tyr_agent.entities.interaction import Interaction
+from tyr_agent.storage.interaction_history import InteractionHistory
+from tyr_agent.utils.tracing import trace_span
+
+# Função que converte uma lista de textos em vetores (uma linha por texto):
+Embedder = Callable[[List[str]], Any]
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("A memória de longo prazo requer o numpy. Instale com: pip install tyr-agent[memory]") from e
+    return numpy
+
+
+class HashingEmbedder:
+    """
+    Embedder local (offline) baseado em feature hashing das palavras e pares de palavras do texto.
+    Não requer nenhum modelo ou chamada de rede, sendo o padrão da LongTermMemory.
+    """
+
+    def __init__(self, dimension: int = 512):
+        self.dimension: int = dimension
+        self.name: str = f"hashing-v1-{dimension}"
+
+    def __call__(self, texts: List[str]):
+        np = _import_numpy()
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            words = re.findall(r"\w+", text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                hashed = zlib.crc32(feature.encode("utf-8"))  # -> Hash estável entre execuções (o índice é salvo em disco).
+                vectors[row, hashed % self.dimension] += 1.0 if hashed & 0x80000000 else -1.0
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class LongTermMemory:
+    """
+    Memória de longo prazo de um agente: indexa todas as interações salvas no storage em um índice vetorial local (NumPy)
+    e, a cada conversa, recupera as interações passadas mais parecidas com a mensagem do usuário.
+    O índice é atualizado de forma incremental e pode ser salvo em disco, evitando recalcular os vetores na inicialização.
+    """
+
+    def __init__(self, embedder: Optional[Embedder] = None, index_path: Optional[str] = None, top_k: int = 4, recent_window: int = 4, min_similarity: float = 0.1, autosave_every: int = 20):
+        """
+        :param embedder: Função que converte textos em vetores, por padrão usa o HashingEmbedder (offline).
+        :param index_path: Arquivo (.npz) onde o índice é salvo, None para manter o índice apenas em memória.
+        :param top_k: Quantidade de interações recuperadas por similaridade.
+        :param recent_window: Quantidade de interações mais recentes enviadas junto das recuperadas.
+        :param min_similarity: Similaridade mínima (cosseno) para que uma interação seja recuperada.
+        :param autosave_every: Quantidade de novas interações indexadas entre cada gravação do índice em disco.
+        """
+        self.np = _import_numpy()
+        self.embedder: Embedder = embedder or HashingEmbedder()
+        self.embedder_name: str = getattr(self.embedder, "name", type(self.embedder).__name__)
+        self.index_path: Optional[str] = index_path
+        self.top_k: int = top_k
+        self.recent_window: int = recent_window
+        self.min_similarity: float = min_similarity
+        self.autosave_every: int = autosave_every
+
+        self._vectors = None  # -> Matriz (capacidade x dimensão), preenchida até self._size.
+        self._scores = None  # -> Score de cada linha (NaN quando a interação não foi avaliada).
+        self._alive = None  # -> Linhas removidas ficam marcadas como False (e não são gravadas no arquivo do índice).
+        self._size: int = 0
+        self._rows: Dict[Union[bytes, str], int] = {}
+        self._interactions: List[Optional[Interaction]] = []
+        self._unsaved: int = 0
+        self._stored_vectors: Dict[Union[bytes, str], Any] = {}
+
+        if self.index_path is not None and os.path.exists(self.index_path):
+            self.__load_index()
+
+    def sync(self, storage: InteractionHistory, storage_key: str) -> None:
+        """
+        Sincroniza o índice com as interações do storage: indexa apenas as novas, atualiza os scores e remove as excluídas.
+        :param storage: Storage do agente.
+        :param storage_key: Chave do histórico no storage.
+        :return: None
+        """
+        with trace_span("memory.sync", storage_key=storage_key) as span:
+            interactions = [Interaction.from_dict(data) for data in storage.iter_history(storage_key)]
+            stored_keys = {interaction.uid for interaction in interactions}
+
+            for key in [key for key in self._rows if key not in stored_keys]:
+                self.__remove_row(key)
+
+            new_interactions = []
+            for interaction in interactions:
+                row = self._rows.get(interaction.uid)
+                if row is not None:
+                    self._interactions[row] = interaction
+                    self._scores[row] = self.__score_value(interaction.score)
+                else:
+                    new_interactions.append(interaction)
+
+            self.add(new_interactions, save=False)
+            span.set_attribute("indexed", len(new_interactions))
+
+            if new_interactions or self._unsaved:
+                self.save()
+
+    def add(self, interactions: Iterable[Union[dict, Interaction]], save: bool = True) -> None:
+        """
+        Indexa novas interações (incremental: apenas os vetores das novas interações são calculados).
+        :param interactions: Interações a serem indexadas.
+        :param save: Define se o índice pode ser salvo em disco (a cada autosave_every interações).
+        :return: None
+        """
+        interactions = [Interaction.from_dict(interaction) for interaction in interactions]
+        interactions = [interaction for interaction in interactions if interaction.uid not in self._rows]
+        if not interactions:
+            return
+
+        # Vetores já calculados (carregados do arquivo do índice) são reaproveitados:
+        pending = [interaction for interaction in interactions if interaction.uid not in self._stored_vectors]
+        embedded = iter(self.__embed([self.__text(interaction) for interaction in pending]) if pending else [])
+
+        vectors = [
+            self._stored_vectors.pop(interaction.uid) if interaction.uid in self._stored_vectors else next(embedded)
+            for interaction in interactions
+        ]
+        self.__append_rows(interactions, self.np.asarray(vectors, dtype=self.np.float32))
+
+        self._unsaved += len(pending)
+        if save and self._unsaved >= self.autosave_every:
+            self.save()
+
+    def search(self, query: str, k: Optional[int] = None, exclude: Iterable[Union[bytes, str]] = (), min_score: Optional[Union[int, float]] = None) -> List[Interaction]:
+        """
+        Busca as interações mais parecidas com o texto informado.
+        :param query: Texto da busca (ex: mensagem do usuário).
+        :param k: Quantidade máxima de interações retornadas, por padrão usa o top_k.
+        :param exclude: Ids (bytes ou texto) que não devem ser retornados (ex: interações que já estão na janela recente).
+        :param min_score: Score mínimo das interações avaliadas (interações sem score são sempre aceitas).
+        :return: Interações encontradas, da mais antiga para a mais recente.
+        """
+        k = self.top_k if k is None else k
+        if k <= 0 or self._size == 0:
+            return []
+
+        with trace_span("memory.search", k=k, indexed=len(self._rows)):
+            np = self.np
+            query_vector = self.__embed([query])[0]
+            similarities = self._vectors[:self._size] @ query_vector
+
+            valid = self._alive[:self._size] & (similarities >= self.min_similarity)
+            if min_score is not None:
+                scores = self._scores[:self._size]
+                valid &= np.isnan(scores) | (scores >= min_score)
+            for key in exclude:
+                row = self._rows.get(Interaction.parse_id(key))
+                if row is not None:
+                    valid[row] = False
+
+            candidates = np.flatnonzero(valid)
+            if candidates.size == 0:
+                return []
+
+            if candidates.size > k:
+                candidates = candidates[np.argpartition(-similarities[candidates], k - 1)[:k]]
+
+            # Mantendo a ordem cronológica (ordem de indexação) das interações recuperadas:
+            return [self._interactions[row] for row in sorted(candidates.tolist())]
+
+    def build_history(self, query: str, recent: Sequence[Interaction], min_score: Optional[Union[int, float]] = None) -> List[Interaction]:
+        """
+        Monta o histórico enviado ao modelo: as interações mais parecidas com a mensagem + a janela de interações recentes.
+        :param query: Mensagem do usuário.
+        :param recent: Histórico recente do agente (as últimas recent_window interações são usadas).
+        :param min_score: Score mínimo das interações recuperadas.
+        :return: Histórico a ser enviado ao modelo.
+        """
+        recent_window = list(recent)[-self.recent_window:] if self.recent_window > 0 else []
+        retrieved = self.search(query, exclude=[interaction.uid for interaction in recent_window], min_score=min_score)
+        return retrieved + recent_window
+
+    def update_score(self, interaction_id: str, score: Union[int, float]) -> None:
+        row = self._rows.get(Interaction.parse_id(interaction_id))
+        if row is not None:
+            self._scores[row] = self.__score_value(score)
+            self._interactions[row].score = score
+
+    def remove(self, interaction_id: str) -> bool:
+        return self.__remove_row(Interaction.parse_id(interaction_id))
+
+    def clear(self) -> None:
+        self._vectors = self._scores = self._alive = None
+        self._size = 0
+        self._rows.clear()
+        self._interactions.clear()
+        self._stored_vectors.clear()
+        self._unsaved = 0
+
+    def save(self) -> None:
+        """
+        Salva o índice (vetores e ids) em disco, compactando as linhas removidas.
+        :return: None
+        """
+        if self.index_path is None:
+            return
+
+        with trace_span("memory.save", path=self.index_path, indexed=len(self._rows)):
+            np = self.np
+            rows = sorted(self._rows.values())
+            vectors = self._vectors[rows] if rows else np.zeros((0, 0), dtype=np.float32)
+            ids = [self._interactions[row].id for row in rows]
+
+            # Gravando em um arquivo temporário e substituindo o anterior, evitando um índice corrompido:
+            tmp_path = f"{self.index_path}.tmp.npz"
+            np.savez(tmp_path, vectors=vectors, ids=np.asarray(ids, dtype=str), meta=np.asarray(json.dumps({"embedder": self.embedder_name})))
+            os.replace(tmp_path, self.index_path)
+            self._unsaved = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __load_index(self) -> None:
+        try:
+            with self.np.load(self.index_path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("embedder") != self.embedder_name:
+                    return  # -> Índice gerado por outro embedder, os vetores serão recalculados.
+
+                # Os vetores ficam disponíveis até que o sync carregue as interações correspondentes do storage:
+                for interaction_id, vector in zip(data["ids"].tolist(), data["vectors"]):
+                    self._stored_vectors[Interaction.parse_id(interaction_id)] = vector
+        except Exception as e:
+            print(f"[ERROR] - Falha ao carregar o índice da memória de longo prazo: {e}")
+
+    def __embed(self, texts: List[str]):
+        vectors = self.np.asarray(self.embedder(texts), dtype=self.np.float32)
+        norms = self.np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def __append_rows(self, interactions: List[Interaction], vectors) -> None:
+        np = self.np
+        needed = self._size + len(interactions)
+
+        if self._vectors is None:
+            capacity = max(64, needed)
+            self._vectors = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+            self._scores = np.full(capacity, np.nan, dtype=np.float32)
+            self._alive = np.zeros(capacity, dtype=bool)
+        elif needed > self._vectors.shape[0]:
+            # Dobrando a capacidade, mantendo o custo amortizado de inserção em O(1):
+            capacity = max(needed, self._vectors.shape[0] * 2)
+            self._vectors = np.resize(self._vectors, (capacity, self._vectors.shape[1]))
+            self._scores = np.resize(self._scores, capacity)
+            self._alive = np.resize(self._alive, capacity)
+
+        start = self._size
+        self._vectors[start:needed] = vectors
+        for offset, interaction in enumerate(interactions):
+            row = start + offset
+            self._scores[row] = self.__score_value(interaction.score)
+            self._alive[row] = True
+            self._rows[interaction.uid] = row
+            self._interactions.append(interaction)
+        self._size = needed
+
+    def __remove_row(self, key: Union[bytes, str]) -> bool:
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+
+        self._alive[row] = False
+        self._interactions[row] = None
+        return True
+
+    @staticmethod
+    def __score_value(score: Optional[Union[int, float]]) -> float:
+        return float(score) if isinstance(score, (int, float)) else math.nan
+
+    @staticmethod
+    def __text(interaction: Interaction) -> str:
+        return " ".join([interaction.user, *interaction.agent])
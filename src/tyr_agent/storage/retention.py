@@ -0,0 +1,62 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Union
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Política de retenção das interações salvas no InteractionHistory, aplicada a cada agente (e a cada sessão).
+    :param max_records: Quantidade máxima de interações mantidas por agente (as mais antigas são removidas).
+    :param max_age: Idade máxima (em segundos) das interações, com base no timestamp da interação.
+    :param min_score: Score mínimo das interações avaliadas (interações sem score são mantidas).
+    :param prune_every: Quantidade de interações adicionadas ao final do arquivo (formatos jsonl e msgpack)
+    entre cada limpeza completa do arquivo.
+    """
+    max_records: Optional[int] = None
+    max_age: Optional[float] = None
+    min_score: Optional[Union[int, float]] = None
+    prune_every: int = 1000
+
+    @property
+    def is_active(self) -> bool:
+        return self.max_records is not None or self.max_age is not None or self.min_score is not None
+
+    def apply(self, interactions: List[dict], now: Optional[float] = None) -> List[dict]:
+        """
+        Aplica a política nas interações de um agente.
+        :param interactions: Interações do agente, da mais antiga para a mais recente.
+        :param now: Momento atual (timestamp), por padrão usa time.time().
+        :return: Interações mantidas.
+        """
+        if not self.is_active:
+            return interactions
+
+        now = time.time() if now is None else now
+        kept = [interaction for interaction in interactions if self.keeps(interaction, now)]
+
+        if self.max_records is not None and len(kept) > self.max_records:
+            kept = kept[len(kept) - self.max_records:] if self.max_records > 0 else []
+        return kept
+
+    def keeps(self, interaction: dict, now: float) -> bool:
+        score = interaction.get("score")
+        if self.min_score is not None and isinstance(score, (int, float)) and score < self.min_score:
+            return False
+
+        if self.max_age is not None:
+            created_at = self.__timestamp(interaction.get("timestamp"))
+            if created_at is not None and now - created_at > self.max_age:
+                return False
+
+        return True
+
+    @staticmethod
+    def __timestamp(timestamp: Optional[str]) -> Optional[float]:
+        if not isinstance(timestamp, str):
+            return None
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except ValueError:
+            return None  # -> Timestamp em outro formato, a interação é mantida.
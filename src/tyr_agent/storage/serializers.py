@@ -0,0 +1,412 @@
+import gzip
+import io
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Collection, Dict, Iterator, List, Optional, Tuple, Union
+
+from tyr_agent.storage.json_stream import JsonStreamReader
+
+# Prefixo dos arquivos em msgpack (os demais formatos são identificados pelo próprio conteúdo):
+MSGPACK_MAGIC = b"TYRMP\x01\n"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError("O formato msgpack requer o pacote msgpack. Instale com: pip install tyr-agent[msgpack]") from e
+    return msgpack
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("O formato jsonl.zst requer o pacote zstandard. Instale com: pip install tyr-agent[zstd]") from e
+    return zstandard
+
+
+class HistorySerializer(ABC):
+    """
+    Formato de gravação do arquivo do InteractionHistory ({"agente": [interações]}).
+    Todos os formatos podem ser lidos de forma incremental (iter_items), sem carregar o arquivo inteiro em memória.
+    """
+    name: str = ""
+
+    @abstractmethod
+    def matches(self, header: bytes) -> bool:
+        """
+        Verifica se o início do arquivo corresponde a este formato (detecção automática na leitura).
+        """
+
+    @abstractmethod
+    def iter_items(self, filename: str, keys: Optional[Collection[str]] = None) -> Iterator[Tuple[str, dict]]:
+        """
+        Percorre as interações do arquivo, na ordem em que foram salvas.
+        :param filename: Arquivo do histórico.
+        :param keys: Agentes (ou sessões) cujas interações devem ser retornadas, None para todos.
+        :return: Iterador de tuplas (nome do agente, interação).
+        """
+
+    @abstractmethod
+    def _dump(self, file: BinaryIO, data: dict) -> None:
+        pass
+
+    def write(self, filename: str, data: dict) -> None:
+        """
+        Grava o histórico completo em um arquivo temporário, substituindo o anterior apenas ao final da gravação.
+        """
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, "wb") as f:
+            self._dump(f, data)
+        os.replace(tmp_filename, filename)
+
+        # Índice de outro formato (ex: JSON) não corresponde mais ao arquivo:
+        JsonSerializer.remove_index(filename)
+
+    def read_all(self, filename: str) -> dict:
+        data: Dict[str, List[dict]] = {}
+        for agent_name, interaction in self.iter_items(filename):
+            data.setdefault(agent_name, []).append(interaction)
+        return data
+
+    def iter_recent(self, filename: str, agent_name: str) -> Optional[Iterator[dict]]:
+        """
+        Percorre as interações de um agente da mais recente para a mais antiga, quando o formato permite (ex: via índice).
+        :return: Iterador reverso, ou None caso o formato exija a leitura completa do arquivo.
+        """
+        return None
+
+    def append(self, filename: str, agent_name: str, interactions: List[dict]) -> bool:
+        """
+        Adiciona interações ao final do arquivo sem reescrevê-lo, quando o formato permite.
+        :return: True caso as interações tenham sido adicionadas, False caso o arquivo precise ser reescrito.
+        """
+        return False
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name!r})"
+
+
+class JsonSerializer(HistorySerializer):
+    """
+    Documento JSON compacto, com uma interação por linha, e um índice (<arquivo>.idx) com a posição (em bytes)
+    das interações de cada agente. O índice permite ler apenas as interações mais recentes de um agente.
+    Também lê arquivos JSON em qualquer formatação (ex: os arquivos com indent=2 das versões anteriores).
+    """
+    name = "json"
+
+    # Versão do arquivo de índice:
+    INDEX_VERSION = 1
+
+    def matches(self, header: bytes) -> bool:
+        return header.lstrip().startswith(b"{")
+
+    def write(self, filename: str, data: dict) -> None:
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, "wb") as f:
+            spans = self.__dump(f, data)
+        os.replace(tmp_filename, filename)
+
+        stat = os.stat(filename)
+        index = {"version": self.INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "spans": spans}
+        with open(self.index_filename(filename), "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+
+    def _dump(self, file: BinaryIO, data: dict) -> None:
+        self.__dump(file, data)
+
+    def read_all(self, filename: str) -> dict:
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def iter_items(self, filename: str, keys: Optional[Collection[str]] = None) -> Iterator[Tuple[str, dict]]:
+        index = self.load_index(filename) if keys is not None else None
+        if index is not None:
+            for agent_name in keys:
+                bounds = index["spans"].get(agent_name)
+                if bounds is not None:
+                    for interaction in self.__iter_span(filename, bounds[0], bounds[1]):
+                        yield agent_name, interaction
+            return
+
+        with open(filename, "r", encoding="utf-8") as f:
+            yield from JsonStreamReader(f).iter_items(keys)
+
+    def iter_recent(self, filename: str, agent_name: str) -> Optional[Iterator[dict]]:
+        index = self.load_index(filename)
+        if index is None:
+            return None
+
+        bounds = index["spans"].get(agent_name)
+        return self.__iter_span(filename, bounds[0], bounds[1], reverse=True) if bounds is not None else iter(())
+
+    @staticmethod
+    def index_filename(filename: str) -> str:
+        return f"{filename}.idx"
+
+    @classmethod
+    def remove_index(cls, filename: str) -> None:
+        try:
+            os.remove(cls.index_filename(filename))
+        except FileNotFoundError:
+            pass
+
+    def load_index(self, filename: str) -> Optional[dict]:
+        """
+        Carrega o índice do histórico, desde que ele corresponda à versão atual do arquivo (tamanho e data de modificação).
+        :return: Índice, ou None caso não exista ou esteja desatualizado (ex: arquivo alterado fora do InteractionHistory).
+        """
+        try:
+            with open(self.index_filename(filename), "r", encoding="utf-8") as f:
+                index = json.load(f)
+            stat = os.stat(filename)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if index.get("version") != self.INDEX_VERSION or index.get("size") != stat.st_size or index.get("mtime_ns") != stat.st_mtime_ns:
+            return None
+        return index
+
+    @staticmethod
+    def __dump(file: BinaryIO, data: dict) -> Dict[str, List[int]]:
+        spans = {}
+        file.write(b"{")
+        for position, (agent_name, interactions) in enumerate(data.items()):
+            file.write(b",\n  " if position else b"\n  ")
+            file.write(json.dumps(agent_name, ensure_ascii=False).encode("utf-8") + b": ")
+
+            if not isinstance(interactions, list):
+                file.write(json.dumps(interactions, ensure_ascii=False).encode("utf-8"))
+                continue
+
+            file.write(b"[")
+            start = file.tell()
+            for item_position, interaction in enumerate(interactions):
+                file.write(b",\n    " if item_position else b"\n    ")
+                file.write(json.dumps(interaction, ensure_ascii=False).encode("utf-8"))
+            spans[agent_name] = [start, file.tell()]
+            file.write(b"\n  ]" if interactions else b"]")
+        file.write(b"\n}\n" if data else b"}\n")
+
+        return spans
+
+    @staticmethod
+    def __iter_span(filename: str, start: int, end: int, reverse: bool = False, block_size: int = 64 * 1024) -> Iterator[dict]:
+        with open(filename, "rb") as f:
+            if not reverse:
+                f.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    line = f.readline(remaining)
+                    remaining -= len(line)
+                    line = line.strip().rstrip(b",")
+                    if line:
+                        yield json.loads(line)
+                return
+
+            position, pending = end, b""
+            while position > start:
+                size = min(block_size, position - start)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + pending).split(b"\n")
+
+                # A primeira linha do bloco pode estar incompleta, sendo completada pelo próximo bloco:
+                pending = lines.pop(0) if position > start else b""
+                for line in reversed(lines):
+                    line = line.strip().rstrip(b",")
+                    if line:
+                        yield json.loads(line)
+
+
+class JsonLinesSerializer(HistorySerializer):
+    """
+    JSON Lines (uma linha ["agente", interação] por interação), opcionalmente comprimido em blocos (gzip ou zstd).
+    Cada bloco de block_size interações é comprimido de forma independente, então novas interações são adicionadas
+    ao final do arquivo (um novo bloco) sem reescrevê-lo.
+    """
+
+    def __init__(self, compression: Optional[str] = None, block_size: int = 1000, level: Optional[int] = None):
+        """
+        :param compression: None (texto), "gzip" ou "zstd" (requer o extra tyr-agent[zstd]).
+        :param block_size: Quantidade de interações por bloco comprimido.
+        :param level: Nível de compressão, por padrão usa 6 (gzip) ou 3 (zstd).
+        """
+        if compression not in (None, "gzip", "zstd"):
+            raise ValueError(f"Compressão não suportada: {compression}. Utilize None, 'gzip' ou 'zstd'.")
+
+        self.compression: Optional[str] = compression
+        self.block_size: int = block_size
+        self.level: int = level if level is not None else (3 if compression == "zstd" else 6)
+        self.name = {None: "jsonl", "gzip": "jsonl.gz", "zstd": "jsonl.zst"}[compression]
+
+    def matches(self, header: bytes) -> bool:
+        if self.compression == "gzip":
+            return header.startswith(GZIP_MAGIC)
+        if self.compression == "zstd":
+            return header.startswith(ZSTD_MAGIC)
+        return header.lstrip().startswith(b"[")
+
+    def _dump(self, file: BinaryIO, data: dict) -> None:
+        self.__write_lines(file, [
+            (agent_name, interaction)
+            for agent_name, interactions in data.items() if isinstance(interactions, list)
+            for interaction in interactions
+        ])
+
+    def append(self, filename: str, agent_name: str, interactions: List[dict]) -> bool:
+        with open(filename, "ab") as f:
+            self.__write_lines(f, [(agent_name, interaction) for interaction in interactions])
+        return True
+
+    def read_all(self, filename: str) -> dict:
+        with self.__open_lines(filename) as lines:
+            content = lines.read().strip()
+
+        # Decodificando todas as linhas de uma vez, como uma única lista JSON (as quebras de linha dentro dos textos são escapadas):
+        data: Dict[str, List[dict]] = {}
+        for agent_name, interaction in json.loads(b"[" + content.replace(b"\n", b",") + b"]") if content else []:
+            data.setdefault(agent_name, []).append(interaction)
+        return data
+
+    def iter_items(self, filename: str, keys: Optional[Collection[str]] = None) -> Iterator[Tuple[str, dict]]:
+        # Filtrando pelo início da linha (["agente",), sem decodificar as interações dos demais agentes:
+        prefixes = tuple(self.__line_prefix(key) for key in keys) if keys is not None else None
+
+        with self.__open_lines(filename) as lines:
+            for line in lines:
+                if prefixes is not None and not line.startswith(prefixes):
+                    continue
+                if line.strip():
+                    agent_name, interaction = json.loads(line)
+                    yield agent_name, interaction
+
+    def __write_lines(self, file: BinaryIO, items: List[Tuple[str, dict]]) -> None:
+        for start in range(0, len(items), self.block_size):
+            block = b"".join(
+                json.dumps([agent_name, interaction], ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+                for agent_name, interaction in items[start:start + self.block_size]
+            )
+            file.write(self.__compress(block))
+
+    def __compress(self, block: bytes) -> bytes:
+        if self.compression == "gzip":
+            return gzip.compress(block, compresslevel=self.level, mtime=0)
+        if self.compression == "zstd":
+            return _import_zstandard().ZstdCompressor(level=self.level).compress(block)
+        return block
+
+    def __open_lines(self, filename: str):
+        if self.compression == "gzip":
+            return gzip.open(filename, "rb")  # -> Lê todos os blocos (membros gzip) em sequência.
+        if self.compression == "zstd":
+            zstandard = _import_zstandard()
+            reader = zstandard.ZstdDecompressor().stream_reader(open(filename, "rb"), read_across_frames=True, closefd=True)
+            return io.BufferedReader(reader)
+        return open(filename, "rb")
+
+    @staticmethod
+    def __line_prefix(agent_name: str) -> bytes:
+        return b"[" + json.dumps(agent_name, ensure_ascii=False).encode("utf-8") + b","
+
+
+class MsgpackSerializer(HistorySerializer):
+    """
+    Formato binário (msgpack): sequência de pares [agente, interação] após um prefixo de identificação.
+    Novas interações são adicionadas ao final do arquivo sem reescrevê-lo. Requer o extra tyr-agent[msgpack].
+    """
+    name = "msgpack"
+
+    def matches(self, header: bytes) -> bool:
+        return header.startswith(MSGPACK_MAGIC)
+
+    def _dump(self, file: BinaryIO, data: dict) -> None:
+        file.write(MSGPACK_MAGIC)
+        packer = _import_msgpack().Packer()
+        for agent_name, interactions in data.items():
+            if isinstance(interactions, list):
+                for interaction in interactions:
+                    file.write(packer.pack([agent_name, interaction]))
+
+    def append(self, filename: str, agent_name: str, interactions: List[dict]) -> bool:
+        packer = _import_msgpack().Packer()
+        with open(filename, "ab") as f:
+            f.write(b"".join(packer.pack([agent_name, interaction]) for interaction in interactions))
+        return True
+
+    def iter_items(self, filename: str, keys: Optional[Collection[str]] = None) -> Iterator[Tuple[str, dict]]:
+        msgpack = _import_msgpack()
+        with open(filename, "rb") as f:
+            if f.read(len(MSGPACK_MAGIC)) != MSGPACK_MAGIC:
+                raise ValueError(f"O arquivo {filename} não está no formato msgpack.")
+
+            for agent_name, interaction in msgpack.Unpacker(f, raw=False):
+                if keys is None or agent_name in keys:
+                    yield agent_name, interaction
+
+
+SERIALIZERS = {
+    "json": JsonSerializer,
+    "jsonl": lambda: JsonLinesSerializer(),
+    "jsonl.gz": lambda: JsonLinesSerializer("gzip"),
+    "jsonl.zst": lambda: JsonLinesSerializer("zstd"),
+    "msgpack": MsgpackSerializer,
+}
+
+
+def get_serializer(serializer: Union[str, HistorySerializer, None] = None) -> HistorySerializer:
+    """
+    Retorna o serializer a partir do nome ("json", "jsonl", "jsonl.gz", "jsonl.zst" ou "msgpack").
+    :param serializer: Nome ou instância do serializer, None para o padrão (json).
+    """
+    if isinstance(serializer, HistorySerializer):
+        return serializer
+
+    factory = SERIALIZERS.get(serializer or "json")
+    if factory is None:
+        raise ValueError(f"Formato de histórico não suportado: {serializer}. Utilize um de: {', '.join(SERIALIZERS)}.")
+    return factory()
+
+
+def detect_serializer(filename: str) -> Optional[HistorySerializer]:
+    """
+    Identifica o formato do arquivo do histórico a partir do seu conteúdo.
+    :return: Serializer do formato, ou None caso o arquivo não exista ou esteja vazio.
+    """
+    try:
+        with open(filename, "rb") as f:
+            header = f.read(64)
+    except FileNotFoundError:
+        return None
+
+    if not header.strip():
+        return None
+
+    for name in SERIALIZERS:
+        serializer = get_serializer(name)
+        if serializer.matches(header):
+            return serializer
+
+    raise ValueError(f"Formato do arquivo de histórico não reconhecido: {filename}.")
+
+
+def migrate_history(filename: str, serializer: Union[str, HistorySerializer], target_filename: Optional[str] = None) -> str:
+    """
+    Converte um arquivo de histórico para outro formato (o formato atual é identificado automaticamente).
+    :param filename: Arquivo do histórico.
+    :param serializer: Novo formato (nome ou instância).
+    :param target_filename: Arquivo de destino, por padrão substitui o próprio arquivo.
+    :return: Caminho do arquivo convertido.
+    """
+    source = detect_serializer(filename) or get_serializer()
+    target = get_serializer(serializer)
+    target_filename = target_filename or filename
+
+    data = source.read_all(filename) if os.path.exists(filename) else {}
+    target.write(target_filename, data)
+
+    return target_filename
@@ -0,0 +1,97 @@
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from tyr_agent.storage.history_buffer import HistoryBuffer
+
+
+class SessionHistoryCache:
+    """
+    Cache em memória (LRU) dos históricos de cada sessão de um agente.
+    Os históricos são carregados sob demanda e as sessões ociosas são removidas automaticamente.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: Optional[float] = 1800):
+        self.max_sessions: int = max(1, max_sessions)
+        self.idle_ttl: Optional[float] = idle_ttl
+
+        self._histories: "OrderedDict[str, HistoryBuffer]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        # Os locks só existem enquanto algum turno da sessão os utiliza (inclusive sessões sem histórico em memória):
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def get(self, session_id: str, loader: Callable[[], HistoryBuffer]) -> HistoryBuffer:
+        """
+        Retorna o histórico da sessão, carregando-o através do loader caso ele ainda não esteja em memória.
+        :param session_id: ID da sessão.
+        :param loader: Função chamada para carregar o histórico da sessão (ex: a partir do storage).
+        :return: Histórico da sessão.
+        """
+        if session_id not in self._histories:
+            self._histories[session_id] = loader()
+
+        self._touch(session_id)
+        return self._histories[session_id]
+
+    def set(self, session_id: str, history: HistoryBuffer) -> None:
+        self._histories[session_id] = history
+        self._touch(session_id)
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        """
+        Pega o lock da sessão, garantindo que os turnos de uma mesma sessão sejam executados em ordem.
+        :param session_id: ID da sessão.
+        :return: Lock (asyncio) exclusivo da sessão.
+        """
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        return lock
+
+    def remove(self, session_id: str) -> None:
+        self._histories.pop(session_id, None)
+        self._last_access.pop(session_id, None)
+
+    def evict(self) -> int:
+        """
+        Remove as sessões ociosas (idle_ttl) e as menos usadas recentemente que ultrapassarem o max_sessions.
+        Sessões com um turno em andamento nunca são removidas.
+        :return: Quantidade de sessões removidas.
+        """
+        now: float = time.monotonic()
+        excess: int = len(self._histories) - self.max_sessions
+        to_remove: List[str] = []
+
+        # As sessões estão em ordem de último acesso, então é possível parar na primeira sessão ainda válida:
+        for session_id in self._histories:
+            is_idle = self.idle_ttl is not None and now - self._last_access.get(session_id, now) > self.idle_ttl
+            if not is_idle and excess <= 0:
+                break
+
+            if self._is_busy(session_id):
+                continue
+
+            to_remove.append(session_id)
+            excess -= 1
+
+        for session_id in to_remove:
+            self.remove(session_id)
+
+        return len(to_remove)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._histories
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    def _touch(self, session_id: str) -> None:
+        self._histories.move_to_end(session_id)
+        self._last_access[session_id] = time.monotonic()
+        self.evict()
+
+    def _is_busy(self, session_id: str) -> bool:
+        lock = self._locks.get(session_id)
+        return lock is not None and lock.locked()
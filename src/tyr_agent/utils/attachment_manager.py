@@ -0,0 +1,100 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class UploadedFile:
+    """
+    Referência de um arquivo enviado através da API de arquivos do provedor (Gemini Files ou OpenAI Files).
+    :param reference: URI (Gemini) ou ID (OpenAI) do arquivo enviado.
+    :param mime_type: Tipo mime do arquivo enviado.
+    :param expires_at: Momento (timestamp) em que o arquivo expira no provedor, ou None caso não expire.
+    """
+    reference: str
+    mime_type: str
+    expires_at: Optional[float] = None
+
+
+# Função que envia o arquivo ao provedor, recebendo (bytes, nome do arquivo, tipo mime):
+FileUploader = Callable[[bytes, str, str], UploadedFile]
+
+
+class AttachmentManager:
+    """
+    Gerencia os arquivos enviados via API de arquivos dos provedores.
+    Cada arquivo é enviado uma única vez e a referência retornada é reutilizada nas próximas requisições,
+    até expirar no provedor (quando é enviado novamente).
+    """
+
+    def __init__(self, uploader: FileUploader, default_ttl: Optional[float] = None, expiry_margin: float = 300):
+        """
+        :param uploader: Função que envia os arquivos ao provedor (ex: um endpoint local falso, em testes).
+        :param default_ttl: Tempo de vida (em segundos) usado quando o provedor não informa a expiração do arquivo.
+        :param expiry_margin: Margem (em segundos) antes da expiração em que a referência deixa de ser usada.
+        """
+        self.uploader: FileUploader = uploader
+        self.default_ttl: Optional[float] = default_ttl
+        self.expiry_margin: float = expiry_margin
+
+        self.uploads: int = 0
+        self.reuses: int = 0
+
+        self._files: Dict[str, UploadedFile] = {}
+        self._lock = threading.Lock()
+
+    def get_or_upload(self, key: Optional[str], file_name: str, load: Callable[[], Optional[Tuple[bytes, str]]]) -> Optional[UploadedFile]:
+        """
+        Retorna a referência do arquivo, enviando-o ao provedor apenas caso ele ainda não tenha sido enviado (ou tenha expirado).
+        :param key: Chave do arquivo (baseada no conteúdo ou em path + mtime + tamanho).
+        :param file_name: Nome do arquivo.
+        :param load: Função que carrega os bytes e o tipo mime do arquivo, chamada apenas quando o envio é necessário.
+        :return: Referência do arquivo enviado, ou None caso não seja possível carregá-lo.
+        """
+        if key is not None:
+            uploaded_file = self.get(key)
+            if uploaded_file is not None:
+                with self._lock:
+                    self.reuses += 1
+                return uploaded_file
+
+        loaded_file = load()
+        if not loaded_file or not loaded_file[0]:
+            return None
+
+        bytes_file, mime_type = loaded_file
+        uploaded_file = self.uploader(bytes_file, file_name, mime_type)
+
+        if uploaded_file.expires_at is None and self.default_ttl is not None:
+            uploaded_file = UploadedFile(uploaded_file.reference, uploaded_file.mime_type, time.time() + self.default_ttl)
+
+        with self._lock:
+            self.uploads += 1
+            if key is not None:
+                self._files[key] = uploaded_file
+
+        return uploaded_file
+
+    def get(self, key: str) -> Optional[UploadedFile]:
+        with self._lock:
+            uploaded_file = self._files.get(key)
+            if uploaded_file is None:
+                return None
+
+            if uploaded_file.expires_at is not None and uploaded_file.expires_at - self.expiry_margin <= time.time():
+                del self._files[key]
+                return None
+
+            return uploaded_file
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._files.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+
+    def __len__(self) -> int:
+        return len(self._files)
@@ -0,0 +1,190 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class CachedContext:
+    """
+    Referência de um conteúdo em cache no provedor (ex: Gemini cachedContents), com o prompt de sistema e os arquivos fixados.
+    :param name: Nome (ID) do conteúdo em cache no provedor.
+    :param expires_at: Momento (timestamp) em que o conteúdo expira no provedor, ou None caso não informado.
+    """
+    name: str
+    expires_at: Optional[float] = None
+
+
+# Função que cria o conteúdo em cache, recebendo (chave, prompt de sistema, arquivos fixados convertidos, ttl em segundos):
+ContextCacheCreator = Callable[[str, str, List[Any], float], CachedContext]
+# Função que renova o tempo de vida do conteúdo em cache, recebendo (nome, ttl em segundos):
+ContextCacheRefresher = Callable[[str, float], CachedContext]
+# Função que remove o conteúdo em cache do provedor, recebendo o nome:
+ContextCacheDeleter = Callable[[str], None]
+
+
+class ContextCacheManager:
+    """
+    Gerencia os conteúdos em cache no provedor (prompt de sistema + arquivos fixados), evitando reenviá-los a cada chamada.
+    Cada conteúdo é identificado pelo hash do modelo, do prompt e dos arquivos, sendo criado apenas quando o mesmo conteúdo
+    é usado min_uses vezes. O tempo de vida é renovado enquanto o conteúdo continua em uso, e o conteúdo é recriado após expirar.
+    """
+
+    def __init__(self, creator: ContextCacheCreator, refresher: Optional[ContextCacheRefresher] = None, deleter: Optional[ContextCacheDeleter] = None, ttl: float = 3600, refresh_margin: float = 600, expiry_margin: float = 60, min_uses: int = 2, max_entries: int = 64):
+        """
+        :param creator: Função que cria o conteúdo em cache no provedor (ex: um endpoint local falso, em testes).
+        :param refresher: Função que renova o tempo de vida do conteúdo, None para recriar o conteúdo ao expirar.
+        :param deleter: Função que remove o conteúdo do provedor, usada ao descartar conteúdos (clear e limite de max_entries).
+        :param ttl: Tempo de vida (em segundos) de cada conteúdo em cache.
+        :param refresh_margin: Margem (em segundos) antes da expiração em que o tempo de vida é renovado.
+        :param expiry_margin: Margem (em segundos) antes da expiração em que o conteúdo deixa de ser usado.
+        :param min_uses: Quantidade de usos do mesmo conteúdo antes de criá-lo em cache (prompts usados uma única vez não são cacheados).
+        :param max_entries: Quantidade máxima de conteúdos mantidos em cache (LRU).
+        """
+        self.creator: ContextCacheCreator = creator
+        self.refresher: Optional[ContextCacheRefresher] = refresher
+        self.deleter: Optional[ContextCacheDeleter] = deleter
+        self.ttl: float = ttl
+        self.refresh_margin: float = refresh_margin
+        self.expiry_margin: float = expiry_margin
+        self.min_uses: int = min_uses
+        self.max_entries: int = max_entries
+
+        self.creations: int = 0
+        self.refreshes: int = 0
+        self.reuses: int = 0
+        self.failures: int = 0
+
+        self._entries: "OrderedDict[str, CachedContext]" = OrderedDict()
+        self._uses: "OrderedDict[str, int]" = OrderedDict()
+        self._failed: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, system_instruction: str, file_keys: Iterable[Optional[str]] = ()) -> str:
+        """
+        Gera a chave do conteúdo a partir do modelo, do prompt de sistema e das chaves dos arquivos fixados.
+        """
+        digest = hashlib.sha256()
+        for value in (model_name, system_instruction, *(key or "" for key in file_keys)):
+            digest.update(value.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_or_create(self, key: str, build: Callable[[], Tuple[str, List[Any]]]) -> Optional[CachedContext]:
+        """
+        Retorna o conteúdo em cache, criando-o (ou renovando o seu tempo de vida) quando necessário.
+        :param key: Chave do conteúdo (ver make_key).
+        :param build: Função que retorna o prompt de sistema e os arquivos fixados, chamada apenas quando a criação é necessária.
+        :return: Conteúdo em cache, ou None caso ele ainda não deva ser criado (ou a criação tenha falhado).
+        """
+        now = time.time()
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached.expires_at is not None and cached.expires_at - self.expiry_margin <= now:
+                del self._entries[key]  # -> Expirado no provedor, sendo recriado imediatamente (o conteúdo continua em uso).
+                cached = None
+            elif cached is None and not self.__should_create(key, now):
+                return None
+
+        if cached is not None:
+            return self.__refresh_if_needed(key, cached, now)
+
+        try:
+            system_instruction, pinned_parts = build()
+            cached = self.creator(key, system_instruction, pinned_parts, self.ttl)
+        except Exception as e:
+            # Conteúdo não suportado pelo provedor (ex: abaixo do mínimo de tokens), evitando novas tentativas até o fim do ttl:
+            print(f"[ERROR] - Falha ao criar o conteúdo em cache: {e}")
+            with self._lock:
+                self.failures += 1
+                self._failed[key] = now + self.ttl
+                self.__trim(self._failed)
+            return None
+
+        cached = self.__with_expiration(cached, now)
+        with self._lock:
+            self.creations += 1
+            self._entries[key] = cached
+            evicted = self.__trim(self._entries)
+
+        self.__delete(evicted)
+        return cached
+
+    def invalidate(self, key: str) -> None:
+        """
+        Descarta o conteúdo (ex: o provedor informou que ele não existe mais), sendo recriado na próxima chamada.
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._uses[key] = self.min_uses - 1  # -> O conteúdo estava em uso, sendo recriado no próximo uso.
+
+    def clear(self) -> None:
+        with self._lock:
+            evicted = list(self._entries.values())
+            self._entries.clear()
+            self._uses.clear()
+            self._failed.clear()
+
+        self.__delete(evicted)
+
+    def __should_create(self, key: str, now: float) -> bool:
+        failed_until = self._failed.get(key)
+        if failed_until is not None:
+            if failed_until > now:
+                return False
+            del self._failed[key]
+
+        uses = self._uses.pop(key, 0) + 1
+        if uses < self.min_uses:
+            self._uses[key] = uses
+            self.__trim(self._uses, self.max_entries * 4)
+            return False
+
+        return True
+
+    def __refresh_if_needed(self, key: str, cached: CachedContext, now: float) -> Optional[CachedContext]:
+        if self.refresher is not None and cached.expires_at is not None and cached.expires_at - self.refresh_margin <= now:
+            try:
+                cached = self.__with_expiration(self.refresher(cached.name, self.ttl), now)
+                with self._lock:
+                    self.refreshes += 1
+            except Exception as e:
+                print(f"[ERROR] - Falha ao renovar o conteúdo em cache: {e}")
+                self.invalidate(key)
+                return None
+
+        with self._lock:
+            self.reuses += 1
+            if key in self._entries:
+                self._entries[key] = cached
+                self._entries.move_to_end(key)
+
+        return cached
+
+    def __with_expiration(self, cached: CachedContext, now: float) -> CachedContext:
+        if cached.expires_at is None:
+            return CachedContext(cached.name, now + self.ttl)
+        return cached
+
+    def __trim(self, entries: OrderedDict, limit: Optional[int] = None) -> List[Any]:
+        evicted = []
+        while len(entries) > (limit or self.max_entries):
+            evicted.append(entries.popitem(last=False)[1])
+        return evicted
+
+    def __delete(self, evicted: List[Any]) -> None:
+        if self.deleter is None:
+            return
+
+        for cached in evicted:
+            try:
+                self.deleter(cached.name)
+            except Exception as e:
+                print(f"[ERROR] - Falha ao remover o conteúdo em cache: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
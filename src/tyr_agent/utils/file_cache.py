@@ -0,0 +1,88 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Optional, Tuple, Union
+
+
+class FileConversionCache:
+    """
+    Cache LRU, limitado em bytes, para arquivos já convertidos (base64, types.Part, etc).
+    As chaves são baseadas no conteúdo do arquivo (hash) ou, para paths, em path + mtime + tamanho,
+    evitando reler e reconverter o mesmo arquivo a cada interação.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes: int = max_bytes
+        self.current_bytes: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._items: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(file: Union[str, bytes, BytesIO], namespace: str) -> Optional[str]:
+        """
+        Gera a chave do arquivo no cache.
+        :param file: Arquivo (path, base64, bytes ou BytesIO).
+        :param namespace: Prefixo da chave, usado para separar conversões diferentes do mesmo arquivo (ex: modelo + nome).
+        :return: Chave do arquivo, ou None caso o tipo não seja suportado.
+        """
+        if isinstance(file, str):
+            if os.path.isfile(file):
+                stat = os.stat(file)
+                return f"{namespace}|path:{os.path.abspath(file)}:{stat.st_mtime_ns}:{stat.st_size}"
+            return f"{namespace}|sha256:{hashlib.sha256(file.encode()).hexdigest()}"
+        elif isinstance(file, BytesIO):
+            return f"{namespace}|sha256:{hashlib.sha256(file.getbuffer()[file.tell():]).hexdigest()}"
+        elif isinstance(file, (bytes, bytearray, memoryview)):
+            return f"{namespace}|sha256:{hashlib.sha256(file).hexdigest()}"
+        return None
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        if key is None:
+            return None
+
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: Optional[str], value: Any, size: int) -> None:
+        """
+        Adiciona um item ao cache, removendo os itens menos usados caso o limite de bytes seja ultrapassado.
+        Itens maiores que o próprio limite não são armazenados.
+        :param key: Chave do item.
+        :param value: Arquivo convertido.
+        :param size: Tamanho aproximado do item em bytes.
+        :return: None
+        """
+        if key is None or size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._items:
+                self.current_bytes -= self._items.pop(key)[1]
+
+            self._items[key] = (value, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, (_, removed_size) = self._items.popitem(last=False)
+                self.current_bytes -= removed_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, List, Optional, TypeVar
+import threading
+
+from tyr_agent.utils.tracing import trace_span
+
+T = TypeVar("T")
+
+MAX_CONVERSION_WORKERS: int = 8
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_CONVERSION_WORKERS, thread_name_prefix="tyr-file-conversion")
+        return _executor
+
+
+def _convert_item(convert: Callable[[Any, str], Optional[T]], item: dict) -> Optional[T]:
+    with trace_span("file.convert", file_name=item["file_name"]) as span:
+        converted = convert(item["file"], item["file_name"])
+        if converted is None:
+            span.set_attribute("converted", False)
+        return converted
+
+
+def convert_files_concurrently(convert: Callable[[Any, str], Optional[T]], files: List[dict]) -> List[Optional[T]]:
+    """
+    Converte os arquivos de uma requisição em paralelo, utilizando um pool de threads compartilhado.
+    A leitura de disco (e a maior parte da codificação) libera o GIL, então o tempo total fica próximo ao do maior arquivo.
+    :param convert: Função de conversão do mixin, recebendo (file, file_name).
+    :param files: Lista de dicionários com as chaves "file" e "file_name".
+    :return: Lista com os arquivos convertidos, na mesma ordem da entrada (None para os que falharam).
+    """
+    if len(files) <= 1:
+        return [_convert_item(convert, item) for item in files]
+
+    # Cada conversão roda com uma cópia do contexto de quem chamou (ex: relatório de arquivos da requisição):
+    contexts = [copy_context() for _ in files]
+    return list(_get_executor().map(lambda ctx, item: ctx.run(_convert_item, convert, item), contexts, files))
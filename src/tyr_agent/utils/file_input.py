@@ -0,0 +1,174 @@
+import base64
+import binascii
+import contextlib
+import mmap
+import os
+import re
+from dataclasses import dataclass
+from enum import Enum
+from io import BytesIO
+from typing import Iterator, Optional, Union
+
+FileLike = Union[str, bytes, bytearray, memoryview, BytesIO]
+
+_BASE64_PATTERN = re.compile(r"[A-Za-z0-9+/]*={0,2}")
+
+# Tamanho mínimo de uma string base64 sem o prefixo "data:" (evita tratar palavras curtas, como "foto", como base64):
+_MIN_BASE64_LENGTH = 8
+
+
+class FileInputKind(str, Enum):
+    PATH = "path"
+    BYTES = "bytes"
+    MEMORYVIEW = "memoryview"
+    BYTESIO = "bytesio"
+    DATA_URL = "data_url"
+    BASE64 = "base64"
+
+
+@dataclass(frozen=True)
+class FileInput:
+    """
+    Representação tipada de um arquivo recebido pelos agentes (path, bytes, memoryview, BytesIO, data URL ou base64).
+    O tipo é detectado uma única vez, sem tentativas de decodificação, e o conteúdo é acessado sem cópias sempre que possível.
+    """
+    kind: FileInputKind
+    value: FileLike
+
+    # Arquivos em disco a partir desse tamanho são lidos via mmap:
+    MMAP_THRESHOLD = 8 * 1024 * 1024
+
+    @classmethod
+    def detect(cls, file: FileLike) -> Optional["FileInput"]:
+        """
+        Identifica o tipo do arquivo recebido.
+        Strings iniciadas por "data:" são data URLs e strings que apontam para um arquivo existente são paths.
+        As demais strings só são tratadas como base64 quando têm o formato de um base64 (alfabeto, tamanho e padding),
+        sem decodificá-las: o conteúdo é decodificado uma única vez, apenas quando os bytes são necessários.
+        :param file: Arquivo a ser identificado.
+        :return: FileInput correspondente, ou None caso o tipo não seja suportado ou a string não seja um path nem um base64.
+        """
+        if isinstance(file, str):
+            if file.startswith("data:"):
+                return cls(FileInputKind.DATA_URL, file)
+            if os.path.isfile(file):
+                return cls(FileInputKind.PATH, file)
+            if len(file) >= _MIN_BASE64_LENGTH and _is_base64(file):
+                return cls(FileInputKind.BASE64, file)
+            return None
+        elif isinstance(file, (bytes, bytearray)):
+            return cls(FileInputKind.BYTES, file)
+        elif isinstance(file, memoryview):
+            return cls(FileInputKind.MEMORYVIEW, file)
+        elif isinstance(file, BytesIO):
+            return cls(FileInputKind.BYTESIO, file)
+        return None
+
+    @property
+    def is_encoded(self) -> bool:
+        return self.kind in (FileInputKind.DATA_URL, FileInputKind.BASE64)
+
+    def base64_payload(self) -> Optional[str]:
+        """
+        Retorna o conteúdo base64 de um data URL ou de uma string base64, sem decodificá-lo.
+        Apenas o formato do base64 é validado (alfabeto, tamanho e padding).
+        :return: String base64 (sem o header do data URL), ou None caso o arquivo não esteja codificado ou seja inválido.
+        """
+        if self.kind == FileInputKind.DATA_URL:
+            payload = self.value.split(",", 1)[1] if "," in self.value else None
+        elif self.kind == FileInputKind.BASE64:
+            payload = self.value
+        else:
+            return None
+
+        if not payload or not _is_base64(payload):
+            return None
+        return payload
+
+    @contextlib.contextmanager
+    def open_buffer(self) -> Iterator[Optional[Union[bytes, bytearray, memoryview, mmap.mmap]]]:
+        """
+        Abre o conteúdo do arquivo como um buffer (bytes-like), evitando cópias:
+        - bytes e memoryview são retornados diretamente;
+        - BytesIO é exposto via getbuffer(), a partir da posição atual;
+        - arquivos grandes em disco são mapeados em memória (mmap).
+        O buffer só é válido dentro do bloco "with".
+        :return: Buffer com o conteúdo do arquivo, ou None caso não seja possível lê-lo.
+        """
+        if self.kind == FileInputKind.PATH:
+            try:
+                f = open(self.value, "rb")
+            except OSError:
+                yield None
+                return
+
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                if size >= self.MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                        yield mapped_file
+                else:
+                    yield f.read()
+
+        elif self.kind in (FileInputKind.BYTES, FileInputKind.MEMORYVIEW):
+            yield self.value
+
+        elif self.kind == FileInputKind.BYTESIO:
+            buffer = self.value.getbuffer()
+            view = buffer[self.value.tell():]
+            try:
+                yield view
+            finally:
+                view.release()
+                buffer.release()
+
+        else:
+            yield self.decode_base64()
+
+    def read_bytes(self) -> Optional[bytes]:
+        """
+        Retorna o conteúdo do arquivo como bytes (para APIs que exigem bytes, como o types.Part do Gemini).
+        Entradas que já são bytes são retornadas sem cópia.
+        :return: Bytes do arquivo, ou None caso não seja possível lê-lo.
+        """
+        if self.kind == FileInputKind.BYTES and isinstance(self.value, bytes):
+            return self.value
+
+        if self.kind == FileInputKind.BYTESIO:
+            return self.value.read()
+
+        with self.open_buffer() as buffer:
+            if buffer is None:
+                return None
+            return buffer if isinstance(buffer, bytes) else bytes(buffer)
+
+    def decode_base64(self) -> Optional[bytes]:
+        """
+        Decodifica um data URL ou uma string base64, adicionando o padding apenas quando necessário.
+        :return: Bytes decodificados, ou None caso a string não seja um base64 válido.
+        """
+        payload = self.base64_payload()
+        if payload is None:
+            return None
+
+        missing_padding = len(payload) % 4
+        if missing_padding:
+            payload += "=" * (4 - missing_padding)
+
+        try:
+            return base64.b64decode(payload, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+
+
+def _is_base64(value: str) -> bool:
+    """
+    Verifica se a string tem o formato de um base64 (alfabeto, tamanho e padding), sem decodificá-la.
+    :param value: String a ser verificada.
+    :return: True caso a string tenha o formato de um base64.
+    """
+    if len(value) % 4 == 1 or not _BASE64_PATTERN.fullmatch(value):
+        return False
+
+    # O padding só é válido no final de um base64 com tamanho múltiplo de 4:
+    return not value.endswith("=") or len(value) % 4 == 0
@@ -1,4 +1,9 @@
 import base64
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from io import BytesIO
+from typing import List, Optional, Tuple, Union
 
 
 def image_to_base64(caminho_imagem: str) -> str:
@@ -22,3 +27,120 @@ def image_to_base64(caminho_imagem: str) -> str:
     except Exception as e:
         print(f"Erro ao converter imagem: {e}")
         return ""
+
+
+PREPROCESSABLE_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp"}
+
+# Formatos de saída suportados pelo pré-processamento e seus tipos mime:
+IMAGE_FORMAT_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+
+@dataclass(frozen=True)
+class ImagePreprocessConfig:
+    """
+    Configuração do pré-processamento de imagens antes do envio ao modelo.
+    :param max_dimension: Maior dimensão (largura ou altura) permitida, em pixels. Imagens maiores são reduzidas mantendo a proporção.
+    :param format: Formato de saída da imagem ("JPEG", "PNG" ou "WEBP").
+    :param quality: Qualidade da compressão (1 a 95).
+    """
+    max_dimension: int = 1568
+    format: str = "JPEG"
+    quality: int = 85
+
+    def __post_init__(self):
+        if self.format.upper() not in IMAGE_FORMAT_MIME_TYPES:
+            raise ValueError(f"Formato de imagem não suportado: '{self.format}'. Use um dos formatos: {', '.join(IMAGE_FORMAT_MIME_TYPES)}.")
+
+    @property
+    def mime_type(self) -> str:
+        return IMAGE_FORMAT_MIME_TYPES[self.format.upper()]
+
+    @property
+    def cache_tag(self) -> str:
+        return f"{self.max_dimension}:{self.format.upper()}:{self.quality}"
+
+
+def preprocess_image(data: Union[bytes, memoryview], mime_type: str, config: ImagePreprocessConfig) -> Tuple[bytes, str]:
+    """
+    Reduz e recomprime uma imagem conforme a configuração informada.
+    Caso o resultado não seja menor que o original (e a imagem não precise ser reduzida), o original é mantido.
+    Requer a biblioteca Pillow (pip install tyr-agent[images]).
+    :param data: Bytes da imagem original.
+    :param mime_type: Tipo mime da imagem original.
+    :param config: Configuração do pré-processamento.
+    :return: Tupla contendo os bytes da imagem e o seu tipo mime.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError as e:
+        raise ImportError("O pré-processamento de imagens requer a biblioteca Pillow: pip install tyr-agent[images]") from e
+
+    try:
+        with Image.open(BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            was_resized = max(image.size) > config.max_dimension
+            image.thumbnail((config.max_dimension, config.max_dimension))
+
+            if config.format.upper() == "JPEG" and image.mode != "RGB":
+                image = _flatten_to_rgb(image)
+
+            output = BytesIO()
+            image.save(output, format=config.format.upper(), quality=config.quality, optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        # Imagem inválida, grande demais ou não suportada pelo Pillow, então o original é enviado.
+        return bytes(data), mime_type
+
+    processed = output.getvalue()
+    if not was_resized and len(processed) >= len(data):
+        return bytes(data), mime_type
+
+    return processed, config.mime_type
+
+
+def _flatten_to_rgb(image):
+    """
+    Converte a imagem para RGB (exigido pelo JPEG), aplicando as áreas transparentes sobre um fundo branco
+    em vez de deixá-las pretas.
+    :param image: Imagem do Pillow.
+    :return: Imagem em RGB.
+    """
+    from PIL import Image
+
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+
+    if image.mode in ("RGBA", "LA", "PA"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+
+    return image.convert("RGB")
+
+
+class AttachmentReport:
+    """
+    Relatório dos arquivos enviados em uma requisição, com o tamanho original e o tamanho enviado de cada arquivo.
+    """
+
+    def __init__(self):
+        self.items: List[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, file_name: str, original_bytes: int, sent_bytes: int) -> None:
+        with self._lock:
+            self.items.append({"file_name": file_name, "original_bytes": original_bytes, "sent_bytes": sent_bytes})
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(item["original_bytes"] - item["sent_bytes"] for item in self.items)
+
+
+# Relatório da requisição atual (definido pelos modelos durante a montagem das mensagens):
+current_attachment_report: ContextVar[Optional[AttachmentReport]] = ContextVar("current_attachment_report", default=None)
+
+
+def record_attachment(file_name: str, original_bytes: int, sent_bytes: int) -> None:
+    report = current_attachment_report.get()
+    if report is not None:
+        report.add(file_name, original_bytes, sent_bytes)
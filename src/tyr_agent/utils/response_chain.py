@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+# Conversa (agente ou sessão) da interação atual (definida pelos agentes e usada pelos modelos para encadear as respostas):
+current_conversation_key: ContextVar[Optional[str]] = ContextVar("current_conversation_key", default=None)
+
+# Tamanho da janela do histórico local da conversa atual (ex: MAX_HISTORY do agente), ou None quando não há janela:
+current_history_window: ContextVar[Optional[int]] = ContextVar("current_history_window", default=None)
+
+
+@dataclass
+class ResponseChain:
+    """
+    Estado de uma conversa mantida no servidor do provedor (ex: previous_response_id da OpenAI).
+    :param response_id: ID da última resposta da conversa.
+    :param prompt_hash: Hash do prompt de sistema enviado no início da conversa.
+    :param turns: Hash de cada turno (mensagem do usuário + respostas do agente) presente na conversa do servidor.
+    :param expires_at: Momento (timestamp) em que a resposta deixa de estar disponível no servidor.
+    """
+    response_id: str
+    prompt_hash: int
+    turns: List[int] = field(default_factory=list)
+    expires_at: float = 0.0
+
+
+@dataclass
+class ChainRequest:
+    """
+    Dados de uma requisição feita com (ou sem) encadeamento, usados para atualizar a conversa após a resposta.
+    :param key: Conversa (agente ou sessão) da requisição.
+    :param prompt_hash: Hash do prompt de sistema da requisição.
+    :param turns: Turnos presentes no servidor após a requisição (sem o turno atual).
+    :param previous_response_id: ID da resposta anterior, ou None quando o histórico completo é reenviado.
+    """
+    key: str
+    prompt_hash: int
+    turns: List[int]
+    previous_response_id: Optional[str] = None
+
+
+class ResponseChainStore:
+    """
+    Guarda o ID da última resposta de cada conversa, permitindo enviar apenas a nova mensagem do usuário.
+    O encadeamento é descartado (e o histórico completo reenviado) quando o histórico local deixa de corresponder
+    à conversa do servidor (interação editada, removida ou filtrada pelo score), quando o prompt muda,
+    quando a conversa chega ao dobro da janela do histórico local (ou a max_chain_turns) ou quando a resposta anterior expira.
+
+    Com a janela do histórico local cheia, os turnos mais antigos que saem da janela continuam na conversa do servidor:
+    enquanto o encadeamento não é reiniciado, o modelo pode ver até o dobro dos turnos da janela local.
+    Ao reiniciar, apenas a janela local é reenviada.
+    """
+
+    def __init__(self, max_chain_turns: int = 50, ttl: float = 29 * 24 * 60 * 60, max_conversations: int = 10000):
+        """
+        :param max_chain_turns: Quantidade máxima de turnos na conversa do servidor antes de reenviar apenas a janela do histórico.
+        O encadeamento também é reiniciado quando a conversa do servidor chega ao dobro da janela do histórico local.
+        :param ttl: Tempo (em segundos) em que uma resposta é considerada disponível no servidor (30 dias na OpenAI).
+        :param max_conversations: Quantidade máxima de conversas mantidas em memória (LRU).
+        """
+        self.max_chain_turns: int = max_chain_turns
+        self.ttl: float = ttl
+        self.max_conversations: int = max_conversations
+
+        self.chained: int = 0
+        self.replays: int = 0
+
+        self._chains: "OrderedDict[str, ResponseChain]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def turn_hash(user_text: str, agent_texts: Iterable[str]) -> int:
+        return hash((user_text, tuple(agent_texts)))
+
+    def begin(self, key: str, prompt: str, history_turns: Iterable[Tuple[str, List[str]]], window: Optional[int] = None) -> ChainRequest:
+        """
+        Verifica se a conversa pode ser encadeada com a resposta anterior.
+        :param key: Conversa (agente ou sessão).
+        :param prompt: Prompt de sistema da requisição.
+        :param history_turns: Turnos do histórico local, no formato (mensagem do usuário, respostas do agente).
+        :param window: Tamanho da janela do histórico local, None para exigir que o histórico local seja toda a conversa do servidor.
+        :return: ChainRequest com o previous_response_id, ou sem ele caso o histórico completo deva ser reenviado.
+        """
+        prompt_hash = hash(prompt)
+        turns = [self.turn_hash(user_text, agent_texts) for user_text, agent_texts in history_turns]
+
+        with self._lock:
+            chain = self._chains.get(key)
+            if chain is not None and self.__can_chain(chain, prompt_hash, turns, window):
+                self._chains.move_to_end(key)
+                self.chained += 1
+                return ChainRequest(key, prompt_hash, chain.turns, chain.response_id)
+
+            self.replays += 1
+            return ChainRequest(key, prompt_hash, turns)
+
+    def commit(self, request: ChainRequest, user_text: str, response_id: str, response_text: str) -> None:
+        """
+        Registra a nova resposta como o fim da conversa no servidor.
+        :param request: Requisição retornada pelo begin.
+        :param user_text: Mensagem do usuário enviada.
+        :param response_id: ID da resposta recebida.
+        :param response_text: Texto da resposta recebida (o mesmo salvo no histórico pelo agente).
+        :return: None
+        """
+        turns = request.turns + [self.turn_hash(user_text, [response_text])]
+
+        with self._lock:
+            self._chains[request.key] = ResponseChain(response_id, request.prompt_hash, turns, time.time() + self.ttl)
+            self._chains.move_to_end(request.key)
+            while len(self._chains) > self.max_conversations:
+                self._chains.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._chains.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chains.clear()
+
+    def __can_chain(self, chain: ResponseChain, prompt_hash: int, turns: List[int], window: Optional[int]) -> bool:
+        if chain.prompt_hash != prompt_hash or chain.expires_at <= time.time():
+            return False
+        if not turns or len(chain.turns) > min(2 * len(turns), self.max_chain_turns):
+            return False
+
+        # O histórico local (janela) precisa ser o final da conversa do servidor:
+        if chain.turns[-len(turns):] != turns:
+            return False
+
+        # Turnos a mais no servidor só são aceitos com a janela local cheia (saíram da janela, não foram removidos ou filtrados):
+        return len(chain.turns) == len(turns) or (window is not None and len(turns) >= window)
+
+    def __len__(self) -> int:
+        return len(self._chains)
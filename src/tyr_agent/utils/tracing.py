@@ -0,0 +1,292 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class Span:
+    """
+    Trecho medido de uma operação (chamada ao modelo, execução de função, conversão de arquivo, storage, etc).
+    :param name: Nome da operação (ex: "model.generate", "tool.execute", "storage.save_history").
+    :param trace_id: Identificador do rastreamento (compartilhado por todos os spans de um mesmo chat).
+    :param span_id: Identificador do span.
+    :param parent_id: Identificador do span pai, ou None caso seja o span raiz.
+    :param start_time_ns: Início da operação (timestamp em nanossegundos).
+    :param end_time_ns: Fim da operação (timestamp em nanossegundos), ou None enquanto ela não termina.
+    :param attributes: Atributos da operação (ex: nome do agente, do modelo ou da função).
+    :param error: Erro ocorrido durante a operação, no formato "Tipo: mensagem".
+    """
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time_ns: int
+    end_time_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time_ns is None:
+            return None
+        return (self.end_time_ns - self.start_time_ns) / 1_000_000
+
+    @property
+    def status(self) -> str:
+        return "error" if self.error is not None else "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time_ns": self.start_time_ns,
+            "end_time_ns": self.end_time_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class SpanExporter(ABC):
+    """
+    Destino dos spans gerados. As subclasses devem implementar on_end (e, opcionalmente, on_start).
+    """
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    @abstractmethod
+    def on_end(self, span: Span) -> None:
+        """
+        Recebe o span finalizado.
+        """
+
+
+class InMemorySpanExporter(SpanExporter):
+    """
+    Guarda os spans finalizados em memória. Útil em testes e para inspecionar a latência de um chat.
+    """
+
+    def __init__(self, max_spans: Optional[int] = 10000):
+        """
+        :param max_spans: Quantidade máxima de spans mantidos (os mais antigos são descartados), None para ilimitado.
+        """
+        self.max_spans: Optional[int] = max_spans
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            if self.max_spans is not None and len(self.spans) > self.max_spans:
+                del self.spans[:len(self.spans) - self.max_spans]
+
+    def get_spans(self, name: Optional[str] = None, trace_id: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            return [
+                span for span in self.spans
+                if (name is None or span.name == name) and (trace_id is None or span.trace_id == trace_id)
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+
+class LoggingSpanExporter(SpanExporter):
+    """
+    Registra cada span finalizado via logging (logger "tyr_agent.tracing", por padrão).
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+        self.logger: logging.Logger = logger or logging.getLogger("tyr_agent.tracing")
+        self.level: int = level
+
+    def on_end(self, span: Span) -> None:
+        level = logging.ERROR if span.error is not None else self.level
+        if not self.logger.isEnabledFor(level):
+            return
+
+        attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        error = f" error={span.error!r}" if span.error is not None else ""
+        self.logger.log(level, f"[{span.trace_id[:8]}] {span.name} {span.duration_ms:.1f}ms {attributes}{error}".rstrip())
+
+
+class OpenTelemetrySpanExporter(SpanExporter):
+    """
+    Repassa os spans para o OpenTelemetry (requer o pacote opentelemetry-api), mantendo a hierarquia e os tempos originais.
+    """
+
+    def __init__(self, tracer: Any = None):
+        """
+        :param tracer: Tracer do OpenTelemetry, por padrão usa trace.get_tracer("tyr_agent").
+        """
+        from opentelemetry import trace
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("tyr_agent")
+        self._open_spans: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._open_spans.get(span.parent_id) if span.parent_id is not None else None
+
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self.tracer.start_span(span.name, context=context, start_time=span.start_time_ns)
+
+        with self._lock:
+            self._open_spans[span.span_id] = otel_span
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            otel_span = self._open_spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+
+        for key, value in span.attributes.items():
+            if value is not None:
+                otel_span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+
+        if span.error is not None:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+
+        otel_span.end(end_time=span.end_time_ns)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("tyr_agent_current_span", default=None)
+
+
+class _NoopSpan:
+    """
+    Span utilizado quando o rastreamento está desativado: não mede nem registra nada.
+    """
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """
+    Context manager que inicia o span na entrada (tornando-o o span atual) e o finaliza na saída.
+    """
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer: Tracer = tracer
+        parent = _current_span.get()
+        self.span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent is not None else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent is not None else None,
+            start_time_ns=0,
+            attributes=attributes,
+        )
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.span.start_time_ns = time.time_ns()
+        self.token = _current_span.set(self.span)
+        self.tracer._emit("on_start", self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.span.end_time_ns = time.time_ns()
+        if exc_value is not None and self.span.error is None:
+            self.span.record_error(exc_value)
+
+        _current_span.reset(self.token)
+        self.tracer._emit("on_end", self.span)
+        return False
+
+
+class Tracer:
+    """
+    Gera os spans e os envia aos exporters configurados. Sem exporters, o rastreamento fica desativado.
+    """
+
+    def __init__(self, exporters: Optional[List[SpanExporter]] = None):
+        self.exporters: List[SpanExporter] = list(exporters or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        if not self.exporters:
+            return _NOOP_SPAN
+        return _ActiveSpan(self, name, attributes or {})
+
+    def _emit(self, event: str, span: Span) -> None:
+        for exporter in self.exporters:
+            try:
+                getattr(exporter, event)(span)
+            except Exception as e:
+                # Falhas de um exporter nunca devem interromper o agente:
+                print(f"[ERROR] - Falha no exporter {type(exporter).__name__}: {e}")
+
+
+_tracer = Tracer()
+
+
+def configure_tracing(*exporters: SpanExporter) -> Tracer:
+    """
+    Define os exporters do rastreamento global. Chamar sem exporters desativa o rastreamento.
+    :param exporters: Destinos dos spans (ex: InMemorySpanExporter(), LoggingSpanExporter()).
+    :return: Tracer global configurado.
+    """
+    _tracer.exporters = list(exporters)
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def trace_span(name: str, **attributes: Any):
+    """
+    Mede uma operação, utilizando o span atual (se houver) como pai.
+    Com o rastreamento desativado retorna um span vazio, sem custo de medição.
+
+    Ex:
+        with trace_span("tool.execute", tool_name="soma") as span:
+            ...
+    :param name: Nome da operação.
+    :param attributes: Atributos iniciais do span.
+    :return: Context manager que retorna o span.
+    """
+    if not _tracer.exporters:
+        return _NOOP_SPAN
+    return _ActiveSpan(_tracer, name, attributes)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
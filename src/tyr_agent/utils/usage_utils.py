@@ -0,0 +1,222 @@
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+
+class TokenUsage:
+    """
+    Consumo de tokens de uma interação, com os dados (tokens e latência) de cada chamada feita ao modelo
+    e o relatório dos arquivos enviados (tamanho original e tamanho enviado de cada arquivo).
+    """
+
+    def __init__(self):
+        self.calls: List[dict] = []
+        self.attachments: List[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, input_tokens: int, output_tokens: int, cached_tokens: int = 0, latency_ms: float = 0.0) -> None:
+        with self._lock:
+            self.calls.append({
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cached_tokens": cached_tokens,
+                "latency_ms": latency_ms,
+            })
+
+    def add_attachments(self, items: List[dict]) -> None:
+        with self._lock:
+            self.attachments.extend(items)
+
+    @property
+    def attachment_bytes_saved(self) -> int:
+        return sum(item["original_bytes"] - item["sent_bytes"] for item in self.attachments)
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(call["input_tokens"] for call in self.calls)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(call["output_tokens"] for call in self.calls)
+
+    @property
+    def cached_tokens(self) -> int:
+        return sum(call["cached_tokens"] for call in self.calls)
+
+    @property
+    def model_latency_ms(self) -> float:
+        return sum(call["latency_ms"] for call in self.calls)
+
+    def to_dict(self) -> dict:
+        data = {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "model_latency_ms": self.model_latency_ms,
+            "calls": list(self.calls),
+        }
+        if self.attachments:
+            data["attachments"] = list(self.attachments)
+            data["attachment_bytes_saved"] = self.attachment_bytes_saved
+        return data
+
+
+# Consumo da interação atual (definido pelos agentes e preenchido pelos modelos a cada chamada):
+current_token_usage: ContextVar[Optional[TokenUsage]] = ContextVar("current_token_usage", default=None)
+
+
+def record_usage(input_tokens: Optional[int], output_tokens: Optional[int], cached_tokens: Optional[int] = 0, latency_ms: float = 0.0) -> None:
+    usage = current_token_usage.get()
+    if usage is not None:
+        usage.add(input_tokens or 0, output_tokens or 0, cached_tokens or 0, latency_ms)
+
+
+def record_attachments(items: List[dict]) -> None:
+    usage = current_token_usage.get()
+    if usage is not None and items:
+        usage.add_attachments(items)
+
+
+class UsageTotals:
+    """
+    Totais acumulados de consumo (interações, chamadas, tokens e latência).
+    Interações canceladas (ex: despacho especulativo descartado) não contam como interações nem como erros,
+    apenas no contador "cancelled" e nos tokens consumidos.
+    """
+    __slots__ = ("interactions", "errors", "cancelled", "calls", "input_tokens", "output_tokens", "cached_tokens", "latency_ms", "model_latency_ms", "history_size")
+
+    def __init__(self):
+        self.interactions: int = 0
+        self.errors: int = 0
+        self.cancelled: int = 0
+        self.calls: int = 0
+        self.input_tokens: int = 0
+        self.output_tokens: int = 0
+        self.cached_tokens: int = 0
+        self.latency_ms: float = 0.0
+        self.model_latency_ms: float = 0.0
+        self.history_size: int = 0
+
+    def add(self, usage: TokenUsage, latency_ms: float, history_size: int, failed: bool, cancelled: bool = False) -> None:
+        self.calls += len(usage.calls)
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+        self.cached_tokens += usage.cached_tokens
+        if cancelled:
+            self.cancelled += 1
+            return
+
+        self.interactions += 1
+        self.errors += int(failed)
+        self.latency_ms += latency_ms
+        self.model_latency_ms += usage.model_latency_ms
+        self.history_size += history_size
+
+    def to_dict(self) -> dict:
+        interactions = self.interactions or 1
+        return {
+            "interactions": self.interactions,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "total_tokens": self.input_tokens + self.output_tokens,
+            "latency_ms": self.latency_ms,
+            "avg_latency_ms": self.latency_ms / interactions,
+            "model_latency_ms": self.model_latency_ms,
+            "avg_input_tokens": self.input_tokens / interactions,
+            "avg_history_size": self.history_size / interactions,
+        }
+
+
+class AgentMetrics:
+    """
+    Métricas de consumo de um agente: totais do agente e de cada sessão (as sessões mais antigas são descartadas).
+    """
+
+    def __init__(self, max_sessions: int = 1000):
+        """
+        :param max_sessions: Quantidade máxima de sessões com métricas mantidas em memória.
+        """
+        self.max_sessions: int = max_sessions
+        self.totals: UsageTotals = UsageTotals()
+        self.sessions: "OrderedDict[str, UsageTotals]" = OrderedDict()
+
+    def add(self, usage: TokenUsage, latency_ms: float, history_size: int, session_id: Optional[str] = None, failed: bool = False, cancelled: bool = False) -> None:
+        """
+        Registra o consumo de uma interação.
+        :param usage: Consumo de tokens da interação.
+        :param latency_ms: Latência total da interação.
+        :param history_size: Quantidade de interações do histórico enviadas ao modelo.
+        :param session_id: Sessão da interação, caso exista.
+        :param failed: Define se a interação terminou com erro.
+        :param cancelled: Define se a interação foi cancelada (ex: despacho especulativo descartado).
+        :return: None
+        """
+        self.totals.add(usage, latency_ms, history_size, failed, cancelled)
+
+        if session_id is None:
+            return
+
+        session_totals = self.sessions.get(session_id)
+        if session_totals is None:
+            session_totals = self.sessions[session_id] = UsageTotals()
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(session_id)
+
+        session_totals.add(usage, latency_ms, history_size, failed, cancelled)
+
+    def get_session(self, session_id: str) -> Optional[dict]:
+        session_totals = self.sessions.get(session_id)
+        return session_totals.to_dict() if session_totals is not None else None
+
+    def to_dict(self) -> Dict[str, dict]:
+        return {
+            **self.totals.to_dict(),
+            "sessions": {session_id: totals.to_dict() for session_id, totals in self.sessions.items()},
+        }
+
+    def reset(self) -> None:
+        self.totals = UsageTotals()
+        self.sessions.clear()
+
+
+class SpeculationMetrics:
+    """
+    Métricas do despacho especulativo do ManagerAgent (sub-agente iniciado em paralelo com o roteamento).
+    """
+    __slots__ = ("attempts", "hits", "misses", "failures", "latency_saved_ms", "wasted_ms")
+
+    def __init__(self):
+        self.attempts: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.failures: int = 0
+        self.latency_saved_ms: float = 0.0
+        self.wasted_ms: float = 0.0
+
+    def add_hit(self, latency_saved_ms: float) -> None:
+        self.hits += 1
+        self.latency_saved_ms += latency_saved_ms
+
+    def add_miss(self, wasted_ms: float) -> None:
+        self.misses += 1
+        self.wasted_ms += wasted_ms
+
+    def to_dict(self) -> dict:
+        decided = self.hits + self.misses
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+            "hit_rate": self.hits / decided if decided else 0.0,
+            "latency_saved_ms": self.latency_saved_ms,
+            "avg_latency_saved_ms": self.latency_saved_ms / self.hits if self.hits else 0.0,
+            "wasted_ms": self.wasted_ms,
+        }
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from tyr_agent import SimpleAgent
+from tyr_agent.models.cascade_model import CascadeModel
+from tyr_agent.models.fake_model import FakeModel
+
+
+class FailingModel(FakeModel):
+    async def agenerate(self, prompt_build, user_input, files, history, use_history):
+        raise RuntimeError("indisponível")
+
+
+def generate(model, user_input="q"):
+    return asyncio.run(model.agenerate("prompt", user_input, None, None, False))
+
+
+def test_cascade_accepts_the_first_tier_when_checks_pass():
+    fast, strong = FakeModel("fast", response="resposta rápida"), FakeModel("strong", response="resposta forte")
+    cascade = CascadeModel([fast, strong], checks=[CascadeModel.min_length(5), CascadeModel.confident()])
+
+    assert generate(cascade) == "resposta rápida"
+    assert strong.calls == 0
+    assert [(stats["calls"], stats["accepted"], stats["escalated"]) for stats in cascade.get_stats()] == [(1, 1, 0), (0, 0, 0)]
+
+
+@pytest.mark.parametrize("fast_response, checks", [
+    ("Não tenho certeza.", [CascadeModel.confident()]),
+    ("ok", [CascadeModel.min_length(5)]),
+    ('{"call_agents": true,', [CascadeModel.valid_json()]),
+    ("x" * 50, [CascadeModel.max_length(10)]),
+])
+def test_cascade_escalates_when_a_check_fails(fast_response, checks):
+    fast, strong = FakeModel("fast", response=fast_response), FakeModel("strong", response="resposta forte")
+    cascade = CascadeModel([fast, strong], checks=checks)
+
+    assert generate(cascade) == "resposta forte"
+    assert [(stats["calls"], stats["accepted"], stats["escalated"]) for stats in cascade.get_stats()] == [(1, 0, 1), (1, 1, 0)]
+
+
+def test_cascade_escalates_on_errors_and_always_accepts_the_last_tier():
+    strong = FakeModel("strong", response="?")
+    cascade = CascadeModel([FailingModel("broken"), FakeModel("fast", response=""), strong])
+
+    assert generate(cascade) == "?"
+    stats = cascade.get_stats()
+    assert stats[0]["errors"] == 1
+    assert stats[1]["escalated"] == 1
+    assert stats[2]["accepted"] == 1
+
+
+def test_cascade_raises_when_the_last_tier_fails():
+    cascade = CascadeModel([FakeModel("fast", response=""), FailingModel("broken")])
+
+    with pytest.raises(RuntimeError):
+        generate(cascade)
+    assert cascade.get_stats()[1]["errors"] == 1
+
+
+def test_cascade_streams_the_accepted_tier():
+    cascade = CascadeModel([FakeModel("fast", response="não sei"), FakeModel("strong", response="resposta forte")], checks=[CascadeModel.confident()])
+
+    async def run():
+        return "".join([chunk async for chunk in cascade.stream("prompt", "q", None, None, False)])
+
+    assert asyncio.run(run()) == "resposta forte"
+
+
+def test_cascade_works_as_an_agent_model():
+    cascade = CascadeModel([FakeModel("fast", response="não sei"), FakeModel("strong", response="resposta forte")], checks=[CascadeModel.confident()])
+    agent = SimpleAgent("p", "Agent", cascade, use_storage=False)
+
+    assert asyncio.run(agent.chat("q")) == "resposta forte"
+    assert agent.get_metrics()["calls"] == 2
+
+
+class FailingAfterToolsModel(FakeModel):
+    async def generate_with_functions(self, prompt_build, user_input, files, history, use_history, functions, final_prompt):
+        await super().generate_with_functions(prompt_build, user_input, files, history, use_history, functions, final_prompt)
+        raise RuntimeError("falha após as funções")
+
+
+def generate_with_functions(model, functions):
+    return asyncio.run(model.generate_with_functions("prompt", "q", None, None, False, functions, None))
+
+
+def make_tool():
+    calls = []
+
+    def send_email(to: str) -> str:
+        """Envia um e-mail."""
+        calls.append(to)
+        return "enviado"
+
+    return send_email, calls
+
+
+def test_cascade_does_not_escalate_after_executing_functions():
+    send_email, calls = make_tool()
+    fast = FakeModel("fast", response="?", function_calls={"send_email": {"to": "a@b.c"}})
+    strong = FakeModel("strong", response="resposta forte", function_calls={"send_email": {"to": "a@b.c"}})
+    cascade = CascadeModel([fast, strong], checks=[CascadeModel.min_length(20)])
+
+    response = generate_with_functions(cascade, [send_email])
+
+    assert response.startswith("?")
+    assert calls == ["a@b.c"]
+    assert strong.calls == 0
+    assert cascade.get_stats()[0]["accepted"] == 1
+
+
+def test_cascade_raises_errors_after_executing_functions():
+    send_email, calls = make_tool()
+    fast = FailingAfterToolsModel("fast", function_calls={"send_email": {"to": "a@b.c"}})
+    strong = FakeModel("strong", response="resposta forte")
+    cascade = CascadeModel([fast, strong])
+
+    with pytest.raises(RuntimeError):
+        generate_with_functions(cascade, [send_email])
+    assert calls == ["a@b.c"]
+    assert strong.calls == 0
+    assert cascade.get_stats()[0]["errors"] == 1
+
+
+def test_cascade_escalates_with_functions_while_none_was_executed():
+    calls = []
+
+    async def lookup(code: str) -> str:
+        """Consulta um pedido."""
+        calls.append(code)
+        return "entregue"
+
+    fast = FakeModel("fast", response="")
+    strong = FakeModel("strong", response="pedido", function_calls={"lookup": {"code": "42"}})
+    cascade = CascadeModel([fast, strong])
+
+    assert generate_with_functions(cascade, [lookup]).endswith("lookup=entregue")
+    assert calls == ["42"]
+    assert [stats["escalated"] for stats in cascade.get_stats()] == [1, 0]
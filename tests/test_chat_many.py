@@ -0,0 +1,63 @@
+import asyncio
+
+from tyr_agent import InteractionHistory, SimpleAgent
+from tyr_agent.models.fake_model import FakeModel
+
+
+class DelayedModel(FakeModel):
+    """FakeModel cuja latência depende da mensagem (as primeiras mensagens terminam por último)."""
+
+    def __init__(self, delays, **kwargs):
+        super().__init__(**kwargs)
+        self.delays = delays
+        self.finished = []
+
+    async def agenerate(self, prompt_build, user_input, files, history, use_history):
+        if user_input == "boom":
+            raise RuntimeError("falha simulada")
+        await asyncio.sleep(self.delays.get(user_input, 0))
+        self.finished.append(user_input)
+        return f"r:{user_input}"
+
+
+def test_chat_many_keeps_the_input_order(tmp_path):
+    model = DelayedModel({"a": 0.06, "b": 0.03, "c": 0.0})
+    agent = SimpleAgent("p", "Agent", model, storage=InteractionHistory(str(tmp_path / "h.json")))
+
+    results = asyncio.run(agent.chat_many(["a", "b", "c"]))
+
+    assert model.finished == ["c", "b", "a"]
+    assert [result["user_input"] for result in results] == ["a", "b", "c"]
+    assert [result["response"] for result in results] == ["r:a", "r:b", "r:c"]
+    assert [item["interaction"]["user"] for item in agent.get_agent_history()] == ["a", "b", "c"]
+    assert [item["id"] for item in agent.get_agent_history()] == [result["interaction_id"] for result in results]
+
+
+def test_chat_many_isolates_failures(tmp_path):
+    agent = SimpleAgent("p", "Agent", DelayedModel({}), storage=InteractionHistory(str(tmp_path / "h.json")))
+
+    results = asyncio.run(agent.chat_many(["a", "boom", {"user_input": "c"}]))
+
+    assert [result["response"] for result in results] == ["r:a", None, "r:c"]
+    assert results[1]["error"] == "RuntimeError: falha simulada"
+    assert results[1]["interaction_id"] is None
+    assert [item["interaction"]["user"] for item in agent.storage.load_history("Agent")] == ["a", "c"]
+
+
+def test_chat_many_shares_the_history_snapshot(tmp_path):
+    seen = {}
+
+    class RecordingModel(FakeModel):
+        async def agenerate(self, prompt_build, user_input, files, history, use_history):
+            seen[user_input] = [user for user, _ in self._iter_history_turns(history, use_history)]
+            return "ok"
+
+    agent = SimpleAgent("p", "Agent", RecordingModel(), storage=InteractionHistory(str(tmp_path / "h.json")))
+
+    async def run():
+        await agent.chat("first")
+        await agent.chat_many(["x", "y"], concurrency=1)
+
+    asyncio.run(run())
+
+    assert seen["x"] == seen["y"] == ["first"]
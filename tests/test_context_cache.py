@@ -0,0 +1,150 @@
+import pytest
+
+from tyr_agent.utils import context_cache
+from tyr_agent.utils.context_cache import CachedContext, ContextCacheManager
+
+
+class FakeProvider:
+    """Endpoint falso de cache de contexto: registra as criações, renovações e remoções."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.created = []
+        self.refreshed = []
+        self.deleted = []
+        self.fail_create = False
+        self.fail_refresh = False
+
+    def create(self, key, system_instruction, pinned_parts, ttl):
+        if self.fail_create:
+            raise RuntimeError("conteúdo abaixo do mínimo de tokens")
+        self.created.append(key)
+        return CachedContext(f"cachedContents/{len(self.created)}", self.clock.now + ttl)
+
+    def refresh(self, name, ttl):
+        if self.fail_refresh:
+            raise RuntimeError("conteúdo não encontrado")
+        self.refreshed.append(name)
+        return CachedContext(name, self.clock.now + ttl)
+
+    def delete(self, name):
+        self.deleted.append(name)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(context_cache.time, "time", clock.time)
+    return clock
+
+
+def make_manager(clock, **kwargs):
+    provider = FakeProvider(clock)
+    manager = ContextCacheManager(provider.create, provider.refresh, provider.delete, **kwargs)
+    return manager, provider
+
+
+def build():
+    return "prompt", []
+
+
+def test_content_is_created_only_after_min_uses(clock):
+    manager, provider = make_manager(clock, min_uses=3)
+
+    assert manager.get_or_create("k", build) is None
+    assert manager.get_or_create("k", build) is None
+    cached = manager.get_or_create("k", build)
+
+    assert cached.name == "cachedContents/1"
+    assert manager.get_or_create("k", build) == cached
+    assert provider.created == ["k"]
+    assert (manager.creations, manager.reuses) == (1, 1)
+
+
+def test_ttl_is_refreshed_near_the_expiration(clock):
+    manager, provider = make_manager(clock, min_uses=1, ttl=3600, refresh_margin=600)
+    cached = manager.get_or_create("k", build)
+
+    clock.now += 1000
+    assert manager.get_or_create("k", build) == cached
+    assert provider.refreshed == []
+
+    clock.now += 2100  # -> Dentro da margem de renovação.
+    refreshed = manager.get_or_create("k", build)
+
+    assert provider.refreshed == [cached.name]
+    assert refreshed.expires_at == clock.now + 3600
+    assert manager.refreshes == 1
+
+
+def test_expired_content_is_recreated(clock):
+    manager, provider = make_manager(clock, min_uses=1, ttl=3600, expiry_margin=60)
+    manager.refresher = None  # -> Sem renovação, o conteúdo expira no provedor.
+    manager.get_or_create("k", build)
+
+    clock.now += 3600
+    cached = manager.get_or_create("k", build)
+
+    assert cached.name == "cachedContents/2"
+    assert provider.created == ["k", "k"]
+
+
+def test_failed_creation_backs_off_until_the_ttl(clock):
+    manager, provider = make_manager(clock, min_uses=1, ttl=3600)
+    provider.fail_create = True
+
+    assert manager.get_or_create("k", build) is None
+    provider.fail_create = False
+
+    # Durante o ttl a criação não é tentada novamente:
+    assert manager.get_or_create("k", build) is None
+    assert provider.created == []
+    assert manager.failures == 1
+
+    clock.now += 3601
+    assert manager.get_or_create("k", build) is not None
+    assert provider.created == ["k"]
+
+
+def test_invalidated_content_is_recreated_on_the_next_use(clock):
+    manager, provider = make_manager(clock, min_uses=2)
+    manager.get_or_create("k", build)
+    manager.get_or_create("k", build)
+
+    manager.invalidate("k")
+    cached = manager.get_or_create("k", build)
+
+    assert cached.name == "cachedContents/2"
+    assert provider.created == ["k", "k"]
+
+
+def test_failed_refresh_invalidates_the_content(clock):
+    manager, provider = make_manager(clock, min_uses=1, ttl=3600, refresh_margin=600)
+    manager.get_or_create("k", build)
+    provider.fail_refresh = True
+
+    clock.now += 3100
+    assert manager.get_or_create("k", build) is None
+    assert len(manager) == 0
+    assert manager.get_or_create("k", build).name == "cachedContents/2"
+
+
+def test_evicted_and_cleared_contents_are_deleted_from_the_provider(clock):
+    manager, provider = make_manager(clock, min_uses=1, max_entries=2)
+    for key in ("a", "b", "c"):
+        manager.get_or_create(key, build)
+
+    assert provider.deleted == ["cachedContents/1"]
+    assert len(manager) == 2
+
+    manager.clear()
+    assert provider.deleted == ["cachedContents/1", "cachedContents/2", "cachedContents/3"]
+    assert len(manager) == 0
@@ -0,0 +1,49 @@
+import base64
+from io import BytesIO
+
+import pytest
+
+from tyr_agent.mixins.gpt_file_mixins import GPTFileMixin
+from tyr_agent.utils.file_cache import FileConversionCache
+from tyr_agent.utils.file_input import FileInput, FileInputKind
+
+PDF_BYTES = b"%PDF-1.4 arquivo de teste"
+
+
+def test_detect_file_inputs(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(PDF_BYTES)
+    encoded = base64.b64encode(PDF_BYTES).decode()
+
+    assert FileInput.detect(str(path)).kind == FileInputKind.PATH
+    assert FileInput.detect(f"data:application/pdf;base64,{encoded}").kind == FileInputKind.DATA_URL
+    assert FileInput.detect(encoded).read_bytes() == PDF_BYTES
+    assert FileInput.detect(BytesIO(PDF_BYTES)).read_bytes() == PDF_BYTES
+    assert FileInput.detect(memoryview(PDF_BYTES)).read_bytes() == PDF_BYTES
+
+
+@pytest.mark.parametrize("value", ["foto.png", "/tmp/nao/existe.pdf", "abcd", "relatorio", "aGVsbG8gd29ybGQ!"])
+def test_strings_that_are_not_paths_or_base64_are_rejected(value):
+    assert FileInput.detect(value) is None
+
+
+def test_missing_files_are_skipped_with_an_error(capsys):
+    mixin = GPTFileMixin()
+    mixin.file_cache = FileConversionCache()
+
+    assert mixin.convert_item_to_gpt_model("nao-existe.pdf", "nao-existe.pdf") is None
+    assert "[ERROR]" in capsys.readouterr().out
+
+
+def test_base64_is_decoded_only_when_the_bytes_are_needed(monkeypatch):
+    encoded = base64.b64encode(PDF_BYTES).decode()
+    decoded = []
+    original_b64decode = base64.b64decode
+    monkeypatch.setattr(base64, "b64decode", lambda *args, **kwargs: decoded.append(1) or original_b64decode(*args, **kwargs))
+
+    file_input = FileInput.detect(encoded)
+    assert file_input.base64_payload() == encoded
+    assert decoded == []
+
+    assert file_input.read_bytes() == PDF_BYTES
+    assert len(decoded) == 1
@@ -0,0 +1,78 @@
+import base64
+import time
+
+from google.genai import types
+
+from tyr_agent.mixins.gemini_file_mixins import GeminiFileMixin
+from tyr_agent.mixins.gpt_file_mixins import GPTFileMixin
+from tyr_agent.utils.attachment_manager import AttachmentManager, UploadedFile
+from tyr_agent.utils.file_cache import FileConversionCache
+
+PDF_BYTES = b"%PDF-1.4 arquivo de teste"
+
+
+class FakeUploader:
+    """Endpoint de upload falso: registra os envios e pode simular falhas."""
+
+    def __init__(self, fail=False, expires_in=None):
+        self.fail = fail
+        self.expires_in = expires_in
+        self.uploads = []
+
+    def __call__(self, data, file_name, mime_type):
+        if self.fail:
+            raise ConnectionError("sem conexão")
+        self.uploads.append(file_name)
+        expires_at = time.time() + self.expires_in if self.expires_in is not None else None
+        return UploadedFile(f"file-{len(self.uploads)}", mime_type, expires_at)
+
+
+def make_mixin(mixin_class, uploader):
+    mixin = mixin_class()
+    mixin.file_cache = FileConversionCache()
+    mixin.attachment_manager = AttachmentManager(uploader)
+    return mixin
+
+
+def test_files_are_uploaded_once_and_reused():
+    uploader = FakeUploader()
+    mixin = make_mixin(GPTFileMixin, uploader)
+
+    first = mixin.upload_item_to_gpt(PDF_BYTES, "a.pdf")
+    second = mixin.upload_item_to_gpt(PDF_BYTES, "a.pdf")
+
+    assert first == second == {"type": "input_file", "file_id": "file-1"}
+    assert uploader.uploads == ["a.pdf"]
+    assert (mixin.attachment_manager.uploads, mixin.attachment_manager.reuses) == (1, 1)
+
+
+def test_expired_files_are_uploaded_again():
+    uploader = FakeUploader(expires_in=10)
+    mixin = make_mixin(GeminiFileMixin, uploader)
+    mixin.attachment_manager.expiry_margin = 60
+
+    mixin.upload_item_to_gemini(PDF_BYTES, "a.pdf")
+    part = mixin.upload_item_to_gemini(PDF_BYTES, "a.pdf")
+
+    assert part.file_data.file_uri == "file-2"
+    assert uploader.uploads == ["a.pdf", "a.pdf"]
+
+
+def test_failed_gpt_upload_falls_back_to_inline_data(capsys):
+    mixin = make_mixin(GPTFileMixin, FakeUploader(fail=True))
+
+    data_url, file_name = mixin.upload_item_to_gpt(PDF_BYTES, "a.pdf")
+
+    assert data_url == "data:application/pdf;base64," + base64.b64encode(PDF_BYTES).decode()
+    assert file_name == "a.pdf"
+    assert "[ERROR]" in capsys.readouterr().out
+
+
+def test_failed_gemini_upload_falls_back_to_inline_data(capsys):
+    mixin = make_mixin(GeminiFileMixin, FakeUploader(fail=True))
+
+    part = mixin.upload_item_to_gemini(PDF_BYTES, "a.pdf")
+
+    assert isinstance(part, types.Part)
+    assert part.inline_data.data == PDF_BYTES
+    assert "[ERROR]" in capsys.readouterr().out
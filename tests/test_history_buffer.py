@@ -0,0 +1,92 @@
+import pytest
+
+from tyr_agent.entities.interaction import Interaction
+from tyr_agent.storage.history_buffer import HistoryBuffer
+
+
+def make_interactions(count):
+    return [Interaction(f"u{index}", [f"a{index}"], "simple") for index in range(count)]
+
+
+def users(buffer):
+    return [interaction.user for interaction in buffer]
+
+
+def test_append_keeps_only_the_most_recent_interactions():
+    buffer = HistoryBuffer(maxlen=3, interactions=make_interactions(5))
+
+    assert len(buffer) == 3
+    assert users(buffer) == ["u2", "u3", "u4"]
+
+    buffer.append({"id": "manual", "interaction": {"user": "dict", "agent": ["a"]}, "type_agent": "simple"})
+    assert users(buffer) == ["u3", "u4", "dict"]
+    assert isinstance(buffer[-1], Interaction)
+
+
+def test_appending_an_existing_id_moves_it_to_the_end():
+    interactions = make_interactions(3)
+    buffer = HistoryBuffer(interactions=interactions)
+
+    buffer.append(interactions[0])
+
+    assert users(buffer) == ["u1", "u2", "u0"]
+    assert len(buffer) == 3
+
+
+def test_indexing_and_slicing():
+    interactions = make_interactions(6)
+    buffer = HistoryBuffer(interactions=interactions)
+
+    assert [buffer[index] for index in range(-6, 6)] == interactions + interactions
+    assert buffer[1:4] == interactions[1:4]
+    assert list(reversed(buffer)) == interactions[::-1]
+
+    for index in (6, -7):
+        with pytest.raises(IndexError):
+            buffer[index]
+
+
+def test_get_rate_and_remove_by_id():
+    interactions = make_interactions(3)
+    buffer = HistoryBuffer(interactions=interactions)
+    interaction_id = interactions[1].id
+
+    assert buffer.get(interaction_id) is interactions[1]
+    assert buffer.rate(interaction_id, 4) is interactions[1]
+    assert interactions[1].score == 4
+    assert buffer.rate("inexistente", 4) is None
+
+    assert buffer.remove(interaction_id)
+    assert not buffer.remove(interaction_id)
+    assert users(buffer) == ["u0", "u2"]
+
+
+def test_keep_only_filters_in_place():
+    interactions = make_interactions(4)
+    interactions[0].score, interactions[2].score = 1, 5
+    buffer = HistoryBuffer(interactions=interactions)
+
+    buffer.keep_only(lambda interaction: interaction.score is None or interaction.score >= 3)
+
+    assert users(buffer) == ["u1", "u2", "u3"]
+
+
+def test_iteration_uses_a_snapshot():
+    buffer = HistoryBuffer(interactions=make_interactions(2))
+
+    for interaction in buffer:
+        buffer.append(Interaction("novo", ["a"], "simple"))
+
+    assert len(buffer) == 4
+
+
+def test_serialization_and_equality():
+    interactions = make_interactions(2)
+    buffer = HistoryBuffer(interactions=interactions)
+
+    assert buffer.to_dicts() == [interaction.to_dict() for interaction in interactions]
+    assert buffer == [interaction.to_dict() for interaction in interactions]
+    assert buffer == HistoryBuffer(interactions=interactions)
+
+    buffer.clear()
+    assert len(buffer) == 0 and buffer == []
@@ -0,0 +1,60 @@
+import os
+from io import BytesIO
+
+import pytest
+
+from tyr_agent.utils.image_utils import AttachmentReport, ImagePreprocessConfig, current_attachment_report, preprocess_image, record_attachment
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def make_image(mode, size, color, image_format="PNG"):
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def test_preprocess_keeps_transparency_white_and_maps_mime_types():
+    transparent = make_image("RGBA", (3000, 2000), (0, 0, 0, 0))
+
+    jpeg, jpeg_mime = preprocess_image(transparent, "image/png", ImagePreprocessConfig(max_dimension=300))
+    png, png_mime = preprocess_image(transparent, "image/png", ImagePreprocessConfig(max_dimension=300, format="png"))
+
+    assert jpeg_mime == "image/jpeg"
+    assert Image.open(BytesIO(jpeg)).getpixel((0, 0)) == (255, 255, 255)
+    assert png_mime == "image/png"
+    assert Image.open(BytesIO(png)).size == (300, 200)
+    assert preprocess_image(b"invalida", "image/png", ImagePreprocessConfig()) == (b"invalida", "image/png")
+
+    with pytest.raises(ValueError):
+        ImagePreprocessConfig(format="GIF")
+
+
+def test_small_images_are_never_sent_bigger_than_the_original():
+    buffer = BytesIO()
+    Image.frombytes("RGB", (64, 64), os.urandom(64 * 64 * 3)).save(buffer, format="JPEG", quality=10)
+    original = buffer.getvalue()
+
+    processed, mime_type = preprocess_image(original, "image/jpeg", ImagePreprocessConfig(format="PNG"))
+
+    assert (processed, mime_type) == (original, "image/jpeg")
+
+
+def test_decompression_bombs_fall_back_to_the_original(monkeypatch):
+    original = make_image("RGB", (200, 200), (0, 0, 0))
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+
+    assert preprocess_image(original, "image/png", ImagePreprocessConfig()) == (original, "image/png")
+
+
+def test_attachments_are_recorded_in_the_current_report():
+    report = AttachmentReport()
+    token = current_attachment_report.set(report)
+    try:
+        record_attachment("a.png", 1000, 400)
+    finally:
+        current_attachment_report.reset(token)
+    record_attachment("ignorado.png", 10, 10)
+
+    assert report.items == [{"file_name": "a.png", "original_bytes": 1000, "sent_bytes": 400}]
+    assert report.bytes_saved == 600
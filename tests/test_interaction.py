@@ -0,0 +1,80 @@
+import copy
+import json
+
+import pytest
+
+from tyr_agent.entities.interaction import Interaction
+
+STORED = {
+    "id": "2b0f6c1e-8f6a-4c55-9a55-0d7f6f1a2b3c",
+    "timestamp": "2024-05-01T10:20:30.123456+02:00",
+    "interaction": {"user": "pergunta", "agent": ["resposta"], "Sub": ["resposta do sub-agente"]},
+    "called_functions": [{"name": "soma", "args": {"a": 1}}],
+    "type_agent": "manager",
+    "score": 4,
+    "called_agents": True,
+    "usage": {"input_tokens": 10},
+}
+
+
+def test_round_trip_keeps_the_stored_format():
+    interaction = Interaction.from_dict(copy.deepcopy(STORED))
+
+    assert interaction.to_dict() == STORED
+    assert isinstance(interaction.uid, bytes)
+    assert interaction.timestamp == "2024-05-01T10:20:30.123456+02:00"
+    assert Interaction.from_dict(interaction) is interaction
+
+
+def test_non_uuid_ids_and_missing_fields():
+    interaction = Interaction.from_dict({"id": "legacy-1", "interaction": {"user": "u", "agent": ["a"]}})
+
+    assert interaction.id == "legacy-1"
+    assert interaction.to_dict()["called_functions"] == []
+    assert "called_agents" not in interaction.to_dict()
+    assert "usage" not in interaction.to_dict()
+
+
+def test_new_interactions_have_an_id_and_timestamp():
+    interaction = Interaction("u", ["a"], "simple")
+
+    assert len(interaction.id) == 36
+    assert Interaction.parse_id(interaction.id) == interaction.uid
+    assert len(interaction.timestamp) == len("2024-05-01T10:20:30")
+
+
+def test_dict_style_access():
+    interaction = Interaction.from_dict(copy.deepcopy(STORED))
+
+    assert interaction["id"] == STORED["id"]
+    assert interaction["interaction"] == STORED["interaction"]
+    assert interaction.get("score") == 4
+    assert interaction.get("inexistente", "padrão") == "padrão"
+    assert "usage" in interaction and "inexistente" not in interaction
+    assert json.loads(json.dumps(interaction["interaction"])) == STORED["interaction"]
+
+    with pytest.raises(KeyError):
+        interaction["inexistente"]
+
+    interaction["score"] = 2
+    assert interaction.score == 2
+    with pytest.raises(KeyError):
+        interaction["id"] = "outro"
+
+
+def test_interaction_content_writes_through():
+    interaction = Interaction.from_dict(copy.deepcopy(STORED))
+
+    content = interaction["interaction"]
+    content["agent"] = ["editada"]
+    content["Outro"] = ["novo"]
+    del content["Sub"]
+    interaction["interaction"]["agent"].append("extra")
+
+    assert interaction.agent == ["editada", "extra"]
+    assert interaction.to_dict()["interaction"] == {"user": "pergunta", "agent": ["editada", "extra"], "Outro": ["novo"]}
+
+    with pytest.raises(KeyError):
+        del content["user"]
+    with pytest.raises(TypeError):
+        content.clear()
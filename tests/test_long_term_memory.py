@@ -0,0 +1,105 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from tyr_agent.entities.interaction import Interaction
+from tyr_agent.storage.long_term_memory import HashingEmbedder, LongTermMemory
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.embedded = 0
+
+    def __call__(self, texts):
+        self.embedded += len(texts)
+        return super().__call__(texts)
+
+
+def make_interactions():
+    return [
+        Interaction("qual a capital da frança", ["a capital da frança é paris"], "simple"),
+        Interaction("como fazer um bolo de chocolate", ["misture farinha, ovos e chocolate"], "simple"),
+        Interaction("qual o placar do jogo de futebol", ["o jogo de futebol terminou dois a um"], "simple"),
+        Interaction("receita de bolo de cenoura", ["use cenoura, farinha e ovos no bolo"], "simple"),
+    ]
+
+
+def test_search_returns_the_most_similar_interactions_in_chronological_order():
+    interactions = make_interactions()
+    memory = LongTermMemory(top_k=2)
+    memory.add(interactions)
+
+    found = memory.search("quero uma receita de bolo")
+
+    assert [interaction.uid for interaction in found] == [interactions[1].uid, interactions[3].uid]
+    assert memory.search("bolo", exclude=[interactions[1].id, interactions[3].id]) == []
+
+
+def test_search_filters_by_score_but_keeps_unrated_interactions():
+    interactions = make_interactions()
+    memory = LongTermMemory(top_k=4)
+    memory.add(interactions)
+    memory.update_score(interactions[1].id, 1)
+
+    found = memory.search("bolo de chocolate e bolo de cenoura", min_score=3)
+
+    assert interactions[1].uid not in [interaction.uid for interaction in found]
+    assert interactions[3].uid in [interaction.uid for interaction in found]
+
+
+def test_build_history_appends_the_recent_window_after_the_retrieved_interactions():
+    interactions = make_interactions()
+    memory = LongTermMemory(top_k=2, recent_window=1)
+    memory.add(interactions)
+
+    history = memory.build_history("receita de bolo", recent=interactions)
+
+    # A última interação já está na janela recente e não é repetida entre as recuperadas:
+    assert history[-1] is interactions[3]
+    assert [interaction.uid for interaction in history].count(interactions[3].uid) == 1
+    assert interactions[1].uid in [interaction.uid for interaction in history[:-1]]
+
+
+def test_removed_interactions_are_not_returned():
+    interactions = make_interactions()
+    memory = LongTermMemory()
+    memory.add(interactions)
+
+    assert memory.remove(interactions[0].id)
+    assert not memory.remove(interactions[0].id)
+    assert len(memory) == 3
+    assert interactions[0].uid not in [interaction.uid for interaction in memory.search("capital da frança")]
+
+
+def test_saved_index_is_reused_without_recomputing_the_vectors(tmp_path):
+    index_path = str(tmp_path / "memory.npz")
+    interactions = make_interactions()
+
+    memory = LongTermMemory(index_path=index_path)
+    memory.add(interactions)
+    memory.remove(interactions[2].id)
+    memory.save()
+
+    embedder = CountingEmbedder()
+    restored = LongTermMemory(embedder=embedder, index_path=index_path, top_k=1)
+    restored.add(interactions)
+
+    # Apenas a interação removida (que não foi gravada no índice) tem o vetor recalculado:
+    assert embedder.embedded == 1
+    assert [interaction.uid for interaction in restored.search("capital da frança")] == [interactions[0].uid]
+
+
+def test_index_from_another_embedder_is_ignored(tmp_path):
+    index_path = str(tmp_path / "memory.npz")
+    interactions = make_interactions()
+
+    memory = LongTermMemory(embedder=HashingEmbedder(dimension=64), index_path=index_path)
+    memory.add(interactions)
+    memory.save()
+
+    embedder = CountingEmbedder()
+    restored = LongTermMemory(embedder=embedder, index_path=index_path)
+    restored.add(interactions)
+
+    assert embedder.embedded == len(interactions)
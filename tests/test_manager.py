@@ -0,0 +1,205 @@
+import asyncio
+import json
+
+from tyr_agent import ManagerAgent, SimpleAgent
+from tyr_agent.models.fake_model import FakeModel
+
+
+def route(*agent_names):
+    return json.dumps({"call_agents": True, "agents_to_call": [{"agent_to_call": name, "agent_message": "msg"} for name in agent_names]})
+
+
+def route_message(agent_name, message):
+    return json.dumps({"call_agents": True, "agents_to_call": [{"agent_to_call": agent_name, "agent_message": message}]})
+
+
+def make_agent(name, latency):
+    return SimpleAgent(f"Agente {name}.", name, FakeModel(latency=latency, response=lambda user_input: f"{name}:{user_input}"), use_storage=False)
+
+
+def pending_tasks():
+    return [pending for pending in asyncio.all_tasks() if pending is not asyncio.current_task()]
+
+
+def test_stream_events_follow_the_processing_order():
+    agent = make_agent("A", 0.0)
+    manager = ManagerAgent("Manager", FakeModel(response=route("A")), [agent], use_storage=False, synthesis_model=FakeModel(response="resposta final"))
+
+    async def run():
+        return [event async for event in manager.chat_stream("q")]
+
+    events = asyncio.run(run())
+    types = [event["type"] for event in events]
+
+    assert types == ["routing", "agent_started", "agent_finished", "token", "token", "done"]
+    assert events[0]["agents"] == [{"agent_to_call": "A", "agent_message": "msg"}]
+    assert events[2]["response"] == "A:msg" and events[2]["error"] is None
+    assert "".join(event["text"] for event in events if event["type"] == "token") == "resposta final"
+    assert events[-1]["response"] == "resposta final"
+    assert events[-1]["interaction_id"] is not None
+
+
+def test_stream_reports_errors_as_the_last_event():
+    def fail(user_input):
+        raise RuntimeError("roteamento indisponível")
+
+    manager = ManagerAgent("Manager", FakeModel(response=fail), [make_agent("A", 0.0)], use_storage=False)
+
+    async def run():
+        return [event async for event in manager.chat_stream("q")]
+
+    events = asyncio.run(run())
+
+    assert events == [{"type": "error", "error": "RuntimeError: roteamento indisponível"}]
+    assert manager.get_metrics()["errors"] == 1
+
+
+def test_closing_the_stream_cancels_the_processing():
+    slow = make_agent("Slow", 5)
+    manager = ManagerAgent("Manager", FakeModel(response=route("Slow")), [slow], use_storage=False)
+
+    async def run():
+        stream = manager.chat_stream("q")
+        async for event in stream:
+            if event["type"] == "agent_started":
+                break
+        await stream.aclose()
+        # O aclose só retorna após o cancelamento do processamento:
+        return pending_tasks()
+
+    assert asyncio.run(run()) == []
+    assert slow.get_metrics()["cancelled"] == 1
+    assert manager.get_metrics()["cancelled"] == 1
+
+
+def test_plan_runs_dependencies_in_order():
+    seen = {}
+
+    def respond(name):
+        def inner(user_input):
+            seen[name] = user_input
+            return f"{name}-ok"
+        return inner
+
+    first = SimpleAgent("p", "First", FakeModel(latency=0.02, response=respond("First")), use_storage=False)
+    second = SimpleAgent("p", "Second", FakeModel(response=respond("Second")), use_storage=False)
+    plan = {"call_agents": True, "plan": [
+        {"id": "b", "agent_to_call": "Second", "agent_message": "usa a", "depends_on": ["a"]},
+        {"id": "a", "agent_to_call": "First", "agent_message": "começa"},
+    ]}
+    manager = ManagerAgent("Manager", FakeModel(response=json.dumps(plan)), [first, second], use_storage=False, synthesis_model=FakeModel(response="final"))
+
+    assert asyncio.run(manager.chat("q")) == "final"
+    assert "a (First): First-ok" in seen["Second"]
+
+
+def test_plan_timeout_cancels_slow_steps():
+    fast, slow = make_agent("Fast", 0.0), make_agent("Slow", 5)
+    synthesis = FakeModel(response=lambda user_input: "final")
+    manager = ManagerAgent("Manager", FakeModel(response=route("Fast", "Slow")), [fast, slow], plan_timeout=0.1, synthesis_model=synthesis, use_storage=False)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        response = await manager.chat("q")
+        return response, loop.time() - start
+
+    response, elapsed = asyncio.run(run())
+
+    assert response == "final"
+    assert elapsed < 1
+    assert "[Tempo limite excedido]" in synthesis.last_messages[0]["content"]
+    assert "Fast:msg" in synthesis.last_messages[0]["content"]
+    assert slow.get_metrics()["cancelled"] == 1
+    assert slow.get_metrics()["errors"] == 0
+
+
+def test_cancelling_the_manager_cancels_the_plan():
+    slow = make_agent("Slow", 5)
+    manager = ManagerAgent("Manager", FakeModel(response=route("Slow")), [slow], use_storage=False)
+
+    async def run():
+        task = asyncio.create_task(manager.chat("q"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        return pending_tasks()
+
+    assert asyncio.run(run()) == []
+    assert slow.get_metrics()["cancelled"] == 1
+
+
+def test_speculation_hit_reuses_the_running_call():
+    target = SimpleAgent("p", "Target", FakeModel(latency=0.1, response=lambda user_input: f"Target:{user_input}"), use_storage=False)
+    router = FakeModel(latency=0.1, response=route_message("Target", "q"))
+    manager = ManagerAgent("Manager", router, [target], use_storage=False, speculative_routing=True, routing_predictor=lambda user_input, history: "Target", synthesis_model=FakeModel(response="final"))
+
+    assert asyncio.run(manager.chat("q")) == "final"
+
+    speculation = manager.get_metrics()["speculation"]
+    assert (speculation["attempts"], speculation["hits"], speculation["misses"]) == (1, 1, 0)
+    assert speculation["latency_saved_ms"] > 0
+    assert target.get_metrics()["interactions"] == 1
+
+
+def test_speculation_miss_is_discarded():
+    predicted, routed = make_agent("Predicted", 5), make_agent("Routed", 0.0)
+    manager = ManagerAgent("Manager", FakeModel(latency=0.05, response=route("Routed")), [predicted, routed], use_storage=False, speculative_routing=True, routing_predictor=lambda user_input, history: "Predicted", synthesis_model=FakeModel(response="final"))
+
+    assert asyncio.run(manager.chat("q")) == "final"
+
+    speculation = manager.get_metrics()["speculation"]
+    assert (speculation["attempts"], speculation["hits"], speculation["misses"]) == (1, 0, 1)
+    assert predicted.get_metrics()["interactions"] == 0
+    assert predicted.get_metrics()["cancelled"] == 1
+    assert predicted.get_metrics()["errors"] == 0
+    assert routed.get_metrics()["interactions"] == 1
+
+
+def test_speculation_hit_is_saved_in_the_sub_agent_session():
+    target = SimpleAgent("p", "Target", FakeModel(latency=0.05, response="resposta"), use_storage=False)
+    manager = ManagerAgent("Manager", FakeModel(latency=0.05, response=route_message("Target", "q")), [target], use_storage=False, speculative_routing=True, routing_predictor=lambda user_input, history: "Target", synthesis_model=FakeModel(response="final"))
+
+    assert asyncio.run(manager.chat("q", session_id="s1")) == "final"
+
+    assert [interaction["interaction"]["user"] for interaction in target.get_session_history("s1")] == ["q"]
+
+
+def test_speculation_with_a_rephrased_message_is_a_miss_by_default():
+    def make_manager(**kwargs):
+        target = make_agent("Target", 0.05)
+        manager = ManagerAgent("Manager", FakeModel(latency=0.05, response=route("Target")), [target], use_storage=False, speculative_routing=True, routing_predictor=lambda user_input, history: "Target", synthesis_model=FakeModel(response="final"), **kwargs)
+        return manager, target
+
+    manager, target = make_manager()
+    asyncio.run(manager.chat("q"))
+    speculation = manager.get_metrics()["speculation"]
+    assert (speculation["hits"], speculation["misses"]) == (0, 1)
+    # O agente é chamado novamente com a mensagem do roteamento:
+    assert target.agent_model.last_messages[-1]["content"] == "msg"
+
+    manager, target = make_manager(accept_speculation_on_rephrase=True)
+    asyncio.run(manager.chat("q"))
+    speculation = manager.get_metrics()["speculation"]
+    assert (speculation["hits"], speculation["misses"]) == (1, 0)
+    assert target.get_metrics()["interactions"] == 1
+
+
+def test_confirmed_speculation_is_counted_when_the_plan_is_cancelled():
+    target = make_agent("Target", 5)
+    manager = ManagerAgent("Manager", FakeModel(response=route_message("Target", "q")), [target], use_storage=False, speculative_routing=True, routing_predictor=lambda user_input, history: "Target")
+
+    async def run():
+        task = asyncio.create_task(manager.chat("q"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        return pending_tasks()
+
+    assert asyncio.run(run()) == []
+
+    speculation = manager.get_metrics()["speculation"]
+    assert (speculation["attempts"], speculation["hits"], speculation["misses"]) == (1, 0, 1)
+    assert target.get_metrics()["cancelled"] == 1
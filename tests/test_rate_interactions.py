@@ -0,0 +1,75 @@
+import asyncio
+
+from tyr_agent import InteractionHistory, SimpleAgent
+from tyr_agent.models.fake_model import FakeModel
+
+
+def make_agent(tmp_path, monkeypatch=None):
+    storage = InteractionHistory(str(tmp_path / "h.json"))
+    agent = SimpleAgent("Prompt", "Assistente", FakeModel(response="ok"), storage=storage, score_average=3)
+    writes = []
+    if monkeypatch is not None:
+        write_all = storage._write_all
+        monkeypatch.setattr(storage, "_write_all", lambda data: (writes.append(data), write_all(data)))
+    return agent, writes
+
+
+def chat(agent, messages, session_id=None):
+    async def run():
+        for message in messages:
+            await agent.chat(message, session_id=session_id)
+
+    asyncio.run(run())
+
+
+def test_rating_many_interactions_writes_the_storage_once(tmp_path, monkeypatch):
+    agent, writes = make_agent(tmp_path, monkeypatch)
+    chat(agent, ["a", "b", "c"])
+    writes.clear()
+
+    ids = [interaction["id"] for interaction in agent.get_agent_history()]
+    results = agent.rate_interactions({ids[0]: 5, ids[1]: 4, ids[2]: 2})
+
+    assert len(writes) == 1
+    assert results == {ids[0]: (True, True), ids[1]: (True, True), ids[2]: (True, True)}
+    assert [interaction["score"] for interaction in agent.storage.load_history("Assistente")] == [5, 4, 2]
+
+
+def test_only_the_rated_interactions_are_filtered(tmp_path):
+    agent, _ = make_agent(tmp_path)
+    chat(agent, ["a", "b", "c"])
+    ids = [interaction["id"] for interaction in agent.get_agent_history()]
+
+    agent.rate_interactions({ids[1]: 1})
+    assert [interaction["id"] for interaction in agent.get_agent_history()] == [ids[0], ids[2]]
+
+    # Com uma média maior, as interações já no histórico (e não avaliadas novamente) não são verificadas:
+    agent.rate_interactions({ids[2]: 4})
+    agent.score_average = 5
+    agent.rate_interactions({ids[0]: 4})
+    assert [interaction["id"] for interaction in agent.get_agent_history()] == [ids[2]]
+
+
+def test_results_are_reported_per_interaction(tmp_path):
+    agent, _ = make_agent(tmp_path)
+    chat(agent, ["a"])
+    interaction_id = agent.get_agent_history()[0]["id"]
+
+    results = agent.rate_interactions({interaction_id: 4, "missing": 4, "invalid": 9})
+
+    assert results == {interaction_id: (True, True), "missing": (False, False), "invalid": (False, False)}
+
+
+def test_rating_session_interactions(tmp_path):
+    agent, _ = make_agent(tmp_path)
+    chat(agent, ["a", "b"], session_id="s1")
+    ids = [interaction["id"] for interaction in agent.get_session_history("s1")]
+
+    results = agent.rate_interactions({ids[0]: 1, ids[1]: 5}, session_id="s1")
+
+    assert results == {ids[0]: (True, True), ids[1]: (True, True)}
+    assert [interaction["id"] for interaction in agent.get_session_history("s1")] == [ids[1]]
+    assert [interaction["score"] for interaction in agent.storage.load_history("Assistente::s1")] == [1, 5]
+
+    # Sem a sessão, as interações não são encontradas:
+    assert agent.rate_interaction(ids[1], 4) == (False, False)
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from tyr_agent import InteractionHistory, SimpleAgent
+from tyr_agent.models.fake_model import FakeModel
+from tyr_agent.storage.serializers import JsonSerializer
+from tyr_agent.utils.tracing import InMemorySpanExporter, configure_tracing
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    configure_tracing(exporter)
+    yield exporter
+    configure_tracing()
+
+
+def make_records(prefix, count):
+    return [
+        {"id": f"{prefix}{index}", "interaction": {"user": f"u{index}", "agent": ["a"]}, "score": 1 if index % 2 else None}
+        for index in range(count)
+    ]
+
+
+def is_eligible(interaction):
+    return interaction["score"] is None or interaction["score"] >= 3
+
+
+def indexed(exporter):
+    return [span.attributes["indexed"] for span in exporter.get_spans("storage.load_recent_history")]
+
+
+def test_recent_history_is_read_from_the_tail_with_the_index(tmp_path, exporter):
+    storage = InteractionHistory(str(tmp_path / "h.json"))
+    storage.save_many_history("A", make_records("a", 10))
+    storage.save_many_history("B", make_records("b", 3))
+
+    assert os.path.exists(JsonSerializer.index_filename(storage.filename))
+    assert [record["id"] for record in storage.load_recent_history("A", 3)] == ["a7", "a8", "a9"]
+    assert [record["id"] for record in storage.load_recent_history("A", 3, is_eligible)] == ["a4", "a6", "a8"]
+    assert storage.load_recent_history("missing", 3) == []
+    assert indexed(exporter) == [True, True, True]
+
+
+def test_stale_index_falls_back_to_a_full_read(tmp_path, exporter):
+    storage = InteractionHistory(str(tmp_path / "h.json"))
+    storage.save_many_history("A", make_records("a", 5))
+
+    # Arquivo alterado fora do InteractionHistory (o índice fica desatualizado):
+    with open(storage.filename, "w", encoding="utf-8") as f:
+        json.dump({"A": make_records("x", 4)}, f)
+
+    assert [record["id"] for record in storage.load_recent_history("A", 2)] == ["x2", "x3"]
+    assert indexed(exporter) == [False]
+
+    # A próxima gravação recria o índice:
+    storage.save_history("A", {"id": "x4", "interaction": {"user": "u", "agent": ["a"]}, "score": None})
+    assert [record["id"] for record in storage.load_recent_history("A", 2)] == ["x3", "x4"]
+    assert indexed(exporter) == [False, True]
+
+
+def test_missing_index_falls_back_to_a_full_read(tmp_path, exporter):
+    storage = InteractionHistory(str(tmp_path / "h.json"))
+    storage.save_many_history("A", make_records("a", 5))
+    os.remove(JsonSerializer.index_filename(storage.filename))
+
+    assert [record["id"] for record in storage.load_recent_history("A", 2, is_eligible)] == ["a2", "a4"]
+    assert indexed(exporter) == [False]
+
+
+def test_agent_history_from_storage_respects_the_score(tmp_path):
+    storage = InteractionHistory(str(tmp_path / "h.json"))
+    storage.save_many_history("Assistente", make_records("a", 6))
+
+    agent = SimpleAgent("Prompt", "Assistente", FakeModel(), max_history=2, use_storage=False)
+    agent.create_agent_history_with_storage(storage)
+
+    assert [interaction["id"] for interaction in agent.get_agent_history()] == ["a2", "a4"]
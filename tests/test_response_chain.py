@@ -0,0 +1,145 @@
+import asyncio
+import types
+
+import httpx
+from openai import NotFoundError
+
+from tyr_agent import InteractionHistory, SimpleAgent
+from tyr_agent.models.gpt_model import GPTModel
+from tyr_agent.utils.response_chain import ResponseChainStore
+
+
+class StubResponses:
+    """Responses API falsa: registra as requisições e pode simular uma resposta anterior expirada."""
+
+    def __init__(self):
+        self.calls = []
+        self.expire_next_chain = False
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.expire_next_chain and "previous_response_id" in kwargs:
+            self.expire_next_chain = False
+            request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+            raise NotFoundError("Previous response not found", response=httpx.Response(404, request=request), body=None)
+
+        number = len(self.calls)
+        return types.SimpleNamespace(id=f"resp_{number}", output_text=f"answer {number}", usage=None, output=[])
+
+
+def make_agent(tmp_path, **kwargs):
+    model = GPTModel("gpt-4o", api_key="sk-test", use_previous_response_id=True)
+    responses = StubResponses()
+    model.client = types.SimpleNamespace(responses=responses)
+    agent = SimpleAgent("Assistente", "Bot", model, storage=InteractionHistory(str(tmp_path / "h.json")), **kwargs)
+    return agent, responses
+
+
+def test_chain_sends_only_the_new_message(tmp_path):
+    agent, responses = make_agent(tmp_path)
+
+    async def run():
+        await agent.chat("oi")
+        await agent.chat("tudo bem?")
+
+    asyncio.run(run())
+
+    assert "previous_response_id" not in responses.calls[0]
+    assert responses.calls[1]["previous_response_id"] == "resp_1"
+    assert len(responses.calls[1]["input"]) == 1
+
+
+def test_chain_restarts_when_the_previous_response_is_not_found(tmp_path):
+    agent, responses = make_agent(tmp_path)
+
+    async def run():
+        await agent.chat("oi")
+        await agent.chat("tudo bem?")
+        responses.expire_next_chain = True
+        return await agent.chat("e agora?")
+
+    response = asyncio.run(run())
+
+    failed, replayed = responses.calls[-2], responses.calls[-1]
+    assert failed["previous_response_id"] == "resp_2"
+    assert "previous_response_id" not in replayed
+    assert len(replayed["input"]) == 1 + 2 * 2 + 1  # -> prompt, 2 turnos do histórico e a nova mensagem.
+    assert response == f"answer {len(responses.calls)}"
+
+    # A conversa é reiniciada a partir da nova resposta:
+    asyncio.run(agent.chat("continua"))
+    assert responses.calls[-1]["previous_response_id"] == f"resp_{len(responses.calls) - 1}"
+
+
+def test_chain_restarts_after_deleted_interaction(tmp_path):
+    agent, responses = make_agent(tmp_path)
+
+    async def run():
+        await agent.chat("oi")
+        await agent.chat("tudo bem?")
+        agent.delete_interaction(agent.get_agent_history()[0]["id"])
+        await agent.chat("de novo")
+
+    asyncio.run(run())
+
+    assert "previous_response_id" not in responses.calls[-1]
+    assert len(responses.calls[-1]["input"]) == 1 + 2 + 1
+
+
+def test_chain_keeps_chaining_past_a_full_history_window():
+    store = ResponseChainStore(max_chain_turns=50)
+    history = []
+    chained = []
+    replayed_turns = []
+
+    for index in range(12):
+        request = store.begin("agent", "prompt", history[-3:], window=3)
+        chained.append(request.previous_response_id is not None)
+        if request.previous_response_id is None:
+            replayed_turns.append(len(request.turns))
+        store.commit(request, f"u{index}", f"resp_{index}", f"a{index}")
+        history.append((f"u{index}", [f"a{index}"]))
+
+    # A conversa do servidor cresce até o dobro da janela, e então apenas a janela é reenviada:
+    assert chained == [False, True, True, True, True, True, True, False, True, True, True, False]
+    assert replayed_turns == [0, 3, 3]
+
+
+def test_chain_does_not_skip_missing_turns_without_a_window():
+    store = ResponseChainStore()
+    request = store.begin("agent", "prompt", [])
+    store.commit(request, "u0", "resp_0", "a0")
+    request = store.begin("agent", "prompt", [("u0", ["a0"])])
+    store.commit(request, "u1", "resp_1", "a1")
+
+    assert store.begin("agent", "prompt", [("u1", ["a1"])]).previous_response_id is None
+
+
+def test_agent_chains_most_turns_with_a_small_history_window(tmp_path):
+    agent, responses = make_agent(tmp_path, max_history=2)
+
+    async def run():
+        for index in range(9):
+            await agent.chat(f"mensagem {index}")
+
+    asyncio.run(run())
+
+    chained = ["previous_response_id" in call for call in responses.calls]
+    assert sum(chained) >= 6
+    assert all(len(call["input"]) == 1 for call in responses.calls if "previous_response_id" in call)
+    # Ao reiniciar, apenas a janela do histórico (2 turnos) é reenviada:
+    assert all(len(call["input"]) == 1 + 2 * 2 + 1 for call in responses.calls[1:] if "previous_response_id" not in call)
+
+
+def test_chain_restarts_after_deleting_from_a_full_window(tmp_path):
+    agent, responses = make_agent(tmp_path, max_history=2)
+
+    async def run():
+        for index in range(3):
+            await agent.chat(f"mensagem {index}")
+        agent.delete_interaction(agent.get_agent_history()[0]["id"])
+        await agent.chat("de novo")
+
+    asyncio.run(run())
+
+    assert "previous_response_id" not in responses.calls[-1]
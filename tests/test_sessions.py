@@ -0,0 +1,116 @@
+import asyncio
+import gc
+import json
+
+from tyr_agent import InteractionHistory, ManagerAgent, SimpleAgent
+from tyr_agent.models.fake_model import FakeModel
+from tyr_agent.storage.session_cache import SessionHistoryCache
+
+
+class RecordingModel(FakeModel):
+    """FakeModel que guarda as mensagens do histórico enviadas em cada chamada."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen_history = {}
+
+    async def agenerate(self, prompt_build, user_input, files, history, use_history):
+        self.seen_history[user_input] = [user for user, _ in self._iter_history_turns(history, use_history)]
+        return await super().agenerate(prompt_build, user_input, files, history, use_history)
+
+
+def make_manager(tmp_path, sub_model):
+    sub_agent = SimpleAgent("Responde perguntas.", "Sub", sub_model, storage=InteractionHistory(str(tmp_path / "sub.json")))
+    router = FakeModel("router", latency=0.01, response=lambda user_input: json.dumps({"call_agents": True, "agents_to_call": [{"agent_to_call": "Sub", "agent_message": user_input}]}))
+    manager = ManagerAgent("Manager", router, [sub_agent], storage=InteractionHistory(str(tmp_path / "manager.json")), synthesis_model=FakeModel("synthesis", response="final"))
+    return manager, sub_agent
+
+
+def test_sessions_have_isolated_histories(tmp_path):
+    agent = SimpleAgent("p", "Agent", FakeModel(response=lambda user_input: f"r:{user_input}"), storage=InteractionHistory(str(tmp_path / "h.json")))
+
+    async def run():
+        await asyncio.gather(agent.chat("a1", session_id="a"), agent.chat("b1", session_id="b"))
+        await asyncio.gather(agent.chat("a2", session_id="a"), agent.chat("b2", session_id="b"))
+
+    asyncio.run(run())
+
+    assert [item["interaction"]["user"] for item in agent.get_session_history("a")] == ["a1", "a2"]
+    assert [item["interaction"]["user"] for item in agent.get_session_history("b")] == ["b1", "b2"]
+    assert agent.get_agent_history() == []
+    assert [item["interaction"]["user"] for item in agent.storage.load_history("Agent::a")] == ["a1", "a2"]
+
+
+def test_concurrent_turns_of_the_same_session_see_previous_turn(tmp_path):
+    model = RecordingModel(latency=0.01)
+    agent = SimpleAgent("p", "Agent", model, storage=InteractionHistory(str(tmp_path / "h.json")))
+
+    async def run():
+        await asyncio.gather(agent.chat("first", session_id="s"), agent.chat("second", session_id="s"))
+
+    asyncio.run(run())
+
+    assert model.seen_history["first"] == []
+    assert model.seen_history["second"] == ["first"]
+
+
+def test_manager_sessions_keep_sub_agent_histories_separate(tmp_path):
+    sub_model = RecordingModel(latency=0.01, response=lambda user_input: f"sub:{user_input}")
+    manager, sub_agent = make_manager(tmp_path, sub_model)
+
+    async def run():
+        await asyncio.gather(manager.chat("a1", session_id="a"), manager.chat("b1", session_id="b"))
+        await asyncio.gather(manager.chat("a2", session_id="a"), manager.chat("b2", session_id="b"))
+
+    asyncio.run(run())
+
+    assert [item["interaction"]["user"] for item in sub_agent.get_session_history("a")] == ["a1", "a2"]
+    assert [item["interaction"]["user"] for item in sub_agent.get_session_history("b")] == ["b1", "b2"]
+    assert sub_agent.get_agent_history() == []
+    assert sub_model.seen_history["a2"] == ["a1"]
+    assert sub_model.seen_history["b2"] == ["b1"]
+    assert [item["interaction"]["user"] for item in sub_agent.storage.load_history("Sub::b")] == ["b1", "b2"]
+
+
+def test_speculative_dispatch_uses_the_manager_session(tmp_path):
+    sub_model = RecordingModel(latency=0.01, response=lambda user_input: f"sub:{user_input}")
+    manager, sub_agent = make_manager(tmp_path, sub_model)
+    manager.speculative_routing = True
+    manager.routing_predictor = lambda user_input, history: "Sub"
+
+    async def run():
+        await asyncio.gather(manager.chat("a1", session_id="a"), manager.chat("b1", session_id="b"))
+        await manager.chat("a2", session_id="a")
+
+    asyncio.run(run())
+
+    assert manager.get_metrics()["speculation"]["hits"] == 3
+    assert [item["interaction"]["user"] for item in sub_agent.get_session_history("a")] == ["a1", "a2"]
+    assert sub_model.seen_history["a2"] == ["a1"]
+    assert sub_agent.get_agent_history() == []
+
+
+def test_session_locks_are_released_without_history():
+    cache = SessionHistoryCache()
+
+    async def run():
+        for index in range(100):
+            async with cache.lock(f"session-{index}"):
+                pass
+
+    asyncio.run(run())
+    gc.collect()
+
+    assert len(cache._locks) == 0
+
+
+def test_session_lock_is_shared_while_in_use():
+    cache = SessionHistoryCache()
+
+    async def run():
+        lock = cache.lock("s")
+        async with lock:
+            assert cache.lock("s") is lock
+            assert cache._is_busy("s")
+
+    asyncio.run(run())
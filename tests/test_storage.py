@@ -0,0 +1,92 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from tyr_agent import InteractionHistory
+from tyr_agent.entities.interaction import Interaction
+from tyr_agent.storage.retention import RetentionPolicy
+from tyr_agent.storage.serializers import SERIALIZERS, detect_serializer
+
+FORMATS = list(SERIALIZERS)
+
+
+def make_interaction(user, score=None, timestamp=None):
+    data = Interaction(user, [f"r:{user}"], "SimpleAgent", score=score).to_dict()
+    if timestamp is not None:
+        data["timestamp"] = timestamp
+    return data
+
+
+@pytest.mark.parametrize("serializer", FORMATS)
+def test_formats_round_trip(tmp_path, serializer):
+    storage = InteractionHistory(str(tmp_path / "h.history"), serializer=serializer)
+    first = make_interaction("a", score=4)
+    others = [make_interaction("b"), make_interaction("c", timestamp="2024-05-01T10:20:30.123456+02:00")]
+
+    storage.save_history("Agent", first)
+    storage.save_many_history("Agent", others)
+    storage.save_history("Other", make_interaction("z"))
+
+    assert detect_serializer(storage.filename).name == serializer
+    assert storage.load_history("Agent") == [first, *others]
+    assert [item["interaction"]["user"] for item in storage.load_history("Other")] == ["z"]
+    assert [item["interaction"]["user"] for item in storage.load_recent_history("Agent", 2)] == ["b", "c"]
+
+
+@pytest.mark.parametrize("serializer", FORMATS)
+def test_migration_round_trip(tmp_path, serializer):
+    storage = InteractionHistory(str(tmp_path / "h.history"))
+    interactions = [make_interaction("a", score=5), make_interaction("b")]
+    storage.save_many_history("Agent", interactions)
+    original = storage.load_all()
+
+    storage.migrate(serializer)
+    assert detect_serializer(storage.filename).name == serializer
+    assert storage.load_all() == original
+
+    # As próximas gravações usam o novo formato, e a volta para JSON preserva as interações:
+    storage.save_history("Agent", make_interaction("c"))
+    assert storage.update_score("Agent", interactions[1]["id"], 2)
+    storage.migrate("json")
+
+    assert detect_serializer(storage.filename).name == "json"
+    assert [(item["interaction"]["user"], item["score"]) for item in storage.load_history("Agent")] == [("a", 5), ("b", 2), ("c", None)]
+
+
+@pytest.mark.parametrize("serializer", ["json", "jsonl", "msgpack"])
+def test_retention_limits_records_on_save(tmp_path, serializer):
+    storage = InteractionHistory(str(tmp_path / "h.history"), serializer=serializer, retention=RetentionPolicy(max_records=2, prune_every=1))
+
+    for user in ["a", "b", "c", "d"]:
+        storage.save_history("Agent", make_interaction(user))
+
+    assert [item["interaction"]["user"] for item in storage.load_history("Agent")] == ["c", "d"]
+
+
+def test_prune_applies_age_and_score(tmp_path):
+    storage = InteractionHistory(str(tmp_path / "h.json"))
+    old = (datetime.now() - timedelta(days=10)).isoformat()
+    recent = datetime.now().isoformat()
+    storage.save_many_history("Agent", [
+        make_interaction("old", timestamp=old),
+        make_interaction("low", score=1, timestamp=recent),
+        make_interaction("kept", score=4, timestamp=recent),
+        make_interaction("unrated", timestamp=recent),
+    ])
+    storage.save_history("Agent::session", make_interaction("session-old", timestamp=old))
+
+    storage.retention = RetentionPolicy(max_age=24 * 60 * 60, min_score=3)
+
+    assert storage.prune() == 3
+    assert [item["interaction"]["user"] for item in storage.load_history("Agent")] == ["kept", "unrated"]
+    assert storage.load_history("Agent::session") == []
+    assert storage.prune() == 0
+
+
+def test_retention_policy_keeps_unknown_timestamps():
+    policy = RetentionPolicy(max_age=60)
+    now = time.time()
+
+    assert policy.keeps({"timestamp": "ontem"}, now)
+    assert not policy.keeps({"timestamp": datetime.fromtimestamp(now - 120).isoformat()}, now)
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+
+import pytest
+
+from tyr_agent import SimpleAgent
+from tyr_agent.models.fake_model import FakeModel
+from tyr_agent.utils.tracing import InMemorySpanExporter, LoggingSpanExporter, SpanExporter, configure_tracing, get_current_span, trace_span
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    configure_tracing(exporter)
+    yield exporter
+    configure_tracing()
+
+
+def test_spans_are_nested_within_the_same_trace(exporter):
+    with trace_span("parent", agent_name="A") as parent:
+        with trace_span("child") as child:
+            assert get_current_span() is child
+        assert get_current_span() is parent
+    assert get_current_span() is None
+
+    child_span, parent_span = exporter.get_spans()
+    assert (child_span.name, parent_span.name) == ("child", "parent")
+    assert child_span.trace_id == parent_span.trace_id
+    assert child_span.parent_id == parent_span.span_id
+    assert parent_span.parent_id is None
+    assert parent_span.attributes == {"agent_name": "A"}
+    assert parent_span.duration_ms >= child_span.duration_ms >= 0
+
+
+def test_errors_are_recorded_and_propagated(exporter):
+    with pytest.raises(ValueError):
+        with trace_span("fails"):
+            raise ValueError("boom")
+
+    (span,) = exporter.get_spans("fails")
+    assert span.status == "error"
+    assert span.error == "ValueError: boom"
+
+
+def test_agent_chat_emits_chat_and_model_spans(exporter):
+    agent = SimpleAgent("p", "Agent", FakeModel(), use_storage=False)
+
+    asyncio.run(agent.chat("oi"))
+
+    (chat_span,) = exporter.get_spans("agent.chat")
+    model_spans = exporter.get_spans(trace_id=chat_span.trace_id)
+    assert chat_span.attributes["agent_name"] == "Agent"
+    assert any(span.parent_id == chat_span.span_id for span in model_spans)
+
+
+def test_failing_exporters_do_not_break_the_agent(capsys):
+    class BrokenExporter(SpanExporter):
+        def on_end(self, span):
+            raise RuntimeError("exporter fora do ar")
+
+    memory = InMemorySpanExporter()
+    configure_tracing(BrokenExporter(), memory)
+    try:
+        with trace_span("operation"):
+            pass
+    finally:
+        configure_tracing()
+
+    assert [span.name for span in memory.get_spans()] == ["operation"]
+    assert "[ERROR]" in capsys.readouterr().out
+
+
+def test_logging_exporter_writes_each_span(caplog):
+    configure_tracing(LoggingSpanExporter())
+    try:
+        with caplog.at_level(logging.INFO, logger="tyr_agent.tracing"):
+            with trace_span("storage.save_history", agent_name="A"):
+                pass
+    finally:
+        configure_tracing()
+
+    assert "storage.save_history" in caplog.text
+    assert "agent_name=A" in caplog.text
+
+
+def test_in_memory_exporter_is_bounded(exporter):
+    exporter.max_spans = 2
+    for name in ["a", "b", "c"]:
+        with trace_span(name):
+            pass
+
+    assert [span.name for span in exporter.get_spans()] == ["b", "c"]
+
+
+def test_tracing_disabled_is_a_noop():
+    configure_tracing()
+
+    with trace_span("ignored", agent_name="A") as span:
+        span.set_attribute("key", "value")
+        span.record_error(ValueError("ignored"))
+        assert get_current_span() is None
+
+    assert trace_span("other") is span
+    with pytest.raises(TypeError):
+        SpanExporter()